@@ -0,0 +1,271 @@
+"""
+Admission control and load shedding.
+
+Each worker admits a bounded number of requests at a time so that, past
+capacity, requests are turned away quickly instead of all queueing on the
+connection pool until they time out. Endpoints belong to a class:
+
+- catalog: cheap reads (listings, details, facets), favored when slots free up
+- match: the expensive match endpoints
+
+A class runs at most its concurrency limit of requests, and all classes
+together at most ADMISSION_MAX_CONCURRENT. Requests beyond that wait in the
+class's queue for up to its queue-time budget; a full queue or an exhausted
+budget answers 503 with Retry-After. Each client (by remote address) also has a
+token bucket; an empty bucket answers 429. Behind a load balancer, set
+TRUSTED_PROXY_COUNT so the remote address is the one the proxies saw.
+
+A queued request holds a worker thread, so this needs threaded workers
+(gunicorn --worker-class gthread) with about ADMISSION_MAX_CONCURRENT plus
+both queue lengths threads, the 80 of the Procfile for the defaults. A sync
+worker runs one request at a time: the limits are never reached and excess
+requests wait in gunicorn's backlog, where nothing sheds them.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+logger = logging.getLogger('universe.admission')
+
+# Buckets kept per worker; the least recently seen clients are dropped first
+MAX_CLIENTS = 100000
+MAX_RETRY_AFTER = 30
+
+
+class Rejected(Exception):
+    """Request not admitted; status is 429 or 503"""
+
+    def __init__(self, reason, status, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionClass:
+    def __init__(self, name, priority, limit, queue_size, queue_seconds):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_seconds = queue_seconds
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        # Moving average of the time a request holds its slot
+        self.service_seconds = 0.1
+
+    def retry_after(self):
+        """Seconds until the requests ahead are likely done"""
+        backlog = (self.running + self.queued) * self.service_seconds / max(1, self.limit)
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(backlog)))
+
+    def stats(self):
+        return {
+            'priority': self.priority,
+            'limit': self.limit,
+            'running': self.running,
+            'queued': self.queued,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'service_ms': round(self.service_seconds * 1000, 2)
+        }
+
+
+class _Waiter:
+    def __init__(self, admission_class, sequence):
+        self.admission_class = admission_class
+        self.sequence = sequence
+        self.granted = threading.Event()
+
+
+class AdmissionController:
+    """Concurrency limits with a priority queue per worker"""
+
+    def __init__(self, max_concurrent, classes):
+        self.max_concurrent = max_concurrent
+        self.classes = {admission_class.name: admission_class for admission_class in classes}
+        self.running = 0
+        self._waiters = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, name):
+        """Take a slot for the class, waiting up to its budget; raises Rejected"""
+        admission_class = self.classes[name]
+        with self._lock:
+            # Waiters left after a dispatch cannot run, so anything that can run now goes first
+            if self._can_run(admission_class):
+                self._start(admission_class)
+                return
+            if admission_class.queued >= admission_class.queue_size:
+                admission_class.rejected += 1
+                raise Rejected('queue_full', 503, admission_class.retry_after())
+            self._sequence += 1
+            waiter = _Waiter(admission_class, self._sequence)
+            self._waiters.append(waiter)
+            admission_class.queued += 1
+
+        if waiter.granted.wait(admission_class.queue_seconds):
+            return
+        with self._lock:
+            if waiter.granted.is_set():
+                # Granted between the timeout and taking the lock
+                return
+            self._waiters.remove(waiter)
+            admission_class.queued -= 1
+            admission_class.rejected += 1
+            raise Rejected('queue_timeout', 503, admission_class.retry_after())
+
+    def release(self, name, elapsed):
+        admission_class = self.classes[name]
+        with self._lock:
+            admission_class.running -= 1
+            self.running -= 1
+            admission_class.service_seconds += 0.1 * (elapsed - admission_class.service_seconds)
+            self._dispatch()
+
+    def _can_run(self, admission_class):
+        return self.running < self.max_concurrent and admission_class.running < admission_class.limit
+
+    def _start(self, admission_class):
+        admission_class.running += 1
+        admission_class.admitted += 1
+        self.running += 1
+
+    def _dispatch(self):
+        """Hand free slots to waiters, highest priority first, then oldest"""
+        self._waiters.sort(key=lambda waiter: (-waiter.admission_class.priority, waiter.sequence))
+        for waiter in list(self._waiters):
+            if self.running >= self.max_concurrent:
+                break
+            if waiter.admission_class.running < waiter.admission_class.limit:
+                self._waiters.remove(waiter)
+                waiter.admission_class.queued -= 1
+                self._start(waiter.admission_class)
+                waiter.granted.set()
+
+    def stats(self):
+        return {
+            'max_concurrent': self.max_concurrent,
+            'running': self.running,
+            'classes': {name: admission_class.stats() for name, admission_class in self.classes.items()}
+        }
+
+
+class ClientRateLimiter:
+    """Token bucket per client: rate tokens per second, up to burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client):
+        """Take a token, raises Rejected (429) when the client's bucket is empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[client] = (tokens, now)
+                raise Rejected('rate_limited', 429, max(1, math.ceil((1 - tokens) / self.rate)))
+            self._buckets[client] = (tokens - 1, now)
+            if len(self._buckets) > MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def client_id():
+    """The client's address
+
+    X-Forwarded-For is only honoured through ProxyFix (TRUSTED_PROXY_COUNT), which
+    takes the address the trusted proxies appended; earlier entries are whatever
+    the client sent.
+    """
+    return request.remote_addr
+
+
+def admitted(class_name):
+    """Run the view only once the client's rate limit and the class's slots allow it"""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = current_app.extensions.get('admission')
+            if controller is None:
+                return view(*args, **kwargs)
+            try:
+                limiter = current_app.extensions.get('rate_limiter')
+                if limiter is not None:
+                    limiter.take(client_id())
+                controller.acquire(class_name)
+            except Rejected as e:
+                logger.debug("Rejected %s request (%s), retry after %ss", class_name, e.reason, e.retry_after)
+                response = jsonify({'success': False, 'error': f'Server busy ({e.reason}), retry later'})
+                response.status_code = e.status
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+
+            start = time.perf_counter()
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                controller.release(class_name, time.perf_counter() - start)
+                raise
+            if response.is_streamed:
+                # The body is generated after the view returns; hold the slot until it is sent
+                response.call_on_close(lambda: controller.release(class_name, time.perf_counter() - start))
+            else:
+                controller.release(class_name, time.perf_counter() - start)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def init_admission(app):
+    """Per-worker admission control; ADMISSION_CONTROL=false disables it"""
+    app.config.setdefault('ADMISSION_CONTROL', True)
+    app.config.setdefault('ADMISSION_MAX_CONCURRENT', 30)
+    app.config.setdefault('ADMISSION_MATCH_CONCURRENCY', 20)
+    app.config.setdefault('ADMISSION_MATCH_QUEUE', 20)
+    app.config.setdefault('ADMISSION_MATCH_QUEUE_SECONDS', 2.0)
+    app.config.setdefault('ADMISSION_CATALOG_CONCURRENCY', 30)
+    app.config.setdefault('ADMISSION_CATALOG_QUEUE', 30)
+    app.config.setdefault('ADMISSION_CATALOG_QUEUE_SECONDS', 5.0)
+    app.config.setdefault('ADMISSION_CLIENT_RATE', 10.0)
+    app.config.setdefault('ADMISSION_CLIENT_BURST', 30)
+    if not app.config['ADMISSION_CONTROL']:
+        return
+
+    app.extensions['admission'] = AdmissionController(app.config['ADMISSION_MAX_CONCURRENT'], [
+        AdmissionClass(
+            'catalog', 1,
+            app.config['ADMISSION_CATALOG_CONCURRENCY'],
+            app.config['ADMISSION_CATALOG_QUEUE'],
+            app.config['ADMISSION_CATALOG_QUEUE_SECONDS']
+        ),
+        AdmissionClass(
+            'match', 0,
+            app.config['ADMISSION_MATCH_CONCURRENCY'],
+            app.config['ADMISSION_MATCH_QUEUE'],
+            app.config['ADMISSION_MATCH_QUEUE_SECONDS']
+        )
+    ])
+    if app.config['ADMISSION_CLIENT_RATE'] > 0:
+        app.extensions['rate_limiter'] = ClientRateLimiter(
+            app.config['ADMISSION_CLIENT_RATE'],
+            app.config['ADMISSION_CLIENT_BURST']
+        )
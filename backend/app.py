@@ -1,39 +1,169 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
-from backend.models import db, University, Campus, Program, ProgramOffering, ProgramOfferingBoard, ProgramOfferingGroup, ProgramOfferingTest, ProgramOfferingTag, Tag, EntranceTestType
+from backend.models import db, Job, University, Campus, Program, ProgramOffering, ProgramOfferingBoard, ProgramOfferingGroup, ProgramOfferingTest, ProgramOfferingTag, Tag, EntranceTestType
+from backend.admission import admitted, init_admission
+from backend.auth import admin_required
+from backend.bulk_writes import SECTIONS as BULK_SECTIONS, BulkWriteError, apply_bulk
+from backend.candidates import init_candidate_cache
+from backend.catalog import get_catalog
+from backend.catalog_file import init_catalog_file
+from backend.coalescing import coalesced, init_coalescing
+from backend.connections import KEEPALIVE_CONNECT_ARGS, TimedQueuePool, init_connection_management, prepared_text
+from backend.export import FORMATS as EXPORT_FORMATS, export_batches, export_chunks, parquet_available
+from backend.facets import FACETS
+from backend.invalidation import init_invalidation
+from backend.jobs import JobError, enqueue
+from backend.instrumentation import init_query_instrumentation
+from backend.matching import match_offerings, parse_student_profile
+from backend.offerings import compare_offerings, offerings_by_id, parse_ids
+from backend.popularity import get_popularity
+from backend.profiling import current_timer, profiled
+from backend.release import prepare_database
+from backend.routing import init_read_replicas, init_replica_monitor, read_only, use_primary
+from backend.snapshots import SnapshotNotFound, create_snapshot, get_snapshot, rehydrate_snapshot
+from backend.streaming import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, stream_matches
+from backend.sweep import DEFAULT_STEP_OFFERINGS, MAX_STEP_OFFERINGS, parse_range, sweep_matches
+from backend.warmup import init_warmup, pool_state, retry_warm_up, warm_up
 import datetime
 import os
+import tempfile
 from dotenv import load_dotenv
 from sqlalchemy import text
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 DIST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dist")
-app = Flask(__name__, static_folder=DIST_DIR, static_url_path="")
-# Load environment variables
 
+# Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
+api = Blueprint('api', __name__)
+
+def create_app(test_config=None):
+    """Create and configure the Flask application
+
+    test_config overrides the environment-derived settings, e.g. to point the
+    app at a scratch database for benchmarks.
+    """
+    app = Flask(__name__)
+
+    # Database configuration from environment variables
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # PostgreSQL optimizations: no ping per checkout or timed recycling, a
+    # background keepalive checks idle connections instead
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'poolclass': TimedQueuePool,
+        'pool_size': 10,
+        'max_overflow': 20,
+        'connect_args': dict(KEEPALIVE_CONNECT_ARGS)
+    }
+    app.config['DB_KEEPALIVE_SECONDS'] = float(os.getenv('DB_KEEPALIVE_SECONDS', '60'))
+    # Disable when connecting through a transaction-mode pooler (e.g. PgBouncer)
+    app.config['DB_PREPARE_STATEMENTS'] = os.getenv('DB_PREPARE_STATEMENTS', 'true').lower() == 'true'
+
+    # Read replicas: read-only endpoints use these, everything else the primary
+    read_urls = os.getenv('DATABASE_READ_URLS') or os.getenv('DATABASE_READ_URL') or ''
+    app.config['DATABASE_READ_URLS'] = [url.strip() for url in read_urls.split(',') if url.strip()]
+    app.config['REPLICA_MAX_LAG_SECONDS'] = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+    app.config['REPLICA_LAG_CHECK_SECONDS'] = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', '2'))
+
+    # Decide group eligibility in SQL (offering_summary) instead of after fetching every row
+    app.config['MATCH_ELIGIBILITY_SQL'] = os.getenv('MATCH_ELIGIBILITY_SQL', 'true').lower() == 'true'
+    # Answer matches from the worker's in-memory catalog (score/fee range index), no query
+    # per request; the catalog is loaded at warm-up and reloaded when writes are notified
+    app.config['MATCH_FROM_CATALOG'] = os.getenv('MATCH_FROM_CATALOG', 'false').lower() == 'true'
+    # Columnar catalog file written at ingest and memory-mapped by every worker of the
+    # machine (one copy in the page cache); workers check it for a new version this often
+    app.config['CATALOG_FILE'] = os.getenv('CATALOG_FILE', '')
+    app.config['CATALOG_FILE_CHECK_SECONDS'] = float(os.getenv('CATALOG_FILE_CHECK_SECONDS', '5'))
+    # Match candidates are cached per worker without interests, so re-ranking by other
+    # interests skips the query; bounded by cached rows, 0 disables
+    app.config['MATCH_CANDIDATE_CACHE_ROWS'] = int(os.getenv('MATCH_CANDIDATE_CACHE_ROWS', '100000'))
+    app.config['MATCH_CANDIDATE_CACHE_SECONDS'] = float(os.getenv('MATCH_CANDIDATE_CACHE_SECONDS', '300'))
+    # Extra match score for popular programs (rank 1 gets all of it); popularity always breaks ties
+    app.config['MATCH_POPULARITY_POINTS'] = int(os.getenv('MATCH_POPULARITY_POINTS', '0'))
+    # Shared match snapshots: how long a link stays valid and how many offerings it keeps
+    app.config['MATCH_SNAPSHOT_TTL_DAYS'] = float(os.getenv('MATCH_SNAPSHOT_TTL_DAYS', '30'))
+    app.config['MATCH_SNAPSHOT_MAX_OFFERINGS'] = int(os.getenv('MATCH_SNAPSHOT_MAX_OFFERINGS', '1000'))
+
+    # Workers LISTEN for catalog_version bumps and reload the catalog, rankings and
+    # candidate cache; the table is also polled this often in case a NOTIFY is missed
+    app.config['CATALOG_LISTEN'] = os.getenv('CATALOG_LISTEN', 'true').lower() == 'true'
+    app.config['CATALOG_VERSION_POLL_SECONDS'] = float(os.getenv('CATALOG_VERSION_POLL_SECONDS', '30'))
+
+    # Identical concurrent requests share one computation; with COALESCE_LOCK_DIR (a
+    # local directory) workers on the same machine share it too
+    app.config['COALESCE_REQUESTS'] = os.getenv('COALESCE_REQUESTS', 'true').lower() == 'true'
+    app.config['COALESCE_WAIT_SECONDS'] = float(os.getenv('COALESCE_WAIT_SECONDS', '10'))
+    app.config['COALESCE_LOCK_DIR'] = os.getenv('COALESCE_LOCK_DIR', '')
 
-# Database configuration from environment variables
-DATABASE_URL = os.getenv('DATABASE_URL')
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is required. Please check your .env file.")
+    # Admission control: concurrent requests per worker (all endpoints, matches, catalog
+    # reads), queue lengths and queue-time budgets past which requests get a 503, and a
+    # per-client token bucket (requests per second, burst) past which they get a 429.
+    # Queued requests hold threads: size WEB_THREADS to the limit plus both queues
+    app.config['ADMISSION_CONTROL'] = os.getenv('ADMISSION_CONTROL', 'true').lower() == 'true'
+    app.config['ADMISSION_MAX_CONCURRENT'] = int(os.getenv('ADMISSION_MAX_CONCURRENT', '30'))
+    app.config['ADMISSION_MATCH_CONCURRENCY'] = int(os.getenv('ADMISSION_MATCH_CONCURRENCY', '20'))
+    app.config['ADMISSION_MATCH_QUEUE'] = int(os.getenv('ADMISSION_MATCH_QUEUE', '20'))
+    app.config['ADMISSION_MATCH_QUEUE_SECONDS'] = float(os.getenv('ADMISSION_MATCH_QUEUE_SECONDS', '2'))
+    app.config['ADMISSION_CATALOG_CONCURRENCY'] = int(os.getenv('ADMISSION_CATALOG_CONCURRENCY', '30'))
+    app.config['ADMISSION_CATALOG_QUEUE'] = int(os.getenv('ADMISSION_CATALOG_QUEUE', '30'))
+    app.config['ADMISSION_CATALOG_QUEUE_SECONDS'] = float(os.getenv('ADMISSION_CATALOG_QUEUE_SECONDS', '5'))
+    app.config['ADMISSION_CLIENT_RATE'] = float(os.getenv('ADMISSION_CLIENT_RATE', '10'))
+    app.config['ADMISSION_CLIENT_BURST'] = int(os.getenv('ADMISSION_CLIENT_BURST', '30'))
 
-app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Reverse proxies in front of the app that append to X-Forwarded-For; 0 trusts
+    # none and takes the client address from the connection
+    app.config['TRUSTED_PROXY_COUNT'] = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
 
-# PostgreSQL optimizations
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-    'pool_size': 10,
-    'max_overflow': 20
-}
+    # Background jobs (python -m backend.worker); a running job whose worker has been
+    # silent for JOB_LOCK_TIMEOUT_SECONDS is handed to another worker
+    app.config['JOB_POLL_SECONDS'] = float(os.getenv('JOB_POLL_SECONDS', '1'))
+    app.config['JOB_MAX_ATTEMPTS'] = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    app.config['JOB_RETRY_BASE_SECONDS'] = float(os.getenv('JOB_RETRY_BASE_SECONDS', '5'))
+    app.config['JOB_RETRY_MAX_SECONDS'] = float(os.getenv('JOB_RETRY_MAX_SECONDS', '300'))
+    app.config['JOB_LOCK_TIMEOUT_SECONDS'] = float(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', '600'))
 
-CORS(app)
-db.init_app(app)
+    # Query instrumentation: statements slower than the threshold go to the slow-query log
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+    app.config['SLOW_QUERY_EXPLAIN'] = os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() == 'true'
 
-@app.route('/')
+    # Admin features (per-request profiling) are disabled unless ADMIN_TOKEN is set
+    app.config['ADMIN_TOKEN'] = os.getenv('ADMIN_TOKEN')
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'universe-profiles'))
+    app.config['PROFILE_SAMPLE_INTERVAL_MS'] = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '1'))
+
+    # Warm-up: open the pool, load the catalog and run hot queries before serving
+    app.config['WARMUP_ON_START'] = os.getenv('WARMUP_ON_START', 'true').lower() == 'true'
+
+    if test_config:
+        app.config.update(test_config)
+
+    if not app.config['SQLALCHEMY_DATABASE_URI']:
+        raise ValueError("DATABASE_URL environment variable is required. Please check your .env file.")
+
+    if app.config['TRUSTED_PROXY_COUNT']:
+        proxies = app.config['TRUSTED_PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    CORS(app, expose_headers=['X-DB-Queries', 'X-DB-Time', 'X-DB-Wait', 'X-Coalesced'])
+    init_read_replicas(app)
+    db.init_app(app)
+    init_replica_monitor(app)
+    init_query_instrumentation(app)
+    init_connection_management(app)
+    init_candidate_cache(app)
+    init_catalog_file(app)
+    init_invalidation(app)
+    init_coalescing(app)
+    init_admission(app)
+    app.register_blueprint(api)
+    init_warmup(app)
+
+    return app
+
+@api.route('/')
 def home():
     return jsonify({
         "message": "Uni-verse API is running!",
@@ -50,1018 +180,186 @@ def home():
         }
     })
 
-@app.route('/api/match-programs', methods=['POST'])
+@api.route('/healthz/ready')
+def readiness():
+    """Readiness probe: 200 once this worker has warmed up, 503 until then"""
+    app = current_app._get_current_object()
+    state = app.extensions['readiness']
+    if not state.ready:
+        retry_warm_up(app)
+
+    catalog = app.extensions.get('catalog')
+    replicas = app.extensions.get('replicas')
+    return jsonify({
+        **state.to_dict(),
+        'catalog_version': catalog.version if catalog else None,
+        'catalog_offerings': len(catalog) if catalog else 0,
+        'coalescing': app.extensions['coalescing'].stats() if 'coalescing' in app.extensions else None,
+        'admission': app.extensions['admission'].stats() if 'admission' in app.extensions else None,
+        'catalog_listener': app.extensions['catalog_listener'].stats() if 'catalog_listener' in app.extensions else None,
+        'pools': {name or 'default': pool_state(engine) for name, engine in db.engines.items()},
+        'replicas': replicas.state() if replicas else {}
+    }), 200 if state.ready else 503
+
+@api.route('/api/match-programs', methods=['POST'])
+@coalesced
+@admitted('match')
+@profiled
+@read_only
 def match_programs():
     """Match student profile with available program offerings"""
+    timer = current_timer()
     try:
-        data = request.get_json()
-        
-        # Extract student data
-        ssc_percentage = float(data.get('sscPercentage', 0))
-        hsc_percentage = float(data.get('hscPercentage', 0))
-        hsc_group = data.get('hscGroup', '')
-        interests = data.get('interests', [])
-        budget = int(data.get('budget', 0))
-        preferred_location = data.get('preferredLocation', '')
-        
-        # Define subject group restrictions based on official NED prospectus criteria
-        subject_restrictions = {
-            'Pre-Engineering': [
-                # Pre-Engineering: Eligible for ALL programs (most versatile group)
-                # According to prospectus: Eligible for all disciplines available within their academic group
-                'architecture', 'artificial-intelligence', 'biomedical-engineering',
-                'chemical-engineering', 'chemistry', 'civil-engineering', 
-                'computational-finance', 'computer-science', 'computer-systems',
-                'cyber-security', 'data-science', 'development-studies', 'economics',
-                'electrical-engineering', 'electronic-engineering', 'engineering',
-                'english-linguistics', 'finance', 'food-engineering', 'gaming-animation',
-                'ics', 'industrial-manufacturing', 'management-sciences', 
-                'materials-engineering', 'mechanical-engineering', 'metallurgical-engineering',
-                'petrochemical-engineering', 'petroleum-engineering', 'physics',
-                'polymer-engineering', 'software-engineering', 'telecommunications',
-                'textile-sciences'
-            ],
-            'ICS (Computer Science)': [
-                # ICS: Eligible for BS programs + Computer Science + Architecture (NO Engineering)
-                # According to prospectus: NOT eligible for Engineering programs
-                'architecture', 'artificial-intelligence', 'computer-science', 'computer-systems',
-                'cyber-security', 'data-science', 'chemistry', 'computational-finance',
-                'development-studies', 'economics', 'english-linguistics', 'finance',
-                'gaming-animation', 'ics', 'management-sciences', 'physics',
-                'software-engineering', 'telecommunications', 'textile-sciences'
-            ],
-            'Pre-Medical': [
-                # Pre-Medical: Eligible for BS programs + Biomedical Engineering only
-                # According to prospectus: NOT eligible for other Engineering, CS, or Management Sciences
-                'biomedical-engineering', 'chemistry', 'computational-finance', 'development-studies',
-                'economics', 'english-linguistics', 'finance', 'physics'
-            ],
-            'ICom (Commerce)': [
-                # Commerce: Eligible for Management Sciences, Economics & Finance, English Linguistics, Development Studies
-                # According to prospectus: NOT eligible for Engineering, CS, Computational Finance, or Physics
-                'development-studies', 'economics', 'english-linguistics', 'finance', 'management-sciences'
-            ],
-            'IA (Arts)': [
-                # Arts: Eligible for Management Sciences, Economics & Finance, English Linguistics, Development Studies
-                # According to prospectus: NOT eligible for Engineering, CS, Computational Finance, or Physics
-                'development-studies', 'economics', 'english-linguistics', 'finance', 'management-sciences'
-            ]
-        }
-        
-        # Get allowed interests based on HSC group
-        allowed_interests = subject_restrictions.get(hsc_group, [])
-        
-        # Filter interests to only include allowed ones
-        filtered_interests = [interest for interest in interests if interest in allowed_interests]
-        
-        # If no interests match the student's background, use a broader approach
-        if not filtered_interests and hsc_group in subject_restrictions:
-            # Allow some flexibility based on group
-            if hsc_group == 'Pre-Engineering':
-                filtered_interests = ['computer-science', 'engineering', 'Technology']
-            elif hsc_group == 'Pre-Medical':
-                filtered_interests = ['Medicine', 'Health Sciences']
-            elif hsc_group == 'ICS (Computer Science)':
-                filtered_interests = ['computer-science', 'Technology']
-            elif hsc_group == 'ICom (Commerce)':
-                filtered_interests = ['Business', 'Commerce']
-            elif hsc_group == 'IA (Arts)':
-                filtered_interests = ['Arts', 'Humanities']
-        
-        # Build the complex query for program matching
-        query = text("""
-            SELECT DISTINCT 
-                po.id as offering_id,
-                p.id as program_id, p.name as program_name, p.discipline, p.code,
-                u.id as university_id, u.name as university_name, u.sector,
-                c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
-                COUNT(po.id) OVER (PARTITION BY p.id) as offering_count,
-                STRING_AGG(DISTINCT t.name, ', ') as tags,
-                STRING_AGG(DISTINCT pog.subject_group, ', ') as required_groups,
-                STRING_AGG(DISTINCT pob.board, ', ') as accepted_boards
-            FROM program_offerings po
-            JOIN programs p ON po.program_id = p.id
-            JOIN campuses c ON po.campus_id = c.id
-            JOIN universities u ON c.university_id = u.id
-            LEFT JOIN program_offering_tags pot ON po.id = pot.offering_id
-            LEFT JOIN tags t ON pot.tag_id = t.id
-            LEFT JOIN program_offering_groups pog ON po.id = pog.offering_id
-            LEFT JOIN program_offering_boards pob ON po.id = pob.offering_id
-            WHERE po.min_score_pct <= :max_score
-            AND po.annual_fee <= :max_fee
-            GROUP BY po.id, p.id, p.name, p.discipline, p.code, u.id, u.name, u.sector, c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available
-            ORDER BY po.min_score_pct ASC, po.annual_fee ASC
-        """)
-        
-        # Execute query with parameters
-        result = db.session.execute(query, {
-            'max_score': max(ssc_percentage, hsc_percentage),
-            'max_fee': budget
-        })
-        
-        matched_offerings = []
-        
-        for row in result:
-            # Calculate match score
-            score = 0
-            explanations = []
-            
-            # Academic requirements check
-            if max(ssc_percentage, hsc_percentage) >= row.min_score_pct:
-                score += 30
-                explanations.append(f"✅ Academic score ({max(ssc_percentage, hsc_percentage)}%) meets requirement ({row.min_score_pct}%)")
-            else:
-                explanations.append(f"❌ Academic score ({max(ssc_percentage, hsc_percentage)}%) below requirement ({row.min_score_pct}%)")
-            
-            # Subject group compatibility check (CRITICAL)
-            is_compatible = False  # Initialize is_compatible variable
-            
-            if row.required_groups and hsc_group:
-                if hsc_group in row.required_groups:
-                    score += 35  # Higher weight for subject compatibility
-                    explanations.append(f"✅ HSC group ({hsc_group}) matches program requirement ({row.required_groups})")
-                    is_compatible = True
-                else:
-                    # Check if student's group is compatible with program
-                    
-                    # Clear compatibility rules based on user requirements
-                    if hsc_group == 'Pre-Medical':
-                        # Biology students can do ANY field (broadest background)
-                        is_compatible = True
-                    elif hsc_group == 'Pre-Engineering':
-                        # Pre-Engineering students can do everything EXCEPT medical/bio programs
-                        if any(med_field in row.tags.lower() if row.tags else '' for med_field in ['medicine', 'mbbs', 'dentistry', 'pharmacy', 'nursing', 'physiotherapy', 'medical technology', 'biotechnology', 'biochemistry', 'microbiology', 'public health', 'nutrition']):
-                            is_compatible = False
-                        else:
-                            is_compatible = True
-                    elif hsc_group == 'ICS (Computer Science)':
-                        # CS students CANNOT do bio OR engineering programs
-                        if any(med_field in row.tags.lower() if row.tags else '' for med_field in ['medicine', 'mbbs', 'dentistry', 'pharmacy', 'nursing', 'physiotherapy', 'medical technology', 'biotechnology', 'biochemistry', 'microbiology', 'public health', 'nutrition']):
-                            is_compatible = False
-                        elif any(eng_field in row.tags.lower() if row.tags else '' for eng_field in ['engineering', 'civil', 'electrical', 'mechanical', 'chemical', 'industrial', 'textile', 'petroleum', 'architecture']):
-                            is_compatible = False
-                        else:
-                            # CS students can do CS, business, arts, etc.
-                            is_compatible = True
-                    elif hsc_group == 'ICom (Commerce)':
-                        # Commerce students can only do business, arts, and some CS
-                        if any(com_field in row.tags.lower() if row.tags else '' for com_field in ['business', 'commerce', 'economics', 'finance', 'accounting', 'marketing', 'management', 'banking', 'insurance', 'taxation']):
-                            is_compatible = True
-                        elif any(arts_field in row.tags.lower() if row.tags else '' for arts_field in ['arts', 'humanities', 'literature', 'history', 'philosophy', 'psychology', 'sociology', 'political science', 'international relations', 'media studies', 'journalism', 'education']):
-                            is_compatible = True
-                        elif any(cs_field in row.tags.lower() if row.tags else '' for cs_field in ['computer', 'software', 'information technology', 'web development', 'game development', 'mobile development']):
-                            is_compatible = True
-                        else:
-                            is_compatible = False
-                    elif hsc_group == 'IA (Arts)':
-                        # Arts students can only do business, arts, and some CS
-                        if any(arts_field in row.tags.lower() if row.tags else '' for arts_field in ['arts', 'humanities', 'literature', 'history', 'philosophy', 'psychology', 'sociology', 'political science', 'international relations', 'media studies', 'journalism', 'education']):
-                            is_compatible = True
-                        elif any(com_field in row.tags.lower() if row.tags else '' for com_field in ['business', 'commerce', 'economics', 'finance', 'accounting', 'marketing', 'management']):
-                            is_compatible = True
-                        else:
-                            is_compatible = False
-                    
-                    if is_compatible:
-                        score += 25
-                        explanations.append(f"✅ HSC group ({hsc_group}) is compatible with program field")
-                    else:
-                        score -= 20  # Penalty for incompatible subjects
-                        explanations.append(f"❌ HSC group ({hsc_group}) may not be suitable for this program")
-            
-            # Determine subject compatibility for frontend display
-            subject_compatible = False
-            if hsc_group in (row.required_groups.split(', ') if row.required_groups else []):
-                subject_compatible = True
-            elif is_compatible:
-                subject_compatible = True
-            
-            # Budget check
-            if budget >= row.annual_fee:
-                score += 20
-                explanations.append(f"✅ Budget (PKR {budget:,}) covers annual fees (PKR {row.annual_fee:,})")
-            else:
-                explanations.append(f"❌ Budget (PKR {budget:,}) below annual fees (PKR {row.annual_fee:,})")
-            
-            # Location preference
-            if preferred_location and preferred_location.lower() in row.city.lower():
-                score += 10
-                explanations.append(f"✅ Location preference ({preferred_location}) matches campus city ({row.city})")
-            
-            # Interest matching (only with filtered interests)
-            if row.tags and filtered_interests:
-                program_tags = [tag.strip().lower() for tag in row.tags.split(',')]
-                student_interests = [interest.lower() for interest in filtered_interests]
-                
-                interest_matches = set(program_tags) & set(student_interests)
-                if interest_matches:
-                    score += 25  # Increased weight for interest matching
-                    explanations.append(f"✅ Interest match: {', '.join(interest_matches)}")
-                else:
-                    explanations.append(f"ℹ️ No direct interest match, but program may still be suitable")
-            
-            # Only include offerings with at least 50% match (increased threshold)
-            if score >= 50:
-                matched_offerings.append({
-                    'offering_id': row.offering_id,
-                    'program_id': row.program_id,
-                    'program_name': row.program_name,
-                    'discipline': row.discipline,
-                    'program_code': row.code,
-                    'university': {
-                        'id': row.university_id,
-                        'name': row.university_name,
-                        'sector': row.sector
-                    },
-                    'campus': {
-                        'city': row.city
-                    },
-                    'min_score_pct': row.min_score_pct,
-                    'min_score_type': row.min_score_type,
-                    'annual_fee': row.annual_fee,
-                    'hostel_available': row.hostel_available,
-                    'offering_count': row.offering_count,
-                    'tags': row.tags.split(', ') if row.tags else [],
-                    'required_groups': row.required_groups.split(', ') if row.required_groups else [],
-                    'accepted_boards': row.accepted_boards.split(', ') if row.accepted_boards else [],
-                    'match_score': score,
-                    'match_explanation': explanations,
-                    'subject_compatibility': subject_compatible
-                })
-        
-        # Sort by match score (highest first), but prioritize programs with higher requirements when student is eligible
-        # AND prioritize programs that match student's interests based on priority ranking
-        def sort_key(offering):
-            # Get student's academic score
-            student_score = max(ssc_percentage, hsc_percentage)
-            
-            # Calculate priority-weighted interest match with SPECIFIC matching
-            priority_score = 0
-            if offering['tags'] and filtered_interests:
-                program_tags = [tag.lower() for tag in offering['tags']]
-                
-                # Check if we have priority data from the frontend
-                if 'interestPriorities' in data:
-                    # Use priority-based scoring with SPECIFIC matching
-                    highest_priority_score = 0
-                    for priority_item in data['interestPriorities']:
-                        interest = priority_item['interest'].lower()
-                        priority = priority_item['priority']
-                        
-                        # CATEGORIZED INTEREST MATCHING LOGIC
-                        matched = False
-                        
-                        # Define interest categories with their core and exclusion tags
-                        interest_categories = {
-                            'medicine': {
-                                'core_tags': ['mbbs', 'doctor'],
-                                'general_tags': ['medicine', 'medical'],
-                                'exclusion_tags': ['nursing', 'pharmacy', 'allied-health'],
-                                'boost_tags': ['mbbs', 'doctor']
-                            },
-                            'nursing': {
-                                'core_tags': ['nursing'],
-                                'general_tags': [],
-                                'exclusion_tags': [],
-                                'boost_tags': ['nursing']
-                            },
-                            'pharmacy': {
-                                'core_tags': ['pharmacy'],
-                                'general_tags': [],
-                                'exclusion_tags': [],
-                                'boost_tags': ['pharmacy']
-                            },
-                            'dentistry': {
-                                'core_tags': ['dentistry', 'dental'],
-                                'general_tags': [],
-                                'exclusion_tags': [],
-                                'boost_tags': ['dentistry', 'dental']
-                            },
-                            'engineering': {
-                                'core_tags': ['civil', 'electrical', 'mechanical', 'chemical', 'aerospace', 'industrial', 'computer engineering', 'civil-engineering', 'electrical-engineering', 'mechanical-engineering', 'chemical-engineering', 'engineering'],
-                                'general_tags': ['engineering', 'computer'],
-                                'exclusion_tags': ['technology', 'information technology', 'it'],
-                                'boost_tags': ['civil', 'electrical', 'mechanical', 'chemical', 'computer engineering', 'civil-engineering', 'electrical-engineering', 'mechanical-engineering', 'chemical-engineering', 'engineering']
-                            },
-                            'computer science': {
-                                'core_tags': ['computer science', 'computer-science', 'software engineering', 'software-engineering', 'programming', 'software'],
-                                'general_tags': ['software', 'programming', 'computer-science'],
-                                'exclusion_tags': ['information technology', 'information-technology', 'it', 'information systems'],
-                                'boost_tags': ['computer science', 'computer-science', 'software engineering', 'software-engineering']
-                            },
-                            'business': {
-                                'core_tags': ['business administration', 'finance', 'accounting', 'marketing', 'economics'],
-                                'general_tags': ['business'],
-                                'exclusion_tags': ['management', 'administration'],
-                                'boost_tags': ['business administration', 'finance', 'accounting']
-                            },
-                            'commerce': {
-                                'core_tags': ['commerce', 'business administration'],
-                                'general_tags': ['business', 'economics', 'finance', 'accounting'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['commerce', 'business administration']
-                            },
-                            'economics': {
-                                'core_tags': ['economics'],
-                                'general_tags': ['economy'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['economics']
-                            },
-                            'finance': {
-                                'core_tags': ['finance', 'financial'],
-                                'general_tags': ['banking'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['finance', 'financial']
-                            },
-                            'accounting': {
-                                'core_tags': ['accounting', 'accountancy'],
-                                'general_tags': [],
-                                'exclusion_tags': [],
-                                'boost_tags': ['accounting', 'accountancy']
-                            },
-                            'marketing': {
-                                'core_tags': ['marketing', 'advertising'],
-                                'general_tags': ['branding'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['marketing', 'advertising']
-                            },
-                            'arts': {
-                                'core_tags': ['fine arts', 'visual arts', 'performing arts', 'design', 'creative'],
-                                'general_tags': ['arts'],
-                                'exclusion_tags': ['humanities', 'liberal arts'],
-                                'boost_tags': ['fine arts', 'visual arts', 'performing arts']
-                            },
-                            'humanities': {
-                                'core_tags': ['humanities', 'liberal arts'],
-                                'general_tags': ['philosophy', 'history', 'literature'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['humanities', 'liberal arts']
-                            },
-                            'literature': {
-                                'core_tags': ['literature', 'english'],
-                                'general_tags': ['linguistics'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['literature', 'english']
-                            },
-                            'history': {
-                                'core_tags': ['history'],
-                                'general_tags': ['historical'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['history']
-                            },
-                            'philosophy': {
-                                'core_tags': ['philosophy'],
-                                'general_tags': ['philosophical'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['philosophy']
-                            },
-                            'psychology': {
-                                'core_tags': ['psychology'],
-                                'general_tags': ['psychological', 'mental health'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['psychology']
-                            },
-                            'sociology': {
-                                'core_tags': ['sociology'],
-                                'general_tags': ['social', 'social sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['sociology']
-                            },
-                            'political science': {
-                                'core_tags': ['political science', 'politics'],
-                                'general_tags': ['international relations'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['political science', 'politics']
-                            },
-                            'international relations': {
-                                'core_tags': ['international relations'],
-                                'general_tags': ['diplomacy', 'foreign policy'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['international relations']
-                            },
-                            'media studies': {
-                                'core_tags': ['media studies', 'media'],
-                                'general_tags': ['communication', 'journalism'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['media studies', 'media']
-                            },
-                            'journalism': {
-                                'core_tags': ['journalism'],
-                                'general_tags': ['media', 'communication'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['journalism']
-                            },
-                            'education': {
-                                'core_tags': ['education', 'teaching'],
-                                'general_tags': ['pedagogy'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['education', 'teaching']
-                            },
-                            'law': {
-                                'core_tags': ['law', 'legal', 'jurisprudence'],
-                                'general_tags': ['law'],
-                                'exclusion_tags': ['legal studies', 'criminal justice'],
-                                'boost_tags': ['law', 'legal']
-                            },
-                            'information technology': {
-                                'core_tags': ['information technology', 'it'],
-                                'general_tags': ['information systems'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['information technology', 'it']
-                            },
-                            'data science': {
-                                'core_tags': ['data science', 'data analytics', 'data-science'],
-                                'general_tags': ['machine learning'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['data science', 'data analytics', 'data-science']
-                            },
-                            'web development': {
-                                'core_tags': ['web development', 'web'],
-                                'general_tags': ['frontend', 'backend'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['web development', 'web']
-                            },
-                            'game development': {
-                                'core_tags': ['game development', 'gaming'],
-                                'general_tags': ['game design'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['game development', 'gaming']
-                            },
-                            'mobile development': {
-                                'core_tags': ['mobile development', 'mobile'],
-                                'general_tags': ['app development'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['mobile development', 'mobile']
-                            },
-                            'banking': {
-                                'core_tags': ['banking'],
-                                'general_tags': ['finance', 'financial'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['banking', 'finance']
-                            },
-                            'insurance': {
-                                'core_tags': ['insurance'],
-                                'general_tags': ['risk management'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['insurance']
-                            },
-                            'taxation': {
-                                'core_tags': ['taxation', 'tax'],
-                                'general_tags': ['tax law'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['taxation', 'tax']
-                            },
-                            'architecture': {
-                                'core_tags': ['architecture'],
-                                'general_tags': ['design', 'urban planning'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['architecture']
-                            },
-                            'computational finance': {
-                                'core_tags': ['computational-finance'],
-                                'general_tags': ['finance', 'computational'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['computational-finance']
-                            },
-                            'cyber security': {
-                                'core_tags': ['cyber-security'],
-                                'general_tags': ['security', 'cybersecurity'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['cyber-security']
-                            },
-                            'ics': {
-                                'core_tags': ['ics'],
-                                'general_tags': ['computer', 'information'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['ics']
-                            },
-                            'software engineering': {
-                                'core_tags': ['software-engineering'],
-                                'general_tags': ['software', 'programming'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['software-engineering']
-                            },
-                            'civil engineering': {
-                                'core_tags': ['civil-engineering'],
-                                'general_tags': ['civil', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['civil-engineering']
-                            },
-                            'electrical engineering': {
-                                'core_tags': ['electrical-engineering'],
-                                'general_tags': ['electrical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['electrical-engineering']
-                            },
-                            'mechanical engineering': {
-                                'core_tags': ['mechanical-engineering'],
-                                'general_tags': ['mechanical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['mechanical-engineering']
-                            },
-                            'chemical engineering': {
-                                'core_tags': ['chemical-engineering'],
-                                'general_tags': ['chemical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['chemical-engineering']
-                            },
-                            # Updated tags based on user requirements
-                            'architecture': {
-                                'core_tags': ['architecture'],
-                                'general_tags': ['design', 'urban planning'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['architecture']
-                            },
-                            'artificial-intelligence': {
-                                'core_tags': ['artificial-intelligence'],
-                                'general_tags': ['ai', 'machine learning'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['artificial-intelligence']
-                            },
-                            'biomedical-engineering': {
-                                'core_tags': ['biomedical-engineering'],
-                                'general_tags': ['biomedical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['biomedical-engineering']
-                            },
-                            'chemical-engineering': {
-                                'core_tags': ['chemical-engineering'],
-                                'general_tags': ['chemical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['chemical-engineering']
-                            },
-                            'chemistry': {
-                                'core_tags': ['chemistry'],
-                                'general_tags': ['chemical', 'science'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['chemistry']
-                            },
-                            'civil-engineering': {
-                                'core_tags': ['civil-engineering'],
-                                'general_tags': ['civil', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['civil-engineering']
-                            },
-                            'computational-finance': {
-                                'core_tags': ['computational-finance'],
-                                'general_tags': ['finance', 'computational'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['computational-finance']
-                            },
-                            'computer-science': {
-                                'core_tags': ['computer-science'],
-                                'general_tags': ['programming', 'computing'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['computer-science']
-                            },
-                            'computer-systems': {
-                                'core_tags': ['computer-systems'],
-                                'general_tags': ['systems', 'computing'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['computer-systems']
-                            },
-                            'cyber-security': {
-                                'core_tags': ['cyber-security'],
-                                'general_tags': ['security', 'computing'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['cyber-security']
-                            },
-                            'data-science': {
-                                'core_tags': ['data-science'],
-                                'general_tags': ['data', 'analytics'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['data-science']
-                            },
-                            'development-studies': {
-                                'core_tags': ['development-studies'],
-                                'general_tags': ['development', 'social sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['development-studies']
-                            },
-                            'economics': {
-                                'core_tags': ['economics'],
-                                'general_tags': ['economy', 'social sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['economics']
-                            },
-                            'electrical-engineering': {
-                                'core_tags': ['electrical-engineering'],
-                                'general_tags': ['electrical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['electrical-engineering']
-                            
-                            },
-                            'electronic-engineering': {
-                                'core_tags': ['electronic-engineering'],
-                                'general_tags': ['electronic', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['electronic-engineering']
-                            },
-                            'engineering': {
-                                'core_tags': ['engineering'],
-                                'general_tags': ['engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['engineering']
-                            },
-                            'english-linguistics': {
-                                'core_tags': ['english-linguistics'],
-                                'general_tags': ['english', 'linguistics'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['english-linguistics']
-                            },
-                            'finance': {
-                                'core_tags': ['finance'],
-                                'general_tags': ['financial', 'business'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['finance']
-                            },
-                            'food-engineering': {
-                                'core_tags': ['food-engineering'],
-                                'general_tags': ['food', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['food-engineering']
-                            },
-                            'gaming-animation': {
-                                'core_tags': ['gaming-animation'],
-                                'general_tags': ['gaming', 'animation'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['gaming-animation']
-                            },
-                            'industrial-manufacturing': {
-                                'core_tags': ['industrial-manufacturing'],
-                                'general_tags': ['industrial', 'manufacturing'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['industrial-manufacturing']
-                            },
-                            'management-sciences': {
-                                'core_tags': ['management-sciences'],
-                                'general_tags': ['management', 'business'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['management-sciences']
-                            },
-                            'materials-engineering': {
-                                'core_tags': ['materials-engineering'],
-                                'general_tags': ['materials', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['materials-engineering']
-                            },
-                            'mechanical-engineering': {
-                                'core_tags': ['mechanical-engineering'],
-                                'general_tags': ['mechanical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['mechanical-engineering']
-                            },
-                            'metallurgical-engineering': {
-                                'core_tags': ['metallurgical-engineering'],
-                                'general_tags': ['metallurgical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['metallurgical-engineering']
-                            },
-                            'petrochemical-engineering': {
-                                'core_tags': ['petrochemical-engineering'],
-                                'general_tags': ['petrochemical', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['petrochemical-engineering']
-                            },
-                            'petroleum-engineering': {
-                                'core_tags': ['petroleum-engineering'],
-                                'general_tags': ['petroleum', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['petroleum-engineering']
-                            },
-                            'physics': {
-                                'core_tags': ['physics'],
-                                'general_tags': ['physical sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['physics']
-                            },
-                            'polymer-engineering': {
-                                'core_tags': ['polymer-engineering'],
-                                'general_tags': ['polymer', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['polymer-engineering']
-                            },
-                            'software-engineering': {
-                                'core_tags': ['software-engineering'],
-                                'general_tags': ['software', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['software-engineering']
-                            },
-                            'telecommunications': {
-                                'core_tags': ['telecommunications'],
-                                'general_tags': ['telecom', 'communication'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['telecommunications']
-                            },
-                            'textile-sciences': {
-                                'core_tags': ['textile-sciences'],
-                                'general_tags': ['textile', 'sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['textile-sciences']
-                            },
-                            'aerospace-engineering': {
-                                'core_tags': ['aerospace-engineering'],
-                                'general_tags': ['aerospace', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['aerospace-engineering']
-                            },
-                            'metallurgy': {
-                                'core_tags': ['metallurgy'],
-                                'general_tags': ['metals', 'materials'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['metallurgy']
-                            },
-                            'environmental-engineering': {
-                                'core_tags': ['environmental-engineering'],
-                                'general_tags': ['environmental', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['environmental-engineering']
-                            },
-                            'geoinformatics': {
-                                'core_tags': ['geoinformatics'],
-                                'general_tags': ['geo', 'informatics'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['geoinformatics']
-                            },
-                            'computer-engineering': {
-                                'core_tags': ['computer-engineering'],
-                                'general_tags': ['computer', 'engineering'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['computer-engineering']
-                            },
-                            'mechatronics': {
-                                'core_tags': ['mechatronics'],
-                                'general_tags': ['mechanical', 'electronics'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['mechatronics']
-                            },
-                            'information-security': {
-                                'core_tags': ['information-security'],
-                                'general_tags': ['security', 'information'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['information-security']
-                            },
-                            'avionics': {
-                                'core_tags': ['avionics'],
-                                'general_tags': ['aviation', 'electronics'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['avionics']
-                            },
-                            'naval-architecture': {
-                                'core_tags': ['naval-architecture'],
-                                'general_tags': ['naval', 'architecture'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['naval-architecture']
-                            },
-                            'bioinformatics': {
-                                'core_tags': ['bioinformatics'],
-                                'general_tags': ['bio', 'informatics'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['bioinformatics']
-                            },
-                            'business': {
-                                'core_tags': ['business'],
-                                'general_tags': ['management', 'commerce'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['business']
-                            },
-                            'bba': {
-                                'core_tags': ['bba'],
-                                'general_tags': ['business', 'administration'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['bba']
-                            },
-                            'accounting': {
-                                'core_tags': ['accounting'],
-                                'general_tags': ['finance', 'business'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['accounting']
-                            },
-                            'tourism': {
-                                'core_tags': ['tourism'],
-                                'general_tags': ['hospitality', 'travel'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['tourism']
-                            },
-                            'hospitality-management': {
-                                'core_tags': ['hospitality-management'],
-                                'general_tags': ['hospitality', 'management'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['hospitality-management']
-                            },
-                            'social-sciences': {
-                                'core_tags': ['social-sciences'],
-                                'general_tags': ['social', 'sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['social-sciences']
-                            },
-                            'mass-communication': {
-                                'core_tags': ['mass-communication'],
-                                'general_tags': ['media', 'communication'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['mass-communication']
-                            },
-                            'public-administration': {
-                                'core_tags': ['public-administration'],
-                                'general_tags': ['public', 'administration'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['public-administration']
-                            },
-                            'psychology': {
-                                'core_tags': ['psychology'],
-                                'general_tags': ['behavioral', 'mental'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['psychology']
-                            },
-                            'humanities': {
-                                'core_tags': ['humanities'],
-                                'general_tags': ['arts', 'culture'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['humanities']
-                            },
-                            'english-literature': {
-                                'core_tags': ['english-literature'],
-                                'general_tags': ['english', 'literature'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['english-literature']
-                            },
-                            'industrial-design': {
-                                'core_tags': ['industrial-design'],
-                                'general_tags': ['industrial', 'design'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['industrial-design']
-                            },
-                            'natural-sciences': {
-                                'core_tags': ['natural-sciences'],
-                                'general_tags': ['natural', 'sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['natural-sciences']
-                            },
-                            'mathematics': {
-                                'core_tags': ['mathematics'],
-                                'general_tags': ['math', 'computation'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['mathematics']
-                            },
-                            'environmental-science': {
-                                'core_tags': ['environmental-science'],
-                                'general_tags': ['environmental', 'science'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['environmental-science']
-                            },
-                            'biotechnology': {
-                                'core_tags': ['biotechnology'],
-                                'general_tags': ['bio', 'technology'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['biotechnology']
-                            },
-                            'food-science': {
-                                'core_tags': ['food-science'],
-                                'general_tags': ['food', 'science'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['food-science']
-                            },
-                            'agriculture': {
-                                'core_tags': ['agriculture'],
-                                'general_tags': ['farming', 'crops'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['agriculture']
-                            },
-                            'law': {
-                                'core_tags': ['law'],
-                                'general_tags': ['legal', 'justice'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['law']
-                            },
-                            'llb': {
-                                'core_tags': ['llb'],
-                                'general_tags': ['law', 'legal'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['llb']
-                            },
-                            'medicine': {
-                                'core_tags': ['medicine'],
-                                'general_tags': ['medical', 'healthcare'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['medicine']
-                            },
-                            'mbbs': {
-                                'core_tags': ['mbbs'],
-                                'general_tags': ['medicine', 'medical'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['mbbs']
-                            },
-                            'health-sciences': {
-                                'core_tags': ['health-sciences'],
-                                'general_tags': ['health', 'sciences'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['health-sciences']
-                            },
-                            'nutrition': {
-                                'core_tags': ['nutrition'],
-                                'general_tags': ['diet', 'health'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['nutrition']
-                            },
-                            'dietetics': {
-                                'core_tags': ['dietetics'],
-                                'general_tags': ['diet', 'nutrition'],
-                                'exclusion_tags': [],
-                                'boost_tags': ['dietetics']
-                            }
-                        }
-                        
-                        # UNIVERSAL MATCHING LOGIC
-                        if interest.lower() in interest_categories:
-                            category = interest_categories[interest.lower()]
-                            
-                            # Check for core tags
-                            has_core = any(tag in category['core_tags'] for tag in program_tags)
-                            
-                            # Check for exclusion tags
-                            has_exclusion = any(tag in category['exclusion_tags'] for tag in program_tags)
-                            
-                            # Check for general tags (only if no exclusions)
-                            has_general = any(tag in category['general_tags'] for tag in program_tags) if not has_exclusion else False
-                            
-                            # Match if core tags found OR (general tags found AND no exclusions)
-                            if has_core or has_general:
-                                matched = True
-                        else:
-                            # Fallback for uncategorized interests
-                            if interest.lower() in [tag.lower() for tag in program_tags]:
-                                matched = True
-                        
-                        if matched:
-                            # Higher priority (lower number) gets higher score
-                            # Priority 1 gets 1000 points, Priority 2 gets 900 points, etc.
-                            # Much higher weight to ensure interest matches rank first
-                            current_score = (11 - priority) * 100
-                            
-                            # UNIVERSAL BOOST LOGIC using categories
-                            if interest.lower() in interest_categories:
-                                category = interest_categories[interest.lower()]
-                                boost_tags = category.get('boost_tags', [])
-                                
-                                # Check if program has boost tags
-                                has_boost = any(tag in boost_tags for tag in program_tags)
-                                
-                                if has_boost:
-                                    # Medicine gets extra boost, others get standard boost
-                                    boost_amount = 500 if interest.lower() == 'medicine' else 400
-                                    current_score += boost_amount
-                            
-                            if current_score > highest_priority_score:
-                                highest_priority_score = current_score
-                    
-                    priority_score = highest_priority_score
-                else:
-                    # Fallback to simple interest matching
-                    student_interests = [interest.lower() for interest in filtered_interests]
-                    interest_matches = set(program_tags) & set(student_interests)
-                    priority_score = len(interest_matches) * 100
-            
-            # CRITICAL: Priority score is the ONLY primary sorting criterion
-            # This ensures interest matches ALWAYS rank first, regardless of other factors
-            if priority_score > 0:
-                # Programs with interest matches get top priority
-                return (priority_score, 0, 0)  # Only priority score matters
-            else:
-                # Programs without interest matches go to the bottom
-                return (0, offering['match_score'], 0)
-        
-        matched_offerings.sort(key=sort_key, reverse=True)
+        with timer.phase('request_parsing'):
+            data = request.get_json()
+            profile = parse_student_profile(data)
+        
+        matched_offerings = match_offerings(profile)
+        
+        with timer.phase('serialization'):
+            return jsonify({
+                'success': True,
+                'matched_offerings': matched_offerings,
+                'total_matches': len(matched_offerings),
+                'subject_restrictions': {
+                    'hsc_group': profile['hsc_group'],
+                    'allowed_interests': profile['allowed_interests'],
+                    'filtered_interests': profile['filtered_interests']
+                }
+            })
         
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/match-programs/stream', methods=['POST'])
+@admitted('match')
+@read_only
+def stream_match_programs():
+    """match-programs as Server-Sent Events: the first page early, then the rest page by page"""
+    try:
+        data = request.get_json()
+        profile = parse_student_profile(data)
+        page_size = max(1, min(int(request.args.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return Response(
+        stream_with_context(stream_matches(profile, page_size)),
+        mimetype='text/event-stream',
+        # Proxies (nginx, Heroku router) must pass each event on as it is written
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api.route('/api/match-snapshots', methods=['POST'])
+@admitted('match')
+def create_match_snapshot():
+    """Run a match and store a compact copy of the result that can be shared by ID"""
+    try:
+        data = request.get_json()
+        profile = parse_student_profile(data)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        matched_offerings = match_offerings(profile)
+        snapshot = create_snapshot(profile, matched_offerings)
         return jsonify({
             'success': True,
-            'matched_offerings': matched_offerings,
-            'total_matches': len(matched_offerings),
-            'subject_restrictions': {
-                'hsc_group': hsc_group,
-                'allowed_interests': allowed_interests,
-                'filtered_interests': filtered_interests
-            }
-        })
-        
+            'snapshot_id': snapshot.id,
+            'catalog_version': snapshot.catalog_version,
+            'expires_at': snapshot.expires_at.isoformat(),
+            'total_matches': snapshot.total_matches,
+            'stored_offerings': len(snapshot.payload['offerings'])
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.route('/api/match-snapshots/<snapshot_id>')
+@admitted('catalog')
+@read_only
+def get_match_snapshot(snapshot_id):
+    """A stored match result, with offering details from the current catalog"""
+    try:
+        try:
+            snapshot = get_snapshot(snapshot_id)
+        except SnapshotNotFound:
+            # A link shared right after it was created may not have reached the replica yet
+            if not use_primary():
+                raise
+            snapshot = get_snapshot(snapshot_id)
+        response = jsonify({'success': True, **rehydrate_snapshot(snapshot)})
+    except SnapshotNotFound as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    # Unchanged until the catalog or the rankings change, so repeat views can be answered with a 304
+    catalog = get_catalog()
+    popularity = get_popularity()
+    if catalog is not None:
+        response.set_etag(f'{snapshot.id}-{catalog.version}-{popularity.version if popularity is not None else 0}')
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    return response
+
+@api.route('/api/match-programs/sweep', methods=['POST'])
+@admitted('match')
+@profiled
+@read_only
+def sweep_match_programs():
+    """Match counts and newly eligible offerings across budget and/or score ranges"""
+    timer = current_timer()
+    try:
+        with timer.phase('request_parsing'):
+            data = request.get_json()
+            profile = parse_student_profile(data)
+            budgets = parse_range(data, 'budgetRange', int)
+            scores = parse_range(data, 'scoreRange', float)
+            step_offerings = min(int(data.get('offeringsPerStep', DEFAULT_STEP_OFFERINGS)), MAX_STEP_OFFERINGS)
+            if budgets is None and scores is None:
+                raise ValueError('budgetRange or scoreRange is required')
+
+        steps = sweep_matches(profile, budgets, scores, step_offerings)
+
+        with timer.phase('serialization'):
+            return jsonify({
+                'success': True,
+                'budgets': budgets or [profile['budget']],
+                'scores': scores or [profile['student_score']],
+                'steps': steps
+            })
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/debug-match', methods=['POST'])
+@api.route('/api/debug-match', methods=['POST'])
+@admitted('match')
+@profiled
+@read_only
 def debug_match():
     """Debug endpoint to analyze matching logic"""
+    timer = current_timer()
     try:
-        data = request.get_json()
-        
-        # Extract student data
-        ssc_percentage = float(data.get('sscPercentage', 0))
-        hsc_percentage = float(data.get('hscPercentage', 0))
-        hsc_group = data.get('hscGroup', '')
-        interests = data.get('interests', [])
-        budget = int(data.get('budget', 0))
-        preferred_location = data.get('preferredLocation', '')
+        with timer.phase('request_parsing'):
+            data = request.get_json()
+            
+            # Extract student data
+            ssc_percentage = float(data.get('sscPercentage', 0))
+            hsc_percentage = float(data.get('hscPercentage', 0))
+            hsc_group = data.get('hscGroup', '')
+            interests = data.get('interests', [])
+            budget = int(data.get('budget', 0))
+            preferred_location = data.get('preferredLocation', '')
         
         # Get a few sample programs to analyze
         query = text("""
@@ -1085,55 +383,58 @@ def debug_match():
             LIMIT 10
         """)
         
-        result = db.session.execute(query, {
-            'max_fee': budget
-        })
+        with timer.phase('sql_execution'):
+            result = db.session.execute(query, {
+                'max_fee': budget
+            })
         
         debug_info = []
         
-        for row in result:
-            program_tags = [tag.strip().lower() for tag in row.tags.split(',')] if row.tags else []
+        with timer.phase('row_iteration'):
+            for row in result:
+                program_tags = [tag.strip().lower() for tag in row.tags.split(',')] if row.tags else []
             
-            # Analyze interest matching
-            interest_analysis = []
-            for interest in interests:
-                interest_lower = interest.lower()
+                # Analyze interest matching
+                interest_analysis = []
+                for interest in interests:
+                    interest_lower = interest.lower()
                 
-                # Check specific matching
-                if interest_lower == 'medicine':
-                    medicine_matches = [tag for tag in program_tags if tag in ['medicine', 'mbbs', 'doctor']]
-                    nursing_matches = [tag for tag in program_tags if tag in ['nursing']]
-                    pharmacy_matches = [tag for tag in program_tags if tag in ['pharmacy']]
+                    # Check specific matching
+                    if interest_lower == 'medicine':
+                        medicine_matches = [tag for tag in program_tags if tag in ['medicine', 'mbbs', 'doctor']]
+                        nursing_matches = [tag for tag in program_tags if tag in ['nursing']]
+                        pharmacy_matches = [tag for tag in program_tags if tag in ['pharmacy']]
                     
-                    interest_analysis.append({
-                        'interest': interest,
-                        'program_tags': program_tags,
-                        'medicine_matches': medicine_matches,
-                        'nursing_matches': nursing_matches,
-                        'pharmacy_matches': pharmacy_matches,
-                        'would_match_medicine': len(medicine_matches) > 0,
-                        'would_match_nursing': len(nursing_matches) > 0,
-                        'would_match_pharmacy': len(pharmacy_matches) > 0
-                    })
+                        interest_analysis.append({
+                            'interest': interest,
+                            'program_tags': program_tags,
+                            'medicine_matches': medicine_matches,
+                            'nursing_matches': nursing_matches,
+                            'pharmacy_matches': pharmacy_matches,
+                            'would_match_medicine': len(medicine_matches) > 0,
+                            'would_match_nursing': len(nursing_matches) > 0,
+                            'would_match_pharmacy': len(pharmacy_matches) > 0
+                        })
             
-            debug_info.append({
-                'program_name': row.program_name,
-                'university': row.university_name,
-                'tags': program_tags,
-                'interest_analysis': interest_analysis
-            })
+                debug_info.append({
+                    'program_name': row.program_name,
+                    'university': row.university_name,
+                    'tags': program_tags,
+                    'interest_analysis': interest_analysis
+                })
         
-        return jsonify({
-            'success': True,
-            'student_data': {
-                'ssc_percentage': ssc_percentage,
-                'hsc_percentage': hsc_percentage,
-                'hsc_group': hsc_group,
-                'interests': interests,
-                'budget': budget
-            },
-            'debug_info': debug_info
-        })
+        with timer.phase('serialization'):
+            return jsonify({
+                'success': True,
+                'student_data': {
+                    'ssc_percentage': ssc_percentage,
+                    'hsc_percentage': hsc_percentage,
+                    'hsc_group': hsc_group,
+                    'interests': interests,
+                    'budget': budget
+                },
+                'debug_info': debug_info
+            })
         
     except Exception as e:
         return jsonify({
@@ -1141,12 +442,15 @@ def debug_match():
             'error': str(e)
         }), 500
 
-@app.route('/api/universities')
+@api.route('/api/universities')
+@coalesced
+@admitted('catalog')
+@read_only
 def get_universities():
     """Get all universities with statistics"""
     try:
         # Use raw SQL for complex statistics
-        query = text("""
+        query = prepared_text('universities', """
             SELECT u.id, u.name, u.sector, 
                    COUNT(DISTINCT c.id) as campus_count,
                    COUNT(DISTINCT po.id) as program_count
@@ -1179,12 +483,15 @@ def get_universities():
             'error': str(e)
         }), 500
 
-@app.route('/api/programs')
+@api.route('/api/programs')
+@coalesced
+@admitted('catalog')
+@read_only
 def get_programs():
     """Get all programs with offering counts"""
     try:
         # Use raw SQL for program statistics
-        query = text("""
+        query = prepared_text('programs', """
             SELECT p.id, p.name, p.discipline, p.code,
                    COUNT(DISTINCT po.id) as offering_count,
                    MIN(po.annual_fee) as min_fee,
@@ -1221,7 +528,10 @@ def get_programs():
             'error': str(e)
         }), 500
 
-@app.route('/api/campuses')
+@api.route('/api/campuses')
+@coalesced
+@admitted('catalog')
+@read_only
 def get_campuses():
     """Get all campuses with university info"""
     try:
@@ -1244,12 +554,33 @@ def get_campuses():
             'error': str(e)
         }), 500
 
-@app.route('/api/program-offerings')
+@api.route('/api/export/offerings.<fmt>')
+@admitted('catalog')
+@read_only
+def export_offerings(fmt):
+    """The whole offering catalog as offerings.csv or offerings.parquet, streamed in batches"""
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f"Unknown export format '{fmt}'"}), 404
+    if fmt == 'parquet' and not parquet_available():
+        return jsonify({'success': False, 'error': 'Parquet export needs pyarrow (pip install pyarrow)'}), 501
+
+    # Runs the query now; rows are fetched from the server-side cursor as chunks are sent
+    chunks = export_chunks(fmt, export_batches())
+    return Response(
+        stream_with_context(chunks),
+        content_type=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename=offerings.{fmt}', 'X-Accel-Buffering': 'no'}
+    )
+
+@api.route('/api/program-offerings')
+@coalesced
+@admitted('catalog')
+@read_only
 def get_program_offerings():
     """Get all program offerings with details"""
     try:
         # Use raw SQL for complex join
-        query = text("""
+        query = prepared_text('program_offerings', """
             SELECT po.id, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
                    p.id as program_id, p.name as program_name, p.discipline, p.code,
                    u.id as university_id, u.name as university_name, u.sector,
@@ -1306,14 +637,62 @@ def get_program_offerings():
             'error': str(e)
         }), 500
 
-@app.route('/api/program/<int:program_id>')
+@api.route('/api/offerings')
+@coalesced
+@admitted('catalog')
+@read_only
+def get_offerings_by_id():
+    """Several offerings in one request (?ids=1,2,3), in the order given"""
+    try:
+        ids = parse_ids(request.args.get('ids'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        offerings, missing, version = offerings_by_id(ids)
+        return jsonify({
+            'success': True,
+            'catalog_version': version,
+            'offerings': offerings,
+            'missing_ids': missing
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.route('/api/compare')
+@coalesced
+@admitted('catalog')
+@read_only
+def compare_offerings_by_id():
+    """Offerings side by side (?ids=1,2,3): one list per field, aligned with offering_ids"""
+    try:
+        ids = parse_ids(request.args.get('ids'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        offerings, missing, version = offerings_by_id(ids)
+        return jsonify({
+            'success': True,
+            'catalog_version': version,
+            'offering_ids': [offering['offering_id'] for offering in offerings],
+            'missing_ids': missing,
+            **compare_offerings(offerings)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api.route('/api/program/<int:program_id>')
+@coalesced
+@admitted('catalog')
+@read_only
 def get_program_detail(program_id):
     """Get detailed program information with all offerings"""
     try:
         program = Program.query.get_or_404(program_id)
         
         # Get all offerings for this program
-        offerings_query = text("""
+        offerings_query = prepared_text('program_detail_offerings', """
             SELECT po.id, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
                    u.id as university_id, u.name as university_name, u.sector,
                    c.city,
@@ -1371,7 +750,10 @@ def get_program_detail(program_id):
             'error': str(e)
         }), 500
 
-@app.route('/api/university/<int:university_id>')
+@api.route('/api/university/<int:university_id>')
+@coalesced
+@admitted('catalog')
+@read_only
 def get_university_detail(university_id):
     """Get detailed university information with campuses and offerings"""
     try:
@@ -1379,7 +761,7 @@ def get_university_detail(university_id):
         campuses = Campus.query.filter_by(university_id=university_id).all()
         
         # Get offerings for this university
-        offerings_query = text("""
+        offerings_query = prepared_text('university_detail_offerings', """
             SELECT po.id, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
                    p.id as program_id, p.name as program_name, p.discipline, p.code,
                    c.city,
@@ -1432,7 +814,10 @@ def get_university_detail(university_id):
             'error': str(e)
         }), 500
 
-@app.route('/api/search-programs')
+@api.route('/api/search-programs')
+@coalesced
+@admitted('catalog')
+@read_only
 def search_programs():
     """Search programs by name or discipline"""
     try:
@@ -1441,7 +826,7 @@ def search_programs():
             return jsonify({'success': False, 'error': 'Query parameter required'}), 400
         
         # Use raw SQL for search
-        search_query = text("""
+        search_query = prepared_text('search_programs', """
             SELECT DISTINCT p.id, p.name, p.discipline, p.code,
                    COUNT(DISTINCT po.id) as offering_count,
                    MIN(po.annual_fee) as min_fee,
@@ -1478,12 +863,15 @@ def search_programs():
             'error': str(e)
         }), 500
 
-@app.route('/api/stats')
+@api.route('/api/stats')
+@coalesced
+@admitted('catalog')
+@read_only
 def get_stats():
     """Get database statistics"""
     try:
         # Get counts using raw SQL
-        stats_query = text("""
+        stats_query = prepared_text('stats', """
             SELECT 
                 (SELECT COUNT(*) FROM universities) as university_count,
                 (SELECT COUNT(*) FROM campuses) as campus_count,
@@ -1509,15 +897,110 @@ def get_stats():
             'success': False,
             'error': str(e)
         }), 500
+
+@api.route('/api/facets')
+@admitted('catalog')
+def get_facets():
+    """Facet counts (city, sector, discipline, fee, hostel, group, tag) for a filter selection
+
+    Each facet is a repeatable query parameter, e.g. ?city=Karachi&city=Lahore&fee=under_100k;
+    values of one facet are OR-ed, facets are AND-ed. A facet's counts leave out its own
+    filter, so its other values stay selectable. Answered from the in-memory catalog.
+    """
+    catalog = get_catalog()
+    if catalog is None:
+        return jsonify({'success': False, 'error': 'Catalog not loaded yet'}), 503
+
+    filters = {facet: request.args.getlist(facet) for facet in FACETS if request.args.getlist(facet)}
+    selected = catalog.facets.selection(filters)
+    response = {
+        'success': True,
+        'catalog_version': catalog.version,
+        'filters': filters,
+        'total': selected.bit_count(),
+        'facets': catalog.facets.counts(filters)
+    }
+    if request.args.get('include_ids', '').lower() == 'true':
+        response['offering_ids'] = [catalog.offerings[position].offering_id for position in catalog.facets.positions(selected)]
+    return jsonify(response)
+
+@api.route('/api/jobs', methods=['POST'])
+@admin_required
+def create_job():
+    """Queue a background job: {"kind", "payload", "priority", "max_attempts", "delay_seconds"}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+    try:
+        job = enqueue(
+            data.get('kind'),
+            data.get('payload'),
+            priority=data.get('priority', 0),
+            max_attempts=data.get('max_attempts'),
+            delay_seconds=data.get('delay_seconds', 0)
+        )
+    except JobError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
+
+@api.route('/api/jobs')
+@admin_required
+def list_jobs():
+    """Most recent jobs, optionally filtered by ?status= and ?kind="""
+    query = Job.query
+    if request.args.get('status'):
+        query = query.filter(Job.status == request.args['status'])
+    if request.args.get('kind'):
+        query = query.filter(Job.kind == request.args['kind'])
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    jobs = query.order_by(Job.id.desc()).limit(limit).all()
+    return jsonify({'success': True, 'jobs': [job.to_dict() for job in jobs]})
+
+@api.route('/api/jobs/<int:job_id>')
+@admin_required
+def get_job(job_id):
+    """Status (and result, once finished) of one job"""
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+    
+@api.route('/api/admin/bulk', methods=['POST'])
+@admin_required
+def bulk_write():
+    """Bulk update offerings, tags, groups, boards and tests in one transaction (see backend.bulk_writes)"""
+    return _bulk_write_response(request.get_json(silent=True))
+
+@api.route('/api/admin/<section>', methods=['POST'])
+@admin_required
+def bulk_write_section(section):
+    """One section of a bulk write, the body being its list of items"""
+    if section not in BULK_SECTIONS:
+        return jsonify({'success': False, 'error': f"Unknown section '{section}'"}), 404
+    return _bulk_write_response({section: request.get_json(silent=True)})
+
+def _bulk_write_response(payload):
+    try:
+        result = apply_bulk(payload)
+    except BulkWriteError as e:
+        return jsonify({'success': False, 'error': str(e), 'errors': e.errors}), 400
+    return jsonify({'success': True, **result})
     
-@app.route("/", defaults={"path": ""})
-@app.route("/<path:path>")
+@api.route("/", defaults={"path": ""})
+@api.route("/<path:path>")
 def serve_react(path):
     if path != "" and os.path.exists(os.path.join(DIST_DIR, path)):
         return send_from_directory(DIST_DIR, path)
     return send_from_directory(DIST_DIR, "index.html")
 
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         db.create_all()
+        prepare_database()
+    if not app.extensions['readiness'].ready:
+        warm_up(app)
     app.run(debug=True, port=5000)
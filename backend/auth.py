@@ -0,0 +1,27 @@
+import hmac
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+
+def is_admin_request():
+    """True when the request carries the configured ADMIN_TOKEN in X-Admin-Token"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token', '')
+    # No token configured means admin features are disabled entirely
+    return bool(token) and hmac.compare_digest(token, supplied)
+
+
+def admin_required(view):
+    """Reject requests without a valid admin token"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({
+                'success': False,
+                'error': 'Admin token required'
+            }), 403
+        return view(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,371 @@
+"""
+Bulk admin writes to offerings and their tags, subject groups, boards and tests.
+
+A payload may hold any of these sections:
+
+    {"offerings": [{"id": 12, "annual_fee": 250000, "min_score_pct": 61.5}, ...],
+     "tags":   [{"offering_id": 12, "tags": ["engineering", "robotics"]}, ...],
+     "groups": [{"offering_id": 12, "groups": ["Pre-Engineering"]}, ...],
+     "boards": [{"offering_id": 12, "boards": ["Pakistani Boards"]}, ...],
+     "tests":  [{"offering_id": 12, "tests": [{"name": "NTS", "min_score": 60}]}, ...]}
+
+Offering fields left out keep their values. Tags, groups, boards and tests
+replace the offering's current set. The whole payload is validated against
+the model constraints before anything is written. Each section is then
+applied with one set-based statement (UPDATE ... FROM (VALUES ...) or
+INSERT ... ON CONFLICT), all in one transaction. A 500-offering fee refresh
+therefore costs one UPDATE rather than 500. A refresh_summary job is queued in
+the same transaction; a job worker then refreshes the derived tables and
+notifies the web workers, so the request never runs the refresh itself and a
+committed write always has its refresh queued.
+"""
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+
+from backend.jobs import enqueue
+from backend.models import db, EntranceTestType, ProgramOfferingBoard, ProgramOfferingGroup, Tag
+
+logger = logging.getLogger('universe.bulk_writes')
+
+# Items per section and request
+MAX_ITEMS = 5000
+
+# Mirror the check constraints on ProgramOffering and ProgramOfferingTest
+SCORE_TYPES = ('ssc_hsc', 'ibcc')
+
+# Updatable offering fields: SQL type of the VALUES column
+OFFERING_FIELDS = {
+    'min_score_pct': 'double precision',
+    'min_score_type': 'text',
+    'annual_fee': 'integer',
+    'hostel_available': 'boolean'
+}
+
+# Replace-the-set sections: (payload key, table, value column, longest value)
+SET_SECTIONS = {
+    'tags': ('tags', 'program_offering_tags', 'tag_id', Tag.__table__.c.name.type.length),
+    'groups': ('groups', 'program_offering_groups', 'subject_group', ProgramOfferingGroup.__table__.c.subject_group.type.length),
+    'boards': ('boards', 'program_offering_boards', 'board', ProgramOfferingBoard.__table__.c.board.type.length)
+}
+
+SECTIONS = ['offerings', *SET_SECTIONS, 'tests']
+
+UPDATE_OFFERINGS = """
+    UPDATE program_offerings AS po SET
+        min_score_pct = COALESCE(v.min_score_pct, po.min_score_pct),
+        min_score_type = COALESCE(v.min_score_type, po.min_score_type),
+        annual_fee = COALESCE(v.annual_fee, po.annual_fee),
+        hostel_available = COALESCE(v.hostel_available, po.hostel_available)
+    FROM (VALUES {values}) AS v(id, min_score_pct, min_score_type, annual_fee, hostel_available)
+    WHERE po.id = v.id
+      AND (po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available) IS DISTINCT FROM
+          (COALESCE(v.min_score_pct, po.min_score_pct), COALESCE(v.min_score_type, po.min_score_type),
+           COALESCE(v.annual_fee, po.annual_fee), COALESCE(v.hostel_available, po.hostel_available))
+"""
+
+# Rows of the listed offerings that are not in the new set go, new ones are added;
+# both in one statement (the two never touch the same row)
+REPLACE_SET = """
+    WITH v(offering_id, value) AS (VALUES {values}),
+    removed AS (
+        DELETE FROM {table} AS t
+        WHERE t.offering_id = ANY(:offering_ids)
+          AND NOT EXISTS (SELECT 1 FROM v WHERE v.offering_id = t.offering_id AND v.value = t.{column})
+        RETURNING 1
+    ),
+    added AS (
+        INSERT INTO {table} (offering_id, {column})
+        SELECT offering_id, value FROM v
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM removed), (SELECT COUNT(*) FROM added)
+"""
+
+CLEAR_SET = """
+    WITH removed AS (
+        DELETE FROM {table} WHERE offering_id = ANY(:offering_ids) RETURNING 1
+    )
+    SELECT COUNT(*), 0 FROM removed
+"""
+
+REPLACE_TESTS = """
+    WITH v(offering_id, test_type_id, min_score) AS (VALUES {values}),
+    removed AS (
+        DELETE FROM program_offering_tests AS t
+        WHERE t.offering_id = ANY(:offering_ids)
+          AND NOT EXISTS (SELECT 1 FROM v WHERE v.offering_id = t.offering_id AND v.test_type_id = t.test_type_id)
+        RETURNING 1
+    ),
+    upserted AS (
+        INSERT INTO program_offering_tests (offering_id, test_type_id, min_score)
+        SELECT offering_id, test_type_id, min_score FROM v
+        ON CONFLICT (offering_id, test_type_id) DO UPDATE SET min_score = EXCLUDED.min_score
+        WHERE program_offering_tests.min_score IS DISTINCT FROM EXCLUDED.min_score
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM removed), (SELECT COUNT(*) FROM upserted)
+"""
+
+# Get-or-create by unique name in one statement; DO UPDATE (rather than DO NOTHING)
+# so that RETURNING also yields the rows that already existed
+UPSERT_NAMES = """
+    INSERT INTO {table} (name) VALUES {values}
+    ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+    RETURNING id, name
+"""
+
+
+class BulkWriteError(Exception):
+    """Payload rejected; errors lists each problem as {section, index, error}"""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid item(s)')
+        self.errors = errors
+
+
+def values_list(rows, types):
+    """VALUES rows with bound parameters for text(): (sql, params)
+
+    The first row casts each column, which fixes the column types even where
+    a column holds only NULLs.
+    """
+    params = {}
+    tuples = []
+    for i, row in enumerate(rows):
+        placeholders = []
+        for j, value in enumerate(row):
+            name = f'v{i}_{j}'
+            params[name] = value
+            placeholders.append(f'CAST(:{name} AS {types[j]})' if i == 0 else f':{name}')
+        tuples.append(f"({', '.join(placeholders)})")
+    return ', '.join(tuples), params
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _validate_offering(item):
+    """Problems with one offering update, as strings"""
+    problems = []
+    unknown = set(item) - set(OFFERING_FIELDS) - {'id'}
+    if unknown:
+        problems.append(f"unknown fields: {', '.join(sorted(unknown))}")
+    if not set(item) & set(OFFERING_FIELDS):
+        problems.append(f"nothing to update; fields are {', '.join(OFFERING_FIELDS)}")
+    if 'min_score_pct' in item and not (_is_number(item['min_score_pct']) and 0 <= item['min_score_pct'] <= 100):
+        problems.append('min_score_pct must be a number between 0 and 100')
+    if 'min_score_type' in item and item['min_score_type'] not in SCORE_TYPES:
+        problems.append(f"min_score_type must be one of {', '.join(SCORE_TYPES)}")
+    if 'annual_fee' in item and not (isinstance(item['annual_fee'], int) and not isinstance(item['annual_fee'], bool)
+                                     and item['annual_fee'] >= 0):
+        problems.append('annual_fee must be a non-negative integer')
+    if 'hostel_available' in item and not isinstance(item['hostel_available'], bool):
+        problems.append('hostel_available must be true or false')
+    return problems
+
+
+def _names(values, field, max_length):
+    """Stripped, de-duplicated names, or (None, problem)"""
+    if not isinstance(values, list) or not all(isinstance(value, str) and value.strip() for value in values):
+        return None, f'{field} must be a list of non-empty strings'
+    names = list(dict.fromkeys(value.strip() for value in values))
+    too_long = [name for name in names if len(name) > max_length]
+    if too_long:
+        return None, f"{field} longer than {max_length} characters: {', '.join(too_long)}"
+    return names, None
+
+
+def _validate_tests(tests):
+    """[(name, min_score)], or (None, problem)"""
+    max_length = EntranceTestType.__table__.c.name.type.length
+    if not isinstance(tests, list):
+        return None, 'tests must be a list of {"name", "min_score"}'
+    parsed = {}
+    for test in tests:
+        if not isinstance(test, dict) or not isinstance(test.get('name'), str) or not test['name'].strip():
+            return None, 'each test needs a name'
+        name = test['name'].strip()
+        if len(name) > max_length:
+            return None, f'test name longer than {max_length} characters: {name}'
+        min_score = test.get('min_score', 0)
+        if not _is_number(min_score) or min_score < 0:
+            return None, f'min_score of {name} must be a non-negative number'
+        parsed[name] = float(min_score)
+    return list(parsed.items()), None
+
+
+def validate_payload(payload):
+    """Normalized sections of a bulk payload; raises BulkWriteError listing every problem
+
+    Returns {section: [item, ...]} where offering items are dicts and the other
+    sections hold (offering_id, values) pairs.
+    """
+    if not isinstance(payload, dict):
+        raise BulkWriteError([{'section': None, 'index': None, 'error': 'Body must be a JSON object'}])
+    errors = []
+    unknown = set(payload) - set(SECTIONS)
+    if unknown:
+        errors.append({'section': None, 'index': None, 'error': f"Unknown sections: {', '.join(sorted(unknown))}"})
+    sections = {}
+    for section in SECTIONS:
+        items = payload.get(section)
+        if items is None:
+            continue
+        if not isinstance(items, list):
+            errors.append({'section': section, 'index': None, 'error': 'must be a list'})
+            continue
+        if len(items) > MAX_ITEMS:
+            errors.append({'section': section, 'index': None, 'error': f'at most {MAX_ITEMS} items per request'})
+            continue
+
+        parsed = []
+        seen = set()
+        id_field = 'id' if section == 'offerings' else 'offering_id'
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'section': section, 'index': index, 'error': 'must be an object'})
+                continue
+            offering_id = item.get(id_field)
+            if not isinstance(offering_id, int) or isinstance(offering_id, bool):
+                errors.append({'section': section, 'index': index, 'error': f'{id_field} must be an integer'})
+                continue
+            if offering_id in seen:
+                errors.append({'section': section, 'index': index, 'error': f'duplicate {id_field} {offering_id}'})
+                continue
+            seen.add(offering_id)
+
+            if section == 'offerings':
+                problems = _validate_offering(item)
+                value = item
+            else:
+                problems = []
+                if section == 'tests':
+                    values, problem = _validate_tests(item.get('tests'))
+                else:
+                    key, _, _, max_length = SET_SECTIONS[section]
+                    values, problem = _names(item.get(key), key, max_length)
+                if problem:
+                    problems.append(problem)
+                value = (offering_id, values)
+            for problem in problems:
+                errors.append({'section': section, 'index': index, 'error': problem})
+            if not problems:
+                parsed.append(value)
+        sections[section] = parsed
+
+    if not errors and not any(sections.values()):
+        errors.append({'section': None, 'index': None, 'error': f"Nothing to write; sections are {', '.join(SECTIONS)}"})
+    if errors:
+        raise BulkWriteError(errors)
+    return sections
+
+
+def _check_offerings_exist(sections):
+    ids = set()
+    for section, items in sections.items():
+        ids.update(item['id'] if section == 'offerings' else item[0] for item in items)
+    found = {row.id for row in db.session.execute(
+        text("SELECT id FROM program_offerings WHERE id = ANY(:ids)"), {'ids': list(ids)}
+    )}
+    errors = []
+    for section, items in sections.items():
+        for index, item in enumerate(items):
+            offering_id = item['id'] if section == 'offerings' else item[0]
+            if offering_id not in found:
+                errors.append({'section': section, 'index': index, 'error': f'offering {offering_id} does not exist'})
+    if errors:
+        raise BulkWriteError(errors)
+
+
+def _upsert_names(table, names):
+    """{name: id} for the names, creating the missing rows"""
+    if not names:
+        return {}
+    values, params = values_list([(name,) for name in names], ['text'])
+    rows = db.session.execute(text(UPSERT_NAMES.format(table=table, values=values)), params)
+    return {row.name: row.id for row in rows}
+
+
+def _update_offerings(items):
+    values, params = values_list(
+        [(item['id'], *(item.get(field) for field in OFFERING_FIELDS)) for item in items],
+        ['integer', *OFFERING_FIELDS.values()]
+    )
+    result = db.session.execute(text(UPDATE_OFFERINGS.format(values=values)), params)
+    return {'updated': result.rowcount}
+
+
+def _replace_sets(section, items):
+    _, table, column, _ = SET_SECTIONS[section]
+    if section == 'tags':
+        tag_ids = _upsert_names('tags', list(dict.fromkeys(name for _, names in items for name in names)))
+        pairs = [(offering_id, tag_ids[name]) for offering_id, names in items for name in names]
+        value_type = 'integer'
+    else:
+        pairs = [(offering_id, value) for offering_id, values in items for value in values]
+        value_type = 'text'
+
+    offering_ids = [offering_id for offering_id, _ in items]
+    if pairs:
+        values, params = values_list(pairs, ['integer', value_type])
+        statement = REPLACE_SET.format(table=table, column=column, values=values)
+    else:
+        statement, params = CLEAR_SET.format(table=table), {}
+    removed, added = db.session.execute(text(statement), {**params, 'offering_ids': offering_ids}).one()
+    return {'removed': removed, 'added': added}
+
+
+def _replace_tests(items):
+    type_ids = _upsert_names('entrance_test_types', list(dict.fromkeys(name for _, tests in items for name, _ in tests)))
+    rows = [(offering_id, type_ids[name], min_score) for offering_id, tests in items for name, min_score in tests]
+    offering_ids = [offering_id for offering_id, _ in items]
+    if rows:
+        values, params = values_list(rows, ['integer', 'integer', 'double precision'])
+        statement = REPLACE_TESTS.format(values=values)
+    else:
+        statement, params = CLEAR_SET.format(table='program_offering_tests'), {}
+    removed, upserted = db.session.execute(text(statement), {**params, 'offering_ids': offering_ids}).one()
+    return {'removed': removed, 'upserted': upserted}
+
+
+def apply_bulk(payload):
+    """Validate and apply a bulk payload in one transaction
+
+    Returns the row counts per section and the ID of the refresh_summary job
+    queued with the writes (None when nothing changed). Raises BulkWriteError,
+    without writing anything, when any item is invalid.
+    """
+    sections = {section: items for section, items in validate_payload(payload).items() if items}
+    counts = {}
+    job = None
+    try:
+        _check_offerings_exist(sections)
+        for section, items in sections.items():
+            if section == 'offerings':
+                counts[section] = _update_offerings(items)
+            elif section == 'tests':
+                counts[section] = _replace_tests(items)
+            else:
+                counts[section] = _replace_sets(section, items)
+        if any(count for section_counts in counts.values() for count in section_counts.values()):
+            # Group eligibility depends on groups and tags only
+            job = enqueue('refresh_summary', {'eligibility': bool({'groups', 'tags'} & set(sections))}, commit=False)
+            # Text statements do not flush, so mark the write for read-your-writes routing
+            db.session.info['wrote'] = True
+        db.session.commit()
+    except (IntegrityError, DataError) as e:
+        # Validation mirrors the constraints, so this is a concurrent change or a gap in it
+        db.session.rollback()
+        raise BulkWriteError([{'section': None, 'index': None, 'error': str(e.orig).strip()}])
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if job is not None:
+        logger.info("Bulk write %s, refresh queued as job %s", counts, job.id)
+    return {'counts': counts, 'refresh_job': job.id if job is not None else None}
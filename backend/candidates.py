@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CandidateCache:
+    """LRU of match candidates keyed by the interest-free part of a profile
+
+    Bounded by the total number of cached candidate rows rather than entries, so a
+    few broad profiles cannot crowd the memory of many narrow ones. Entries
+    expire after ttl seconds, which bounds how long an ingest takes to show when
+    the worker is not notified of it (backend.invalidation clears the cache).
+    """
+
+    def __init__(self, max_rows, ttl):
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        # Incremented by clear(); candidates computed before a clear are not stored
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, candidates, generation=None):
+        if len(candidates) > self.max_rows:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), candidates)
+            self.rows += len(candidates)
+            while self.rows > self.max_rows:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.rows = 0
+            self.generation += 1
+
+    def _remove(self, key):
+        _, candidates = self._entries.pop(key)
+        self.rows -= len(candidates)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'rows': self.rows, 'hits': self.hits, 'misses': self.misses}
+
+
+def init_candidate_cache(app):
+    """Per-worker cache of match candidates; MATCH_CANDIDATE_CACHE_ROWS=0 disables it"""
+    app.config.setdefault('MATCH_CANDIDATE_CACHE_ROWS', 100000)
+    app.config.setdefault('MATCH_CANDIDATE_CACHE_SECONDS', 300.0)
+    if app.config['MATCH_CANDIDATE_CACHE_ROWS'] > 0:
+        app.extensions['match_candidates'] = CandidateCache(
+            app.config['MATCH_CANDIDATE_CACHE_ROWS'],
+            app.config['MATCH_CANDIDATE_CACHE_SECONDS']
+        )
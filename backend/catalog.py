@@ -0,0 +1,143 @@
+import hashlib
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import text
+
+from backend.facets import FacetIndex
+from backend.models import db
+from backend.range_index import RangeIndex
+from backend.schema import normalize_city
+
+# Every offering with its aggregated tags, groups and boards, in match order
+CATALOG_QUERY = text("""
+    SELECT
+        po.id as offering_id,
+        p.id as program_id, p.name as program_name, p.discipline, p.code,
+        u.id as university_id, u.name as university_name, u.sector,
+        c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
+        COUNT(po.id) OVER (PARTITION BY p.id) as offering_count,
+        STRING_AGG(DISTINCT t.name, ', ') as tags,
+        STRING_AGG(DISTINCT pog.subject_group, ', ') as required_groups,
+        STRING_AGG(DISTINCT pob.board, ', ') as accepted_boards
+    FROM program_offerings po
+    JOIN programs p ON po.program_id = p.id
+    JOIN campuses c ON po.campus_id = c.id
+    JOIN universities u ON c.university_id = u.id
+    LEFT JOIN program_offering_tags pot ON po.id = pot.offering_id
+    LEFT JOIN tags t ON pot.tag_id = t.id
+    LEFT JOIN program_offering_groups pog ON po.id = pog.offering_id
+    LEFT JOIN program_offering_boards pob ON po.id = pob.offering_id
+    GROUP BY po.id, p.id, p.name, p.discipline, p.code, u.id, u.name, u.sector, c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available
+    ORDER BY po.min_score_pct ASC, po.annual_fee ASC, po.id ASC
+""")
+
+# Subject group check per offering and HSC group, as computed at ingest
+GROUP_CHECKS_QUERY = text("""
+    SELECT offering_id, subject_group, score_delta, compatible
+    FROM offering_group_eligibility
+""")
+
+# The catalog's write counter (bumped by every write path, see backend.invalidation)
+COUNTER_QUERY = text("SELECT COALESCE(MAX(version), 0) FROM catalog_version WHERE name = 'catalog'")
+
+# The counter and a cheap summary of the tables, which tells apart databases whose counters
+# happen to match (a re-seeded database, another environment's catalog file)
+FINGERPRINT_QUERY = text("""
+    SELECT
+        (SELECT COALESCE(MAX(version), 0) FROM catalog_version WHERE name = 'catalog'),
+        (SELECT COUNT(*) FROM program_offerings),
+        (SELECT COALESCE(MAX(id), 0) FROM program_offerings),
+        (SELECT COALESCE(SUM(annual_fee), 0) FROM program_offerings),
+        (SELECT COALESCE(SUM(min_score_pct), 0) FROM program_offerings),
+        (SELECT COUNT(*) FROM program_offering_tags),
+        (SELECT COUNT(*) FROM program_offering_groups),
+        (SELECT COUNT(*) FROM program_offering_boards)
+""")
+
+
+# A catalog row: the match query's columns plus the normalized city and tag set.
+# offering_count and the group check are filled in per request.
+CatalogOffering = namedtuple('CatalogOffering', [
+    'offering_id', 'program_id', 'program_name', 'discipline', 'code',
+    'university_id', 'university_name', 'sector',
+    'city', 'min_score_pct', 'min_score_type', 'annual_fee', 'hostel_available',
+    'offering_count', 'tags', 'required_groups', 'accepted_boards',
+    'city_key', 'tag_keys', 'group_score_delta', 'group_compatible'
+], defaults=(None, None))
+
+
+class Catalog:
+    """Read-only snapshot of the offering catalog held by each worker
+
+    Rows are the same shape as the match query's, so the matching code can
+    score them directly. group_checks maps an HSC group to
+    {offering_id: (score_delta, compatible)}. A catalog opened from a catalog
+    file (backend.catalog_file) passes array-backed offerings, lookups and
+    indexes instead of building them.
+    """
+
+    def __init__(self, version, offerings, group_checks=None, by_id=None, index=None, facets=None):
+        self.version = version
+        self.offerings = offerings
+        self.by_id = by_id if by_id is not None else {row.offering_id: row for row in offerings}
+        self.group_checks = group_checks or {}
+        self.index = index if index is not None else RangeIndex(offerings)
+        self.facets = facets if facets is not None else FacetIndex(offerings)
+
+    def __len__(self):
+        return len(self.offerings)
+
+
+def catalog_fingerprint():
+    """Version string for the catalog currently in the database: "<counter>-<summary hash>"
+
+    Any committed catalog write changes it, whichever columns it touched. The
+    catalog_version table is created by the release step (backend.release).
+    """
+    row = db.session.execute(FINGERPRINT_QUERY).one()
+    return f'{row[0]}-{hashlib.sha1(repr(tuple(row[1:])).encode()).hexdigest()[:12]}'
+
+
+def catalog_counter_version():
+    """Version string of a request served without an in-memory catalog: "<counter>"
+
+    The counter alone, one index lookup instead of the fingerprint's table
+    scans. Catalog versions share the counter as their prefix (see
+    same_catalog_version).
+    """
+    return str(db.session.execute(COUNTER_QUERY).scalar())
+
+
+def same_catalog_version(a, b):
+    """Whether two catalog versions stand for the same catalog
+
+    Fingerprints are compared whole; when either is a bare counter (no
+    in-memory catalog) only the counters are.
+    """
+    if '-' in a and '-' in b:
+        return a == b
+    return a.split('-')[0] == b.split('-')[0]
+
+
+
+def load_catalog():
+    """Read the catalog from the database"""
+    version = catalog_fingerprint()
+    offerings = [
+        CatalogOffering(
+            *row,
+            city_key=normalize_city(row.city),
+            tag_keys=frozenset(tag.strip().lower() for tag in row.tags.split(',')) if row.tags else frozenset()
+        )
+        for row in db.session.execute(CATALOG_QUERY)
+    ]
+    group_checks = {}
+    for row in db.session.execute(GROUP_CHECKS_QUERY):
+        group_checks.setdefault(row.subject_group, {})[row.offering_id] = (row.score_delta, row.compatible)
+    return Catalog(version, offerings, group_checks)
+
+
+def get_catalog():
+    """Catalog loaded by this worker, None before warm-up"""
+    return current_app.extensions.get('catalog')
@@ -0,0 +1,414 @@
+"""
+Columnar catalog file shared by the workers of a machine.
+
+Instead of every worker building its own catalog from the database, the
+catalog is written once to CATALOG_FILE and each worker memory-maps it
+read-only. The operating system keeps one copy of the pages for all workers,
+so per-worker memory stays flat as workers and universities are added.
+
+Layout (little-endian): a header (magic, file format, offering count, catalog
+version, section count), a section directory (name, array typecode, offset,
+length) and 8-byte aligned sections:
+
+- one fixed-width column per numeric field, in match order
+- one column of string references per text field, into an interned string
+  table (strings.offsets, strings.data)
+- offering IDs in ascending order with their positions, for lookups by ID
+- per HSC group, the subject group check (score delta, compatible) per offering
+- the levels of each score/fee range index (see backend.range_index)
+- per facet value (tags included), a bitmap over the offerings
+
+Columns are read in place through memoryview casts, and rows are built from
+them on access; only the interned strings are decoded into each worker.
+The file is replaced atomically (write, then rename), and workers reopen it
+when they notice a new file with a different catalog version.
+"""
+
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+from flask import current_app
+
+from backend.catalog import Catalog, CatalogOffering, catalog_fingerprint, load_catalog
+from backend.facets import FACETS, FacetIndex
+from backend.range_index import RangeIndex, ScoreFeeIndex
+
+logger = logging.getLogger('universe.catalog_file')
+
+MAGIC = b'UNICATLG'
+# Bump when the layout changes; files in another format are rebuilt
+FILE_FORMAT = 2
+# magic, file format, offering count, catalog version, section count
+HEADER = struct.Struct('<8sII32sI')
+# name, array typecode, offset, length in bytes
+SECTION = struct.Struct('<24sc7xQQ')
+ALIGNMENT = 8
+# Group check score delta of offerings without a precomputed check
+MISSING_DELTA = -128
+
+NUMERIC_COLUMNS = [
+    ('offering_id', 'i'), ('program_id', 'i'), ('university_id', 'i'),
+    ('min_score_pct', 'd'), ('annual_fee', 'q'), ('hostel_available', 'B'), ('offering_count', 'i')
+]
+STRING_COLUMNS = [
+    'program_name', 'discipline', 'code', 'university_name', 'sector', 'city', 'min_score_type',
+    'tags', 'required_groups', 'accepted_boards', 'city_key'
+]
+
+
+class CatalogFileError(Exception):
+    """Missing, truncated or incompatible catalog file"""
+
+
+class _Writer:
+    def __init__(self):
+        self.sections = []
+        self.strings = {}
+        self.string_values = []
+
+    def intern(self, value):
+        if value is None:
+            return -1
+        ref = self.strings.get(value)
+        if ref is None:
+            ref = self.strings[value] = len(self.string_values)
+            self.string_values.append(value)
+        return ref
+
+    def add(self, name, typecode, values):
+        self.add_bytes(name, typecode, array(typecode, values).tobytes())
+
+    def add_bytes(self, name, typecode, data):
+        if len(name) > 24:
+            raise ValueError(f"Section name too long: {name}")
+        self.sections.append((name, typecode, data))
+
+
+def write_catalog_file(path, catalog):
+    """Write a catalog (as built by load_catalog) to path atomically, returns its size in bytes"""
+    offerings = catalog.offerings
+    writer = _Writer()
+
+    for name, typecode in NUMERIC_COLUMNS:
+        writer.add(name, typecode, [getattr(row, name) for row in offerings])
+    for name in STRING_COLUMNS:
+        writer.add(f's.{name}', 'i', [writer.intern(getattr(row, name)) for row in offerings])
+
+    order = sorted(range(len(offerings)), key=lambda position: offerings[position].offering_id)
+    writer.add('ids.sorted', 'i', [offerings[position].offering_id for position in order])
+    writer.add('ids.position', 'i', order)
+
+    groups = sorted(catalog.group_checks)
+    writer.add('groups', 'i', [writer.intern(group) for group in groups])
+    for number, group in enumerate(groups):
+        checks = catalog.group_checks[group]
+        deltas = array('b', [MISSING_DELTA]) * len(offerings)
+        compatible = array('B', [0]) * len(offerings)
+        for position, row in enumerate(offerings):
+            check = checks.get(row.offering_id)
+            if check is not None:
+                deltas[position] = check[0]
+                compatible[position] = 1 if check[1] else 0
+        writer.add_bytes(f'group.{number}.delta', 'b', deltas.tobytes())
+        writer.add_bytes(f'group.{number}.compat', 'B', compatible.tobytes())
+
+    score_types = list(catalog.index.by_type)
+    writer.add('rx.types', 'i', [writer.intern(score_type) for score_type in score_types])
+    for number, score_type in enumerate(score_types):
+        index = catalog.index.by_type[score_type]
+        writer.add(f'rx.{number}.scores', 'd', index.scores)
+        for level, (fees, positions) in enumerate(index.levels):
+            writer.add(f'rx.{number}.fees.{level}', 'q', fees)
+            writer.add(f'rx.{number}.pos.{level}', 'i', positions)
+
+    for facet in FACETS:
+        bitmaps = catalog.facets.bitmaps[facet]
+        writer.add(f'facet.{facet}.values', 'i', [writer.intern(value) for value in bitmaps])
+        writer.add_bytes(f'facet.{facet}.bits', 'B', b''.join(
+            catalog.facets.bitmap_bytes(bits) for bits in bitmaps.values()
+        ))
+
+    encoded = [value.encode('utf-8') for value in writer.string_values]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    writer.add('strings.offsets', 'q', offsets)
+    writer.add_bytes('strings.data', 'B', b''.join(encoded))
+
+    header = HEADER.pack(MAGIC, FILE_FORMAT, len(offerings), catalog.version.encode(), len(writer.sections))
+    position = _aligned(HEADER.size + SECTION.size * len(writer.sections))
+    directory = []
+    for name, typecode, data in writer.sections:
+        directory.append(SECTION.pack(name.encode(), typecode.encode(), position, len(data)))
+        position = _aligned(position + len(data))
+
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(directory))
+        for (_, _, data), entry in zip(writer.sections, directory):
+            f.seek(SECTION.unpack(entry)[2])
+            f.write(data)
+        f.truncate(_aligned(f.tell()))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return position
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def read_file_version(path):
+    """Catalog version stored in a catalog file, None when it is missing or unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            magic, file_format, _, version, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or file_format != FILE_FORMAT:
+        return None
+    return version.rstrip(b'\0').decode()
+
+
+class CatalogFile:
+    """A catalog file mapped read-only; sections are typed memoryviews into the mapping"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Identifies this file; a rename over the path changes it
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        try:
+            magic, file_format, self.count, version, section_count = HEADER.unpack_from(self.map, 0)
+        except struct.error:
+            raise CatalogFileError(f"{path} is truncated")
+        if magic != MAGIC or file_format != FILE_FORMAT:
+            raise CatalogFileError(f"{path} is not a catalog file in format {FILE_FORMAT}")
+        self.version = version.rstrip(b'\0').decode()
+
+        view = memoryview(self.map)
+        self.sections = {}
+        for number in range(section_count):
+            name, typecode, offset, length = SECTION.unpack_from(self.map, HEADER.size + SECTION.size * number)
+            if offset + length > len(self.map):
+                raise CatalogFileError(f"{path} is truncated")
+            self.sections[name.rstrip(b'\0').decode()] = view[offset:offset + length].cast(typecode.decode())
+
+        # The interned strings are few (names repeat across offerings), so they are
+        # decoded once; the trailing None is what reference -1 finds
+        offsets = self.sections['strings.offsets']
+        data = self.sections['strings.data']
+        self.string_values = [
+            bytes(data[offsets[ref]:offsets[ref + 1]]).decode('utf-8') for ref in range(len(offsets) - 1)
+        ] + [None]
+
+    def string(self, ref):
+        """Interned string by reference (-1 is None)"""
+        return self.string_values[ref]
+
+    def strings(self, name):
+        return [self.string(ref) for ref in self.sections[name]]
+
+
+class MappedOfferings(Sequence):
+    """Catalog rows in match order, built from the file's columns on access"""
+
+    def __init__(self, catalog_file):
+        self.file = catalog_file
+        self.count = catalog_file.count
+        self.numeric = [catalog_file.sections[name] for name, _ in NUMERIC_COLUMNS]
+        self.refs = [catalog_file.sections[f's.{name}'] for name in STRING_COLUMNS]
+        self.tag_keys = {}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[number] for number in range(*position.indices(self.count))]
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+
+        numeric = self.numeric
+        strings = self.file.string_values
+        refs = [strings[column[position]] for column in self.refs]
+        tags = refs[7]
+        tag_keys = self.tag_keys.get(tags)
+        if tag_keys is None:
+            tag_keys = self.tag_keys[tags] = (
+                frozenset(tag.strip().lower() for tag in tags.split(',')) if tags else frozenset()
+            )
+        # Field order of CatalogOffering
+        return CatalogOffering(
+            numeric[0][position], numeric[1][position], refs[0], refs[1], refs[2],
+            numeric[2][position], refs[3], refs[4],
+            refs[5], numeric[3][position], refs[6], numeric[4][position], numeric[5][position] == 1,
+            numeric[6][position], tags, refs[8], refs[9],
+            refs[10], tag_keys
+        )
+
+
+class MappedIds:
+    """offering_id -> position lookups by bisecting the sorted ID column"""
+
+    def __init__(self, catalog_file):
+        self.ids = catalog_file.sections['ids.sorted']
+        self.positions = catalog_file.sections['ids.position']
+
+    def position(self, offering_id):
+        number = bisect_left(self.ids, offering_id)
+        if number < len(self.ids) and self.ids[number] == offering_id:
+            return self.positions[number]
+        return None
+
+
+class MappedRows:
+    """by_id of a mapped catalog: offering_id -> row"""
+
+    def __init__(self, ids, offerings):
+        self.ids = ids
+        self.offerings = offerings
+
+    def __len__(self):
+        return len(self.offerings)
+
+    def __contains__(self, offering_id):
+        return self.ids.position(offering_id) is not None
+
+    def get(self, offering_id, default=None):
+        position = self.ids.position(offering_id)
+        return self.offerings[position] if position is not None else default
+
+
+class MappedGroupChecks:
+    """group_checks entry of a mapped catalog: offering_id -> (score_delta, compatible)"""
+
+    def __init__(self, ids, deltas, compatible):
+        self.ids = ids
+        self.deltas = deltas
+        self.compatible = compatible
+
+    def get(self, offering_id, default=None):
+        position = self.ids.position(offering_id)
+        if position is None or self.deltas[position] == MISSING_DELTA:
+            return default
+        return self.deltas[position], bool(self.compatible[position])
+
+
+def open_catalog_file(path):
+    """Catalog backed by a mapped catalog file"""
+    catalog_file = CatalogFile(path)
+    sections = catalog_file.sections
+    offerings = MappedOfferings(catalog_file)
+    ids = MappedIds(catalog_file)
+
+    group_checks = {
+        group: MappedGroupChecks(ids, sections[f'group.{number}.delta'], sections[f'group.{number}.compat'])
+        for number, group in enumerate(catalog_file.strings('groups'))
+    }
+
+    by_type = {}
+    for number, score_type in enumerate(catalog_file.strings('rx.types')):
+        levels = []
+        while f'rx.{number}.fees.{len(levels)}' in sections:
+            levels.append((sections[f'rx.{number}.fees.{len(levels)}'], sections[f'rx.{number}.pos.{len(levels)}']))
+        by_type[score_type] = ScoreFeeIndex.from_arrays(sections[f'rx.{number}.scores'], levels)
+
+    row_bytes = (len(offerings) + 7) // 8
+    bitmaps = {}
+    for facet in FACETS:
+        bits = sections[f'facet.{facet}.bits']
+        bitmaps[facet] = {
+            value: int.from_bytes(bits[number * row_bytes:(number + 1) * row_bytes], 'little')
+            for number, value in enumerate(catalog_file.strings(f'facet.{facet}.values'))
+        }
+
+    catalog = Catalog(
+        catalog_file.version, offerings, group_checks,
+        by_id=MappedRows(ids, offerings),
+        index=RangeIndex(offerings, by_type),
+        facets=FacetIndex(offerings, bitmaps)
+    )
+    catalog.file = catalog_file
+    return catalog
+
+
+def ensure_catalog_file(path):
+    """Rebuild the catalog file from the database unless it already has the current version
+
+    Workers starting together serialize on a lock file, so only the first one
+    writes. Returns True when the file was (re)written.
+    """
+    with open(f'{path}.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if read_file_version(path) == catalog_fingerprint():
+                return False
+            catalog = load_catalog()
+            size = write_catalog_file(path, catalog)
+            logger.info("Wrote catalog file %s (version %s, %d offerings, %d bytes)",
+                        path, catalog.version, len(catalog), size)
+            return True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def publish_catalog_file():
+    """Rewrite CATALOG_FILE after the catalog changed (ingest, summary refresh), when configured"""
+    path = current_app.config.get('CATALOG_FILE')
+    if path:
+        ensure_catalog_file(path)
+
+
+def reload_catalog_file(app):
+    """Switch to a replaced catalog file; returns True when the worker's catalog changed"""
+    path = app.config.get('CATALOG_FILE')
+    catalog = app.extensions.get('catalog')
+    if not path or catalog is None or not hasattr(catalog, 'file'):
+        return False
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if (stat.st_ino, stat.st_mtime_ns) == catalog.file.identity:
+        return False
+    if read_file_version(path) == catalog.version:
+        # Rewritten with the same content
+        catalog.file.identity = (stat.st_ino, stat.st_mtime_ns)
+        return False
+    app.extensions['catalog'] = open_catalog_file(path)
+    logger.info("Reloaded catalog file %s: version %s -> %s", path, catalog.version, app.extensions['catalog'].version)
+    return True
+
+
+def init_catalog_file(app):
+    """Check CATALOG_FILE for a new version at most every CATALOG_FILE_CHECK_SECONDS"""
+    app.config.setdefault('CATALOG_FILE', '')
+    app.config.setdefault('CATALOG_FILE_CHECK_SECONDS', 5.0)
+    if not app.config['CATALOG_FILE']:
+        return
+
+    state = {'checked': time.monotonic()}
+
+    @app.before_request
+    def _check_catalog_file():
+        now = time.monotonic()
+        if now - state['checked'] < app.config['CATALOG_FILE_CHECK_SECONDS']:
+            return
+        state['checked'] = now
+        try:
+            reload_catalog_file(app)
+        except Exception as e:
+            logger.warning("Could not reload catalog file: %s", e)
@@ -0,0 +1,238 @@
+"""
+Single-flight coalescing of identical concurrent requests.
+
+When many students submit the same profile at once, only the first request
+(the leader) runs the view; identical requests that arrive while it is running
+wait for it and are answered with a copy of its response. Requests are keyed by
+method, path, query string and canonical JSON body.
+
+With COALESCE_LOCK_DIR set, workers on the same machine also coalesce with
+each other. Each leader takes an flock on one of LOCK_STRIPES lock files (by
+key hash) and leaves its response in the stripe's result file. A worker that
+had to wait for the lock reuses that response when it is for the same key
+and was written after the worker started waiting.
+
+Coalescing within a worker needs threaded workers (the Procfile runs gunicorn
+with gthread): a sync worker serves one request at a time, so no request ever
+finds a leader running in its own worker.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, request
+
+from backend.routing import LAST_WRITE_COOKIE
+
+logger = logging.getLogger('universe.coalescing')
+
+LOCK_STRIPES = 1024
+# Interval between attempts to take a lock file held by another worker
+LOCK_POLL_SECONDS = 0.005
+# Set on responses copied from another request: 'worker' or 'machine'
+COALESCED_HEADER = 'X-Coalesced'
+
+
+class SharedResponse:
+    """Body, status and headers of a response, safe to hand to other threads"""
+
+    def __init__(self, body, status, headers):
+        self.body = body
+        self.status = status
+        self.headers = headers
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(response.get_data(), response.status_code, [
+            (name, value) for name, value in response.headers.items() if name.lower() != 'content-length'
+        ])
+
+    def to_response(self, source):
+        response = Response(self.body, status=self.status, headers=self.headers)
+        response.headers[COALESCED_HEADER] = source
+        return response
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the key share its result"""
+
+    def __init__(self, wait_seconds, lock_dir=None):
+        self.wait_seconds = wait_seconds
+        self.lock_dir = lock_dir
+        self.leaders = 0
+        self.followers = 0
+        self.shared_across_workers = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def run(self, key, func):
+        """(SharedResponse, source) where source is None when func ran here
+
+        func returns a SharedResponse, or None when the result must not be shared.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+
+        if not leader:
+            if flight.done.wait(self.wait_seconds) and flight.result is not None:
+                with self._lock:
+                    self.followers += 1
+                return flight.result, 'worker'
+            # Leader too slow or failed; run it independently
+            return func(), None
+
+        try:
+            if self.lock_dir:
+                flight.result, source = self._run_locked(key, func)
+            else:
+                flight.result, source = func(), None
+            return flight.result, source
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _run_locked(self, key, func):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        stripe = os.path.join(self.lock_dir, f'{int(digest[:8], 16) % LOCK_STRIPES:04d}')
+        waited_since = time.time()
+        with open(stripe + '.lock', 'a+') as lock_file:
+            deadline = time.monotonic() + self.wait_seconds
+            locked = waited = False
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    waited = True
+                    if time.monotonic() >= deadline:
+                        break
+                    time.sleep(LOCK_POLL_SECONDS)
+            if not locked:
+                logger.warning("Coalescing lock %s busy for %.1fs, running without it", stripe, self.wait_seconds)
+            try:
+                if waited and locked:
+                    shared = _read_result(stripe + '.result', digest, waited_since)
+                    if shared is not None:
+                        with self._lock:
+                            self.shared_across_workers += 1
+                        return shared, 'machine'
+                result = func()
+                if locked and result is not None:
+                    _write_result(stripe + '.result', digest, result)
+                return result, None
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self):
+        return {
+            'in_flight': len(self._flights),
+            'leaders': self.leaders,
+            'followers': self.followers,
+            'shared_across_workers': self.shared_across_workers
+        }
+
+
+def _write_result(path, digest, result):
+    header = json.dumps({
+        'key': digest,
+        'written_at': time.time(),
+        'status': result.status,
+        'headers': result.headers
+    }).encode()
+    temporary = f'{path}.{os.getpid()}.{threading.get_ident()}'
+    with open(temporary, 'wb') as f:
+        f.write(header + b'\n' + result.body)
+    os.replace(temporary, path)
+
+
+def _read_result(path, digest, written_after):
+    try:
+        with open(path, 'rb') as f:
+            header, _, body = f.read().partition(b'\n')
+        header = json.loads(header)
+    except (OSError, ValueError):
+        return None
+    if header['key'] != digest or header['written_at'] < written_after:
+        return None
+    return SharedResponse(body, header['status'], [tuple(item) for item in header['headers']])
+
+
+def request_key():
+    """Canonical form of the current request"""
+    body = None
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        if body is None:
+            body = request.get_data(as_text=True)
+    return json.dumps([
+        request.method,
+        request.path,
+        sorted(request.args.items(multi=True)),
+        body,
+        # Clients that just wrote read from the primary (see backend.routing)
+        request.headers.get('X-DB-Last-Write') or request.cookies.get(LAST_WRITE_COOKIE)
+    ], sort_keys=True, separators=(',', ':'), default=str)
+
+
+def coalesced(view):
+    """Share the view's response between identical concurrent requests
+
+    Profiled requests always run on their own.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        flight = current_app.extensions.get('coalescing')
+        if flight is None or request.headers.get('X-Profile') or request.args.get('profile'):
+            return view(*args, **kwargs)
+
+        responses = []
+
+        def run_view():
+            response = current_app.make_response(view(*args, **kwargs))
+            responses.append(response)
+            if response.is_streamed or response.status_code in (429, 503):
+                # Load shedding answers are for this request (and client) only
+                return None
+            return SharedResponse.from_response(response)
+
+        shared, source = flight.run(request_key(), run_view)
+        if source is None:
+            # This request ran the view itself
+            return responses[0]
+        return shared.to_response(source)
+
+    return wrapper
+
+
+def init_coalescing(app):
+    """Per-worker request coalescing; COALESCE_REQUESTS=false disables it"""
+    app.config.setdefault('COALESCE_REQUESTS', True)
+    app.config.setdefault('COALESCE_WAIT_SECONDS', 10.0)
+    app.config.setdefault('COALESCE_LOCK_DIR', '')
+    if app.config['COALESCE_REQUESTS']:
+        app.extensions['coalescing'] = SingleFlight(
+            app.config['COALESCE_WAIT_SECONDS'],
+            app.config['COALESCE_LOCK_DIR'] or None
+        )
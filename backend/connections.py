@@ -0,0 +1,252 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context
+from sqlalchemy import event, text
+from sqlalchemy.pool import QueuePool
+
+from backend.models import db
+
+logger = logging.getLogger('universe.connections')
+
+PARAMETER = re.compile(r'%\((\w+)\)s')
+
+# SQL type (and a short code for the statement name) of each parameter type
+PARAMETER_TYPES = {
+    bool: ('boolean', 'b'),
+    int: ('bigint', 'i'),
+    float: ('double precision', 'f'),
+    str: ('text', 's')
+}
+
+# libpq TCP keepalives so dead connections to a remote server are noticed
+# without a ping on every checkout
+KEEPALIVE_CONNECT_ARGS = {
+    'connect_timeout': 10,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
+}
+
+
+class LatencyStats:
+    """Count, max and recent percentiles of a latency in milliseconds"""
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    def to_dict(self):
+        recent = sorted(self.recent)
+
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p / 100))], 3) if recent else None
+
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50_ms': pct(50),
+            'p99_ms': pct(99),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout wait and connect latency"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = LatencyStats()
+        self.connect_latency = LatencyStats()
+        self.health = {'healthy': None, 'last_ping_ms': None, 'last_check': None, 'failures': 0, 'discarded': 0}
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.checkout_wait.add(elapsed_ms)
+            if has_request_context():
+                g.db_wait_ms = g.get('db_wait_ms', 0.0) + elapsed_ms
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        record = super()._create_connection()
+        self.connect_latency.add((time.perf_counter() - start) * 1000)
+        return record
+
+    def keep_alive(self):
+        """Ping every idle connection once and top the pool back up to its size
+
+        Runs off the request path, so checkouts never pay for a ping or a reconnect.
+        Returns whether the server answered.
+        """
+        answered = failed = 0
+        slowest = 0.0
+        # Checkouts are FIFO, so taking one connection at a time visits each idle one.
+        # A failed ping discards only that connection (it reconnects on its next
+        # checkout), so one dead connection does not hide the others.
+        for _ in range(self.checkedin()):
+            ping_ms = self._ping()
+            if ping_ms is None:
+                failed += 1
+                continue
+            answered += 1
+            slowest = max(slowest, ping_ms)
+        self.health['discarded'] += failed
+        if failed and answered:
+            # The server is up: a second pass reconnects the discarded connections
+            # here instead of on a request's checkout
+            for _ in range(self.checkedin()):
+                ping_ms = self._ping()
+                if ping_ms is not None:
+                    slowest = max(slowest, ping_ms)
+
+        # Unhealthy only when no connection got an answer
+        healthy = answered > 0 or failed == 0
+        while healthy and self.checkedin() + self.checkedout() < self.size():
+            ping_ms = self._ping()
+            if ping_ms is None:
+                healthy = False
+            else:
+                slowest = max(slowest, ping_ms)
+
+        self.health['healthy'] = healthy
+        self.health['last_ping_ms'] = round(slowest, 3) if healthy else None
+        self.health['last_check'] = time.time()
+        if not healthy:
+            self.health['failures'] += 1
+        return healthy
+
+    def _ping(self):
+        # QueuePool.connect directly, so keepalive checkouts stay out of the wait stats
+        connection = QueuePool.connect(self)
+        try:
+            start = time.perf_counter()
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            connection.rollback()
+            return (time.perf_counter() - start) * 1000
+        except Exception as e:
+            logger.warning("Keepalive ping failed: %s", e)
+            connection.invalidate(e)
+            return None
+        finally:
+            connection.close()
+
+    def metrics(self):
+        return {
+            'checkout_wait': self.checkout_wait.to_dict(),
+            'connect': self.connect_latency.to_dict(),
+            'health': self.health
+        }
+
+
+class ConnectionKeeper(threading.Thread):
+    """Background thread that keeps each engine's pool alive and checked"""
+
+    def __init__(self, engines, interval):
+        super().__init__(name='db-keepalive', daemon=True)
+        self.engines = engines
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for name, engine in self.engines.items():
+                if not isinstance(engine.pool, TimedQueuePool):
+                    continue
+                try:
+                    engine.pool.keep_alive()
+                except Exception as e:
+                    logger.warning("Keepalive for %s failed: %s", name or 'primary', e)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def prepared_text(name, sql):
+    """A text() statement that is PREPAREd server-side once per connection
+
+    Later executions on the same connection send EXECUTE <name>(...) so Postgres
+    skips parsing and planning. Names must be unique.
+    """
+    return text(sql).execution_options(prepared_name=name)
+
+
+def init_connection_management(app):
+    """Keepalive thread, server-side prepared statements and checkout timing"""
+    app.config.setdefault('DB_KEEPALIVE_SECONDS', 60.0)
+    app.config.setdefault('DB_PREPARE_STATEMENTS', True)
+
+    with app.app_context():
+        engines = dict(db.engines)
+
+    if app.config['DB_PREPARE_STATEMENTS']:
+        for engine in engines.values():
+            event.listen(engine, 'before_cursor_execute', _use_prepared_statement, retval=True)
+
+    if app.config['DB_KEEPALIVE_SECONDS'] > 0:
+        keeper = ConnectionKeeper(engines, app.config['DB_KEEPALIVE_SECONDS'])
+        keeper.start()
+        app.extensions['connection_keeper'] = keeper
+
+    app.before_request(_reset_wait)
+    app.after_request(_add_wait_header)
+
+
+def _use_prepared_statement(conn, cursor, statement, parameters, context, executemany):
+    name = context.execution_options.get('prepared_name') if context is not None else None
+    if not name or executemany or not isinstance(parameters, dict):
+        return statement, parameters
+    if context.execution_options.get('stream_results'):
+        # Server-side cursors DECLARE the statement, which cannot be an EXECUTE
+        return statement, parameters
+
+    names = list(dict.fromkeys(PARAMETER.findall(statement)))
+    types = [PARAMETER_TYPES.get(type(parameters.get(parameter))) for parameter in names]
+    if None in types:
+        # A value we would not type the same way psycopg2 does; run it unprepared
+        return statement, parameters
+
+    # Declared types follow the Python values (e.g. a budget beyond the integer
+    # fee column stays bigint), so each type combination gets its own statement
+    signature = ''.join(code for _, code in types)
+    prepared_name = f'{name}_{signature}' if signature else name
+    prepared = conn.info.setdefault('prepared_statements', set())
+    if prepared_name not in prepared:
+        positional = statement
+        for number, parameter in enumerate(names, start=1):
+            positional = positional.replace(f'%({parameter})s', f'${number}')
+        declared = f"({', '.join(sql_type for sql_type, _ in types)})" if types else ''
+        cursor.execute(f'PREPARE {prepared_name}{declared} AS {positional.replace("%%", "%")}')
+        prepared.add(prepared_name)
+
+    arguments = ', '.join(f'%({parameter})s' for parameter in names)
+    return (f'EXECUTE {prepared_name}({arguments})' if names else f'EXECUTE {prepared_name}'), parameters
+
+
+def _reset_wait():
+    g.db_wait_ms = 0.0
+
+
+def _add_wait_header(response):
+    response.headers['X-DB-Wait'] = f"{g.get('db_wait_ms', 0.0):.2f}"
+    return response
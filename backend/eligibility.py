@@ -0,0 +1,87 @@
+"""
+offering_group_eligibility: the subject group check for each HSC group and
+offering, computed once at ingest instead of on every match request.
+
+Rows carry the hash of the rules they were computed with; the release step
+(backend.release) recomputes the table when the rules in backend.matching
+change or offerings are missing.
+"""
+
+import hashlib
+import logging
+
+from sqlalchemy import delete, func, insert, select, text
+
+from backend.matching import (
+    COMPATIBILITY_RULES, GROUP_COMPATIBLE_POINTS, GROUP_INCOMPATIBLE_POINTS, GROUP_MATCH_POINTS,
+    SUBJECT_RESTRICTIONS, group_contribution
+)
+from backend.models import db, OfferingGroupEligibility, ProgramOffering
+from backend.schema import SCHEMA_LOCK_ID
+
+logger = logging.getLogger('universe.eligibility')
+
+# The five HSC groups students choose from
+ELIGIBILITY_GROUPS = list(SUBJECT_RESTRICTIONS)
+
+RULES_VERSION = hashlib.sha1(repr((
+    ELIGIBILITY_GROUPS,
+    sorted((group, rule) for group, rule in COMPATIBILITY_RULES.items()),
+    GROUP_MATCH_POINTS, GROUP_COMPATIBLE_POINTS, GROUP_INCOMPATIBLE_POINTS
+)).encode()).hexdigest()[:16]
+
+SOURCE_QUERY = text("""
+    SELECT offering_id, required_groups, tags
+    FROM offering_summary
+""")
+
+
+def eligibility_rows(offering_id, required_groups, tags):
+    """Table rows for one offering, one per HSC group"""
+    rows = []
+    for group in ELIGIBILITY_GROUPS:
+        score_delta, compatible = group_contribution(group, required_groups, tags)
+        rows.append({
+            'offering_id': offering_id,
+            'subject_group': group,
+            'compatible': compatible,
+            'score_delta': score_delta,
+            'rules_version': RULES_VERSION
+        })
+    return rows
+
+
+def refresh_group_eligibility():
+    """Recompute the whole table from offering_summary, returns the number of rows
+
+    offering_summary must be current, so run this after refreshing it.
+    """
+    db.session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {'lock_id': SCHEMA_LOCK_ID})
+    rows = []
+    for offering in db.session.execute(SOURCE_QUERY):
+        rows.extend(eligibility_rows(offering.offering_id, offering.required_groups, offering.tags))
+
+    db.session.execute(delete(OfferingGroupEligibility))
+    if rows:
+        db.session.execute(insert(OfferingGroupEligibility), rows)
+    db.session.commit()
+    logger.info("Computed %d group eligibility rows (rules %s)", len(rows), RULES_VERSION)
+    return len(rows)
+
+
+def group_eligibility_is_current():
+    """Whether every offering has rows computed with the current rules"""
+    stale = db.session.execute(
+        select(func.count()).select_from(OfferingGroupEligibility)
+        .where(OfferingGroupEligibility.rules_version != RULES_VERSION)
+    ).scalar()
+    stored = db.session.execute(select(func.count()).select_from(OfferingGroupEligibility)).scalar()
+    offerings = db.session.execute(select(func.count()).select_from(ProgramOffering)).scalar()
+    return stale == 0 and stored == offerings * len(ELIGIBILITY_GROUPS)
+
+
+def ensure_group_eligibility():
+    """Recompute the table if the rules changed or offerings are missing"""
+    OfferingGroupEligibility.__table__.create(db.engine, checkfirst=True)
+    if not group_eligibility_is_current():
+        refresh_group_eligibility()
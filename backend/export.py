@@ -0,0 +1,228 @@
+"""
+Full offering catalog export as CSV or Parquet.
+
+Rows are read from a server-side cursor EXPORT_BATCH_ROWS at a time and written
+out batch by batch, so an export holds one batch in memory however large the
+catalog is. /api/export/offerings.csv and /api/export/offerings.parquet stream
+the batches as chunked responses; the CLI writes them to a file:
+
+    python -m backend.export offerings.csv
+    python -m backend.export offerings.parquet      # needs pyarrow
+
+Parquet support is optional: without pyarrow installed, only CSV is available.
+"""
+
+import argparse
+import csv
+import io
+import logging
+import sys
+
+from sqlalchemy import text
+
+from backend.models import db
+
+logger = logging.getLogger('universe.export')
+
+EXPORT_BATCH_ROWS = 1000
+
+# Each offering with its tags, subject groups, boards and entrance test minimums;
+# the lists are aggregated per offering before the join so rows do not multiply
+EXPORT_QUERY = text("""
+    WITH offering_tags AS (
+        SELECT pot.offering_id, STRING_AGG(t.name, ', ' ORDER BY t.name) as tags
+        FROM program_offering_tags pot
+        JOIN tags t ON t.id = pot.tag_id
+        GROUP BY pot.offering_id
+    ), offering_groups AS (
+        SELECT offering_id, STRING_AGG(subject_group, ', ' ORDER BY subject_group) as required_groups
+        FROM program_offering_groups
+        GROUP BY offering_id
+    ), offering_boards AS (
+        SELECT offering_id, STRING_AGG(board, ', ' ORDER BY board) as accepted_boards
+        FROM program_offering_boards
+        GROUP BY offering_id
+    ), offering_tests AS (
+        SELECT pot.offering_id, STRING_AGG(e.name || ': ' || pot.min_score, '; ' ORDER BY e.name) as entrance_tests
+        FROM program_offering_tests pot
+        JOIN entrance_test_types e ON e.id = pot.test_type_id
+        GROUP BY pot.offering_id
+    )
+    SELECT po.id as offering_id,
+           p.id as program_id, p.name as program_name, p.discipline, p.code as program_code,
+           u.id as university_id, u.name as university_name, u.sector,
+           c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
+           offering_tags.tags, offering_groups.required_groups, offering_boards.accepted_boards,
+           offering_tests.entrance_tests
+    FROM program_offerings po
+    JOIN programs p ON po.program_id = p.id
+    JOIN campuses c ON po.campus_id = c.id
+    JOIN universities u ON c.university_id = u.id
+    LEFT JOIN offering_tags ON offering_tags.offering_id = po.id
+    LEFT JOIN offering_groups ON offering_groups.offering_id = po.id
+    LEFT JOIN offering_boards ON offering_boards.offering_id = po.id
+    LEFT JOIN offering_tests ON offering_tests.offering_id = po.id
+    ORDER BY po.id
+""")
+
+# Column names and pyarrow type factories, in query order
+EXPORT_COLUMNS = [
+    ('offering_id', 'int64'),
+    ('program_id', 'int64'),
+    ('program_name', 'string'),
+    ('discipline', 'string'),
+    ('program_code', 'string'),
+    ('university_id', 'int64'),
+    ('university_name', 'string'),
+    ('sector', 'string'),
+    ('city', 'string'),
+    ('min_score_pct', 'float64'),
+    ('min_score_type', 'string'),
+    ('annual_fee', 'int64'),
+    ('hostel_available', 'bool_'),
+    ('tags', 'string'),
+    ('required_groups', 'string'),
+    ('accepted_boards', 'string'),
+    ('entrance_tests', 'string')
+]
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+
+class ExportUnavailable(Exception):
+    """The format needs a library that is not installed"""
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_batches():
+    """Batches of export rows from a server-side cursor
+
+    The query runs when this is called, so database errors surface before a
+    response starts streaming; rows are fetched as the batches are consumed.
+    """
+    result = db.session.execute(EXPORT_QUERY, execution_options={
+        'stream_results': True,
+        'max_row_buffer': EXPORT_BATCH_ROWS
+    })
+    return result.partitions(EXPORT_BATCH_ROWS)
+
+
+def csv_chunks(batches):
+    """Encoded CSV, a header and then one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what has been written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self.position = 0
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_chunks(batches):
+    """Encoded Parquet, one row group per batch; raises ExportUnavailable without pyarrow"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportUnavailable('Parquet export needs pyarrow (pip install pyarrow)')
+
+    schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, kind in EXPORT_COLUMNS])
+
+    def generate():
+        sink = _ChunkSink()
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+        try:
+            for rows in batches:
+                columns = list(zip(*rows))
+                writer.write_table(pyarrow.Table.from_arrays([
+                    pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)
+                ], schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    return generate()
+
+
+def export_chunks(fmt, batches):
+    """Encoded chunks of the export in fmt ('csv' or 'parquet')"""
+    if fmt == 'parquet':
+        return parquet_chunks(batches)
+    return csv_chunks(batches)
+
+
+def export_to_file(path, fmt):
+    """Write the export to path, returns the number of bytes written"""
+    if fmt == 'parquet' and not parquet_available():
+        raise ExportUnavailable('Parquet export needs pyarrow (pip install pyarrow)')
+    written = 0
+    with open(path, 'wb') as f:
+        for chunk in export_chunks(fmt, export_batches()):
+            f.write(chunk)
+            written += len(chunk)
+    db.session.commit()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the offering catalog to a CSV or Parquet file')
+    parser.add_argument('path', help='output file; the format follows the extension unless --format is given')
+    parser.add_argument('--format', choices=sorted(FORMATS), help='csv or parquet')
+    args = parser.parse_args(argv)
+    fmt = args.format or ('parquet' if args.path.endswith('.parquet') else 'csv')
+
+    from backend.app import create_app
+
+    # Export only: no warm-up and no catalog listener
+    app = create_app({'WARMUP_ON_START': False, 'CATALOG_LISTEN': False})
+    with app.app_context():
+        try:
+            written = export_to_file(args.path, fmt)
+        except ExportUnavailable as e:
+            print(e, file=sys.stderr)
+            return 1
+    print(f"Wrote {written} bytes to {args.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
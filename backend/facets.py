@@ -0,0 +1,123 @@
+"""
+Facet counts for the filter sidebar, from per-value bitmaps over the catalog.
+
+Bit i of a bitmap stands for the catalog's i-th offering. A filter selection
+is the AND across facets of the OR of the selected values' bitmaps. Each
+count is the popcount of a value's bitmap ANDed with the selection of every
+other facet, so a facet's own filter does not narrow its counts.
+"""
+
+# Annual fee buckets in PKR: (label, lower bound inclusive, upper bound exclusive)
+FEE_BUCKETS = [
+    ('under_100k', 0, 100000),
+    ('100k_250k', 100000, 250000),
+    ('250k_500k', 250000, 500000),
+    ('500k_1m', 500000, 1000000),
+    ('1m_plus', 1000000, None)
+]
+
+# Query parameter of each facet
+FACETS = ['city', 'sector', 'discipline', 'fee', 'hostel', 'group', 'tag']
+
+
+def fee_bucket(annual_fee):
+    for label, lower, upper in FEE_BUCKETS:
+        if annual_fee >= lower and (upper is None or annual_fee < upper):
+            return label
+    return None
+
+
+def _facet_values(row):
+    """Values of each facet for one catalog row"""
+    return {
+        'city': [row.city],
+        'sector': [row.sector],
+        'discipline': [row.discipline],
+        'fee': [fee_bucket(row.annual_fee)],
+        'hostel': ['yes' if row.hostel_available else 'no'],
+        'group': row.required_groups.split(', ') if row.required_groups else [],
+        'tag': row.tags.split(', ') if row.tags else []
+    }
+
+
+class FacetIndex:
+    """Per-value bitmaps (plain Python ints) of every facet over a catalog's offerings"""
+
+    def __init__(self, offerings, bitmaps=None):
+        self.size = len(offerings)
+        self.all = (1 << self.size) - 1
+        if bitmaps is not None:
+            self.bitmaps = bitmaps
+            return
+        positions = {facet: {} for facet in FACETS}
+        for position, row in enumerate(offerings):
+            for facet, values in _facet_values(row).items():
+                for value in values:
+                    if value is not None:
+                        positions[facet].setdefault(value, []).append(position)
+        self.bitmaps = {
+            facet: {value: self._bitmap(found) for value, found in values.items()}
+            for facet, values in positions.items()
+        }
+
+    def bitmap_bytes(self, bits):
+        """A bitmap as little-endian bytes, the layout of catalog files"""
+        return bits.to_bytes((self.size + 7) // 8, 'little')
+
+    def _bitmap(self, positions):
+        # Set bits in a bytearray and convert once; OR-ing 1 << i into an int is quadratic
+        data = bytearray((self.size + 7) // 8)
+        for position in positions:
+            data[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(data, 'little')
+
+    def _filter_bits(self, filters):
+        """{facet: OR of the selected values' bitmaps} for the filtered facets"""
+        result = {}
+        for facet, values in filters.items():
+            bitmaps = self.bitmaps.get(facet, {})
+            facet_bits = 0
+            for value in values:
+                facet_bits |= bitmaps.get(value, 0)
+            result[facet] = facet_bits
+        return result
+
+    def selection(self, filters):
+        """Bitmap of the offerings matching {facet: [values]}: OR within a facet, AND across facets"""
+        selected = self.all
+        for facet_bits in self._filter_bits(filters).values():
+            selected &= facet_bits
+        return selected
+
+    def counts(self, filters):
+        """Count of every facet value for a filter selection, largest first (zero counts omitted)
+
+        Each facet is counted against the selection of the other facets' filters,
+        so its values show how many offerings selecting them would add (values of
+        one facet are OR-ed) rather than dropping to zero once one is chosen.
+        """
+        filter_bits = self._filter_bits(filters)
+        result = {}
+        for facet, bitmaps in self.bitmaps.items():
+            selected = self.all
+            for other, facet_bits in filter_bits.items():
+                if other != facet:
+                    selected &= facet_bits
+            counts = [(value, (bits & selected).bit_count()) for value, bits in bitmaps.items()]
+            result[facet] = [
+                {'value': value, 'count': count}
+                for value, count in sorted(counts, key=lambda item: (-item[1], str(item[0])))
+                if count
+            ]
+        return result
+
+    def positions(self, selected):
+        """Catalog positions of the set bits of a selection, ascending"""
+        found = []
+        data = selected.to_bytes((self.size + 7) // 8, 'little')
+        for index, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                found.append(index * 8 + low.bit_length() - 1)
+                byte ^= low
+        return found
@@ -0,0 +1,243 @@
+"""
+Load university documents (university_data_template.json format) into the database.
+
+Usage:
+    python -m backend.ingest fast.json ned_extracted_data.json nust_comprehensive.json
+    python -m backend.ingest --rankings university_popularity_rankings.json
+"""
+
+import argparse
+import difflib
+import json
+import logging
+import sys
+
+from sqlalchemy import delete
+
+from backend.models import db, University, Campus, Program, ProgramOffering, ProgramOfferingBoard, ProgramOfferingGroup, ProgramOfferingTest, ProgramOfferingTag, Tag, EntranceTestType
+from backend.schema import refresh_offering_summary
+from backend.catalog_file import publish_catalog_file
+from backend.eligibility import refresh_group_eligibility
+from backend.invalidation import CATALOG, bump_version
+from backend.popularity import load_rankings_file
+
+logger = logging.getLogger('universe.ingest')
+
+REQUIRED_OFFERING_FIELDS = ('min_score_pct', 'min_score_type', 'annual_fee')
+
+
+def campus_key(name):
+    """Normalize a campus name so small spacing/case differences still match"""
+    return ' '.join((name or '').lower().split())
+
+
+def normalize_document(doc):
+    """Turn a university document into a flat list of offerings with their attributes
+
+    The bundled documents are hand-written and not fully consistent: campus names in
+    offerings may contain typos, the programs list can be missing, entrance tests may be
+    listed as name/name2/name3 and test_name can be a string or a list.
+    """
+    campuses = {campus_key(c['campus_name']): c['city'].strip() for c in doc.get('campuses', [])}
+
+    def resolve_city(campus_name):
+        key = campus_key(campus_name)
+        if key in campuses:
+            return campuses[key]
+        close = difflib.get_close_matches(key, list(campuses), n=1, cutoff=0.8)
+        if close:
+            return campuses[close[0]]
+        raise ValueError(f"Offering references unknown campus '{campus_name}'")
+
+    programs = {p['name']: p for p in doc.get('programs', [])}
+
+    def by_offering(section, field):
+        values = {}
+        for entry in doc.get(section, []):
+            value = entry.get(field) or []
+            if isinstance(value, str):
+                value = [value]
+            key = (campus_key(entry['campus_name']), entry['program_name'])
+            values.setdefault(key, []).extend(value)
+        return values
+
+    boards = by_offering('program_offering_boards', 'boards')
+    groups = by_offering('program_offering_groups', 'subject_groups')
+    tags = by_offering('program_offering_tags', 'tags')
+    tests = by_offering('program_offering_tests', 'test_name')
+    test_scores = {}
+    for entry in doc.get('program_offering_tests', []):
+        key = (campus_key(entry['campus_name']), entry['program_name'])
+        test_scores[key] = float(entry.get('min_score') or 0)
+
+    offerings = []
+    for offering in doc.get('program_offerings', []):
+        missing = [field for field in REQUIRED_OFFERING_FIELDS if offering.get(field) is None]
+        if missing:
+            logger.warning("Skipping %s at %s: missing %s", offering['program_name'], offering['campus_name'], ', '.join(missing))
+            continue
+
+        key = (campus_key(offering['campus_name']), offering['program_name'])
+        program = programs.get(offering['program_name'], {})
+        offerings.append({
+            'city': resolve_city(offering['campus_name']),
+            'program_name': offering['program_name'],
+            'discipline': program.get('discipline'),
+            'code': program.get('code'),
+            'min_score_pct': float(offering['min_score_pct']),
+            'min_score_type': offering['min_score_type'],
+            'annual_fee': int(offering['annual_fee']),
+            'hostel_available': bool(offering.get('hostel_available', False)),
+            'boards': list(dict.fromkeys(boards.get(key, []))),
+            'subject_groups': list(dict.fromkeys(groups.get(key, []))),
+            'tags': list(dict.fromkeys(tags.get(key, []))),
+            'tests': [(name, test_scores.get(key, 0.0)) for name in dict.fromkeys(tests.get(key, []))]
+        })
+
+    return {
+        'university': {
+            'name': doc['university']['name'].strip(),
+            'sector': doc['university']['sector'].strip().lower()
+        },
+        'cities': list(dict.fromkeys(campuses.values())),
+        'offerings': offerings
+    }
+
+
+class _Lookup:
+    """Get-or-create cache for rows identified by a unique name column"""
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = {}
+
+    def get(self, name, **fields):
+        row = self.rows.get(name)
+        if row is None:
+            row = self.model.query.filter_by(name=name).first()
+            if row is None:
+                row = self.model(name=name, **fields)
+                db.session.add(row)
+            self.rows[name] = row
+        return row
+
+
+def load_documents(docs):
+    """Insert or replace each university document, returns the number of offerings loaded
+
+    A university that already exists keeps its id, but its campuses (and through the
+    ON DELETE CASCADE foreign keys, all of its offerings) are replaced. offering_summary
+    is refreshed afterwards, CATALOG_FILE rewritten when configured and the workers
+    notified to reload their catalogs.
+    """
+    programs = _Lookup(Program)
+    tags = _Lookup(Tag)
+    test_types = _Lookup(EntranceTestType)
+    loaded = 0
+
+    for doc in docs:
+        document = normalize_document(doc)
+
+        university = University.query.filter_by(name=document['university']['name']).first()
+        if university:
+            university.sector = document['university']['sector']
+            db.session.execute(delete(Campus).where(Campus.university_id == university.id))
+            db.session.expire(university, ['campuses'])
+        else:
+            university = University(**document['university'])
+            db.session.add(university)
+
+        campuses = {}
+        for city in document['cities'] + [o['city'] for o in document['offerings']]:
+            if city not in campuses:
+                campuses[city] = Campus(university=university, city=city)
+
+        with db.session.no_autoflush:
+            for data in document['offerings']:
+                _add_offering(data, programs, tags, test_types, campuses)
+                loaded += 1
+
+        db.session.flush()
+
+    db.session.commit()
+    refresh_catalog()
+    return loaded
+
+
+def refresh_catalog(eligibility=True):
+    """Bring what is derived from the base tables up to date after a committed write
+
+    Refreshes offering_summary and (unless only offering fields changed, which it
+    does not depend on) offering_group_eligibility, notifies the workers and
+    rewrites CATALOG_FILE when configured. Returns the new catalog version.
+    """
+    refresh_offering_summary()
+    if eligibility:
+        refresh_group_eligibility()
+    # Bumped first: the file is labelled with the new version (a notified worker
+    # that takes the file lock first writes it instead)
+    version = bump_version(CATALOG)
+    publish_catalog_file()
+    return version
+
+
+def _add_offering(data, programs, tags, test_types, campuses):
+    """Add one normalized offering with its boards, groups, tags and tests to the session"""
+    program = programs.get(data['program_name'], discipline=data['discipline'], code=data['code'])
+    offering = ProgramOffering(
+        program=program,
+        campus=campuses[data['city']],
+        min_score_pct=data['min_score_pct'],
+        min_score_type=data['min_score_type'],
+        annual_fee=data['annual_fee'],
+        hostel_available=data['hostel_available']
+    )
+    offering.boards = [ProgramOfferingBoard(board=board) for board in data['boards']]
+    offering.groups = [ProgramOfferingGroup(subject_group=group) for group in data['subject_groups']]
+    offering.tags = [ProgramOfferingTag(tag=tags.get(name)) for name in data['tags']]
+    offering.tests = [
+        ProgramOfferingTest(test_type=test_types.get(name), min_score=min_score)
+        for name, min_score in data['tests']
+    ]
+    db.session.add(offering)
+
+
+def load_files(paths):
+    """Load university documents from JSON files"""
+    docs = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            content = json.load(f)
+        # A file may hold a single document or a list of them
+        docs.extend(content if isinstance(content, list) else [content])
+    return load_documents(docs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load university JSON documents into the database')
+    parser.add_argument('files', nargs='*', help='university documents in university_data_template.json format')
+    parser.add_argument('--rankings', help='popularity rankings (university_popularity_rankings.json) to load')
+    parser.add_argument('--create-tables', action='store_true', help='create missing tables first')
+    args = parser.parse_args(argv)
+    if not args.files and not args.rankings:
+        parser.error('pass university documents and/or --rankings')
+
+    from backend.app import create_app
+
+    # Ingest only: no warm-up and no catalog listener
+    app = create_app({'WARMUP_ON_START': False, 'CATALOG_LISTEN': False})
+    with app.app_context():
+        if args.create_tables:
+            db.create_all()
+        loaded = load_files(args.files) if args.files else 0
+        ranked = load_rankings_file(args.rankings) if args.rankings else 0
+
+    if args.files:
+        print(f"Loaded {loaded} program offerings from {len(args.files)} file(s)")
+    if args.rankings:
+        print(f"Loaded {ranked} popularity rankings")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import json
+import logging
+import re
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from backend.models import db
+
+slow_query_logger = logging.getLogger('universe.slow_queries')
+
+# Only read-only statements are explained: EXPLAIN ANALYZE runs the statement
+# (EXECUTE is how the prepared hot reads are sent). A WITH may hide a write in
+# a CTE, so those are explained only when they contain no data-modifying verb.
+EXPLAINABLE_STATEMENT = re.compile(r'^\s*(select|with|execute)\b', re.IGNORECASE)
+WRITE_VERB = re.compile(r'\b(insert|update|delete|merge)\b', re.IGNORECASE)
+
+
+def init_query_instrumentation(app):
+    """Time every SQL statement and expose per-request query counts as headers"""
+    app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 200.0)
+    app.config.setdefault('SLOW_QUERY_EXPLAIN', False)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine, app.config)
+
+    app.before_request(_reset_request_counters)
+    app.after_request(_add_db_headers)
+
+
+def instrument_engine(engine, config):
+    """Register cursor timing hooks on a single engine"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+        if context is not None:
+            context.query_timed = True
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['query_start_time'].pop()) * 1000
+        if context is not None:
+            context.query_timed = False
+
+        if has_request_context():
+            g.db_query_count = g.get('db_query_count', 0) + 1
+            g.db_time_ms = g.get('db_time_ms', 0.0) + elapsed_ms
+
+        if elapsed_ms >= config['SLOW_QUERY_THRESHOLD_MS']:
+            _log_slow_query(cursor, statement, parameters, executemany, elapsed_ms, config)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        # A statement that raised never reaches after_cursor_execute; drop its start
+        # so later statements on this pooled connection are not timed from it
+        context = exception_context.execution_context
+        conn = exception_context.connection
+        if context is not None and getattr(context, 'query_timed', False) and conn is not None:
+            context.query_timed = False
+            starts = conn.info.get('query_start_time')
+            if starts:
+                starts.pop()
+
+
+def _log_slow_query(cursor, statement, parameters, executemany, elapsed_ms, config):
+    """Write a structured slow-query entry, optionally with its execution plan"""
+    entry = {
+        'event': 'slow_query',
+        'duration_ms': round(elapsed_ms, 2),
+        'statement': ' '.join(statement.split()),
+        'parameters': parameters,
+        'executemany': executemany
+    }
+
+    if has_request_context():
+        entry['method'] = request.method
+        entry['path'] = request.path
+
+    if (config['SLOW_QUERY_EXPLAIN'] and not executemany
+            and EXPLAINABLE_STATEMENT.match(statement) and not WRITE_VERB.search(statement)):
+        entry['plan'] = _explain(cursor, statement, parameters)
+
+    slow_query_logger.warning(json.dumps(entry, default=str))
+
+
+def _explain(cursor, statement, parameters):
+    """Capture EXPLAIN (ANALYZE, BUFFERS) for a statement on the same connection"""
+    # Use the raw DBAPI connection so the EXPLAIN itself is not instrumented, and a
+    # savepoint that is always rolled back: ANALYZE really runs the statement, and
+    # neither its effects nor a failure may reach the request's transaction
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            explain_cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + statement, parameters)
+            plan = explain_cursor.fetchone()[0]
+        except Exception as e:
+            plan = {'error': str(e)}
+        explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+        explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    except Exception as e:
+        return {'error': str(e)}
+    finally:
+        explain_cursor.close()
+
+
+def _reset_request_counters():
+    g.db_query_count = 0
+    g.db_time_ms = 0.0
+
+
+def _add_db_headers(response):
+    response.headers['X-DB-Queries'] = str(g.get('db_query_count', 0))
+    response.headers['X-DB-Time'] = f"{g.get('db_time_ms', 0.0):.2f}"
+    return response
@@ -0,0 +1,239 @@
+"""
+Cross-worker invalidation of cached data through LISTEN/NOTIFY.
+
+Each worker keeps the offering catalog, the popularity rankings and match
+candidates in memory. Every write path calls bump_version(), which increments
+the data set's row in catalog_version and sends a NOTIFY on CHANNEL in the same
+transaction, so the notification only goes out once the write is committed.
+
+Each worker runs a CatalogListener thread that LISTENs on a connection of its
+own to the primary. On a notification it reads catalog_version and reloads the
+data sets whose version differs from the one it loaded. It also reads the table
+every CATALOG_VERSION_POLL_SECONDS, which bounds the delay when a notification
+is lost (dropped connection, a transaction-mode pooler that does not pass LISTEN
+through).
+"""
+
+import json
+import logging
+import select
+import threading
+import time
+
+from sqlalchemy import text
+
+from backend.catalog import load_catalog
+from backend.catalog_file import ensure_catalog_file, reload_catalog_file
+from backend.models import db, CatalogVersion
+
+logger = logging.getLogger('universe.invalidation')
+
+CHANNEL = 'catalog_changed'
+
+# Data sets with a version row
+CATALOG = 'catalog'          # offerings and their tags, groups, boards and tests
+POPULARITY = 'popularity'    # program popularity rankings
+
+BUMP_QUERY = text("""
+    INSERT INTO catalog_version (name, version, updated_at) VALUES (:name, 1, now())
+    ON CONFLICT (name) DO UPDATE SET version = catalog_version.version + 1, updated_at = now()
+    RETURNING version
+""")
+
+VERSIONS_QUERY = text("SELECT name, version FROM catalog_version")
+
+
+def ensure_catalog_version_table():
+    CatalogVersion.__table__.create(db.engine, checkfirst=True)
+
+
+def bump_version(name, commit=True):
+    """Increment a data set's version and notify every worker, returns the new version
+
+    The NOTIFY is delivered when the transaction commits; pass commit=False to
+    bump inside a transaction the caller commits with its own writes.
+    """
+    ensure_catalog_version_table()
+    version = db.session.execute(BUMP_QUERY, {'name': name}).scalar()
+    db.session.execute(text("SELECT pg_notify(:channel, :payload)"), {
+        'channel': CHANNEL,
+        'payload': json.dumps({'name': name, 'version': version})
+    })
+    if commit:
+        db.session.commit()
+    return version
+
+
+def read_versions():
+    """{data set: version}; data sets never bumped are missing"""
+    return {row.name: row.version for row in db.session.execute(VERSIONS_QUERY)}
+
+
+def record_loaded_versions(app):
+    """Remember the versions current before the worker loads its data (warm-up)
+
+    A write between this and the load is then reloaded once more rather than missed.
+    """
+    versions = read_versions()
+    app.extensions['loaded_versions'] = {name: versions.get(name, 0) for name in RELOADERS}
+
+
+def _clear_candidates(app):
+    cache = app.extensions.get('match_candidates')
+    if cache is not None:
+        cache.clear()
+
+
+def _reload_catalog(app):
+    catalog = app.extensions.get('catalog')
+    if catalog is not None:
+        path = app.config.get('CATALOG_FILE')
+        if path and hasattr(catalog, 'file'):
+            # Normally rewritten by the writer already; this only takes the lock and compares
+            ensure_catalog_file(path)
+            reload_catalog_file(app)
+        else:
+            app.extensions['catalog'] = load_catalog()
+    # Cached candidates came from the old catalog
+    _clear_candidates(app)
+
+
+def _reload_popularity(app):
+    # Imported here: backend.popularity bumps its version through this module
+    from backend.popularity import load_popularity
+    if app.extensions.get('popularity') is not None:
+        app.extensions['popularity'] = load_popularity()
+    # Candidates are scored with the popularity points
+    _clear_candidates(app)
+
+
+# What a worker reloads when a data set's version changes; before warm-up has
+# loaded a data set only the candidates are dropped
+RELOADERS = {
+    CATALOG: _reload_catalog,
+    POPULARITY: _reload_popularity
+}
+
+
+class CatalogListener(threading.Thread):
+    """Background thread that reloads the worker's data when another process changes it"""
+
+    def __init__(self, app, poll_seconds):
+        super().__init__(name='catalog-listener', daemon=True)
+        self.app = app
+        self.poll_seconds = poll_seconds
+        self.notifications = 0
+        self.checks = 0
+        self.reloads = {name: 0 for name in RELOADERS}
+        self.last_check = None
+        self.last_error = None
+        self._connection = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self._connection is None:
+                self._listen()
+            # Also right after (re)connecting: catches writes made while not listening
+            self.check()
+            self._wait(self.poll_seconds)
+        self._close()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def check(self):
+        """Reload every data set whose version changed; returns the names reloaded"""
+        reloaded = []
+        with self.app.app_context():
+            try:
+                loaded = self.app.extensions.get('loaded_versions')
+                if loaded is None:
+                    # Not warmed up yet; warm-up loads current data
+                    return reloaded
+                versions = read_versions()
+                for name, reload in RELOADERS.items():
+                    version = versions.get(name, 0)
+                    if version == loaded.get(name):
+                        continue
+                    start = time.perf_counter()
+                    reload(self.app)
+                    loaded[name] = version
+                    self.reloads[name] += 1
+                    reloaded.append(name)
+                    logger.info("Reloaded %s (version %d) in %.1f ms",
+                                name, version, (time.perf_counter() - start) * 1000)
+                self.checks += 1
+                self.last_check = time.time()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Catalog version check failed: %s", e)
+            finally:
+                db.session.remove()
+        return reloaded
+
+    def _listen(self):
+        try:
+            with self.app.app_context():
+                # Detached from the pool: held for the worker's lifetime, not counted against it
+                pooled = db.engine.raw_connection()
+                connection = pooled.driver_connection
+                pooled.detach()
+            connection.autocommit = True
+            self._connection = connection
+            with self._connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            logger.info("Listening for catalog changes on %s", CHANNEL)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning("Cannot LISTEN for catalog changes, polling every %.0fs: %s", self.poll_seconds, e)
+            self._close()
+
+    def _wait(self, timeout):
+        """Return on a notification or after timeout"""
+        if self._connection is None:
+            self._stop_event.wait(timeout)
+            return
+        try:
+            readable, _, _ = select.select([self._connection], [], [], timeout)
+            if not readable:
+                return
+            self._connection.poll()
+            while self._connection.notifies:
+                notify = self._connection.notifies.pop(0)
+                self.notifications += 1
+                logger.debug("Catalog change notification: %s", notify.payload)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning("Catalog listener connection lost: %s", e)
+            self._close()
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+        self._connection = None
+
+    def stats(self):
+        return {
+            'listening': self._connection is not None,
+            'poll_seconds': self.poll_seconds,
+            'notifications': self.notifications,
+            'checks': self.checks,
+            'reloads': self.reloads,
+            'loaded_versions': self.app.extensions.get('loaded_versions'),
+            'last_check': self.last_check,
+            'last_error': self.last_error
+        }
+
+
+def init_invalidation(app):
+    """Start the worker's catalog listener; CATALOG_LISTEN=false disables it"""
+    app.config.setdefault('CATALOG_LISTEN', True)
+    app.config.setdefault('CATALOG_VERSION_POLL_SECONDS', 30.0)
+    if not app.config['CATALOG_LISTEN']:
+        return
+    listener = app.extensions['catalog_listener'] = CatalogListener(app, app.config['CATALOG_VERSION_POLL_SECONDS'])
+    listener.start()
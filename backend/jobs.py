@@ -0,0 +1,261 @@
+"""
+Background jobs kept in the jobs table and run by `python -m backend.worker`.
+
+Heavy work (ingestion, view refreshes, database prewarming, batch matches) is
+enqueued from a request and picked up by a worker process, so it never holds
+a web worker. Workers claim jobs with FOR UPDATE SKIP LOCKED, so any number of
+them can share the table. Failed jobs are retried with exponential backoff until
+max_attempts, and jobs whose worker died are reclaimed after a lock timeout.
+While a job runs, its worker refreshes locked_at, so a long job is not
+reclaimed from a worker that is still running it.
+"""
+
+import datetime
+import logging
+import random
+import threading
+
+from flask import current_app
+from sqlalchemy import text
+
+from backend.models import db, Job
+
+logger = logging.getLogger('universe.jobs')
+
+CLAIM_QUERY = text("""
+    UPDATE jobs
+    SET status = 'running', locked_by = :worker, locked_at = now(), attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE (status = 'queued' AND run_at <= now())
+           OR (status = 'running' AND locked_at < now() - make_interval(secs => :lock_timeout))
+        ORDER BY priority DESC, run_at, id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+""")
+
+# Keeps a running job's lock fresh; matches nothing once the job was reclaimed
+HEARTBEAT_QUERY = text("""
+    UPDATE jobs SET locked_at = now()
+    WHERE id = :job_id AND status = 'running' AND locked_by = :worker
+""")
+
+# Hot relations read into shared buffers by the prewarm_database job
+PREWARM_RELATIONS = ['offering_summary', 'offering_group_eligibility', 'program_offerings', 'programs', 'universities', 'campuses']
+
+
+class JobError(Exception):
+    """A job that must not be retried (bad payload, unknown kind)"""
+
+
+def _ingest(payload):
+    from backend.ingest import load_documents, load_files
+    if 'documents' in payload:
+        return {'loaded': load_documents(payload['documents'])}
+    if 'paths' in payload:
+        return {'loaded': load_files(payload['paths'])}
+    raise JobError("ingest needs 'documents' or 'paths'")
+
+
+def _refresh_summary(payload):
+    from backend.ingest import refresh_catalog
+    # Group eligibility depends on groups and tags only; writers that changed neither skip it
+    version = refresh_catalog(eligibility=payload.get('eligibility', True))
+    return {'catalog_version': version}
+
+
+def _load_rankings(payload):
+    from backend.popularity import load_rankings, load_rankings_file
+    if 'document' in payload:
+        return {'loaded': load_rankings(payload['document'])}
+    if 'path' in payload:
+        return {'loaded': load_rankings_file(payload['path'])}
+    raise JobError("load_rankings needs 'document' or 'path'")
+
+
+def _prewarm_database(payload):
+    relations = payload.get('relations', PREWARM_RELATIONS)
+    available = db.session.execute(text(
+        "SELECT count(*) FROM pg_extension WHERE extname = 'pg_prewarm'"
+    )).scalar()
+    blocks = {}
+    for relation in relations:
+        if not db.session.execute(text("SELECT to_regclass(:relation) IS NOT NULL"), {'relation': relation}).scalar():
+            continue
+        if available:
+            blocks[relation] = db.session.execute(text("SELECT pg_prewarm(:relation)"), {'relation': relation}).scalar()
+        else:
+            # Without the extension a full read still pulls the pages into the cache
+            db.session.execute(text(f'SELECT count(*) FROM "{relation}"'))
+            blocks[relation] = None
+    db.session.commit()
+    return {'relations': blocks, 'pg_prewarm': bool(available)}
+
+
+def _batch_match(payload):
+    from backend.matching import match_offerings, parse_student_profile
+    top = int(payload.get('top', 20))
+    results = []
+    for data in payload.get('profiles', []):
+        matched = match_offerings(parse_student_profile(data))
+        results.append({
+            'total_matches': len(matched),
+            'offerings': [
+                {'offering_id': offering['offering_id'], 'match_score': offering['match_score']}
+                for offering in matched[:top]
+            ]
+        })
+    return {'results': results}
+
+
+def _purge_snapshots(payload):
+    from backend.snapshots import purge_expired_snapshots
+    return {'deleted': purge_expired_snapshots()}
+
+
+JOB_HANDLERS = {
+    'ingest': _ingest,
+    'refresh_summary': _refresh_summary,
+    'load_rankings': _load_rankings,
+    'prewarm_database': _prewarm_database,
+    'batch_match': _batch_match,
+    'purge_snapshots': _purge_snapshots
+}
+
+
+def ensure_jobs_table():
+    Job.__table__.create(db.engine, checkfirst=True)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def enqueue(kind, payload=None, priority=0, max_attempts=None, delay_seconds=0, commit=True):
+    """Add a job, returns it; JobError when an argument is invalid
+
+    Pass commit=False to queue it in a transaction the caller commits with its
+    own writes, so the job exists exactly when they do.
+    """
+    if kind not in JOB_HANDLERS:
+        raise JobError(f"Unknown job kind '{kind}'")
+    if payload is not None and not isinstance(payload, dict):
+        raise JobError('payload must be an object')
+    if not _is_int(priority):
+        raise JobError('priority must be an integer')
+    if max_attempts is not None and (not _is_int(max_attempts) or max_attempts < 1):
+        raise JobError('max_attempts must be a positive integer')
+    if not isinstance(delay_seconds, (int, float)) or isinstance(delay_seconds, bool) or not 0 <= delay_seconds < float('inf'):
+        raise JobError('delay_seconds must be a non-negative number')
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 3)
+    )
+    if delay_seconds:
+        job.run_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=delay_seconds)
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+    return job
+
+
+class JobHeartbeat(threading.Thread):
+    """Background thread that refreshes a running job's locked_at"""
+
+    def __init__(self, engine, job_id, worker_id, interval):
+        super().__init__(name=f'job-heartbeat-{job_id}', daemon=True)
+        self.engine = engine
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                # A connection of its own: the handler's transaction may be open for minutes
+                with self.engine.begin() as connection:
+                    held = connection.execute(HEARTBEAT_QUERY, {'job_id': self.job_id, 'worker': self.worker_id}).rowcount
+                if not held:
+                    logger.warning("Job %s is no longer locked by %s", self.job_id, self.worker_id)
+                    return
+            except Exception as e:
+                logger.warning("Heartbeat for job %s failed: %s", self.job_id, e)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def claim_job(worker_id):
+    """Claim the next runnable job for this worker, returns its id or None"""
+    job_id = db.session.execute(CLAIM_QUERY, {
+        'worker': worker_id,
+        'lock_timeout': current_app.config.get('JOB_LOCK_TIMEOUT_SECONDS', 600.0)
+    }).scalar()
+    db.session.commit()
+    return job_id
+
+
+def retry_delay(attempts):
+    """Seconds before attempt number attempts + 1: exponential with 10% jitter, capped"""
+    base = current_app.config.get('JOB_RETRY_BASE_SECONDS', 5.0)
+    cap = current_app.config.get('JOB_RETRY_MAX_SECONDS', 300.0)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.9, 1.1)
+
+
+def run_job(job_id):
+    """Run a claimed job and record its outcome, returns the job's new status"""
+    job = db.session.get(Job, job_id)
+    handler = JOB_HANDLERS.get(job.kind)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    try:
+        if handler is None:
+            raise JobError(f"Unknown job kind '{job.kind}'")
+        if job.attempts > job.max_attempts:
+            # Reclaimed after its worker died on the last attempt
+            raise JobError('Worker lost on the last attempt')
+        # Beat well inside the lock timeout so one slow beat does not lose the job
+        heartbeat = JobHeartbeat(db.engine, job.id, job.locked_by,
+                                 current_app.config.get('JOB_LOCK_TIMEOUT_SECONDS', 600.0) / 3)
+        heartbeat.start()
+        try:
+            result = handler(job.payload or {})
+        finally:
+            heartbeat.stop()
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = f'{type(e).__name__}: {e}'
+        job.locked_by = None
+        job.locked_at = None
+        if isinstance(e, JobError) or job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.datetime.now(datetime.timezone.utc)
+            logger.error("Job %s (%s) failed: %s", job.id, job.kind, job.last_error)
+        else:
+            job.status = 'queued'
+            job.run_at = now + datetime.timedelta(seconds=retry_delay(job.attempts))
+            logger.warning("Job %s (%s) attempt %d failed, retrying at %s: %s",
+                           job.id, job.kind, job.attempts, job.run_at.isoformat(), job.last_error)
+        db.session.commit()
+        return job.status
+
+    job = db.session.get(Job, job_id)
+    job.status = 'succeeded'
+    job.result = result
+    job.last_error = None
+    job.locked_by = None
+    job.locked_at = None
+    job.finished_at = datetime.datetime.now(datetime.timezone.utc)
+    db.session.commit()
+    logger.info("Job %s (%s) succeeded", job.id, job.kind)
+    return job.status
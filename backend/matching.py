@@ -0,0 +1,1357 @@
+import re
+
+from flask import current_app
+
+from backend.catalog import get_catalog
+from backend.connections import prepared_text
+from backend.models import db
+from backend.popularity import get_popularity
+from backend.profiling import current_timer
+from backend.schema import normalize_city
+
+# Define subject group restrictions based on official NED prospectus criteria
+SUBJECT_RESTRICTIONS = {
+    'Pre-Engineering': [
+        # Pre-Engineering: Eligible for ALL programs (most versatile group)
+        # According to prospectus: Eligible for all disciplines available within their academic group
+        'architecture', 'artificial-intelligence', 'biomedical-engineering',
+        'chemical-engineering', 'chemistry', 'civil-engineering', 
+        'computational-finance', 'computer-science', 'computer-systems',
+        'cyber-security', 'data-science', 'development-studies', 'economics',
+        'electrical-engineering', 'electronic-engineering', 'engineering',
+        'english-linguistics', 'finance', 'food-engineering', 'gaming-animation',
+        'ics', 'industrial-manufacturing', 'management-sciences', 
+        'materials-engineering', 'mechanical-engineering', 'metallurgical-engineering',
+        'petrochemical-engineering', 'petroleum-engineering', 'physics',
+        'polymer-engineering', 'software-engineering', 'telecommunications',
+        'textile-sciences'
+    ],
+    'ICS (Computer Science)': [
+        # ICS: Eligible for BS programs + Computer Science + Architecture (NO Engineering)
+        # According to prospectus: NOT eligible for Engineering programs
+        'architecture', 'artificial-intelligence', 'computer-science', 'computer-systems',
+        'cyber-security', 'data-science', 'chemistry', 'computational-finance',
+        'development-studies', 'economics', 'english-linguistics', 'finance',
+        'gaming-animation', 'ics', 'management-sciences', 'physics',
+        'software-engineering', 'telecommunications', 'textile-sciences'
+    ],
+    'Pre-Medical': [
+        # Pre-Medical: Eligible for BS programs + Biomedical Engineering only
+        # According to prospectus: NOT eligible for other Engineering, CS, or Management Sciences
+        'biomedical-engineering', 'chemistry', 'computational-finance', 'development-studies',
+        'economics', 'english-linguistics', 'finance', 'physics'
+    ],
+    'ICom (Commerce)': [
+        # Commerce: Eligible for Management Sciences, Economics & Finance, English Linguistics, Development Studies
+        # According to prospectus: NOT eligible for Engineering, CS, Computational Finance, or Physics
+        'development-studies', 'economics', 'english-linguistics', 'finance', 'management-sciences'
+    ],
+    'IA (Arts)': [
+        # Arts: Eligible for Management Sciences, Economics & Finance, English Linguistics, Development Studies
+        # According to prospectus: NOT eligible for Engineering, CS, Computational Finance, or Physics
+        'development-studies', 'economics', 'english-linguistics', 'finance', 'management-sciences'
+    ]
+}
+
+# If no interests match the student's background, use a broader approach
+FALLBACK_INTERESTS = {
+    'Pre-Engineering': ['computer-science', 'engineering', 'Technology'],
+    'Pre-Medical': ['Medicine', 'Health Sciences'],
+    'ICS (Computer Science)': ['computer-science', 'Technology'],
+    'ICom (Commerce)': ['Business', 'Commerce'],
+    'IA (Arts)': ['Arts', 'Humanities']
+}
+
+# Tag fragments used by the group compatibility rules (matched as substrings of the tag list)
+MEDICAL_FIELDS = ['medicine', 'mbbs', 'dentistry', 'pharmacy', 'nursing', 'physiotherapy', 'medical technology', 'biotechnology', 'biochemistry', 'microbiology', 'public health', 'nutrition']
+ENGINEERING_FIELDS = ['engineering', 'civil', 'electrical', 'mechanical', 'chemical', 'industrial', 'textile', 'petroleum', 'architecture']
+COMMERCE_FIELDS = ['business', 'commerce', 'economics', 'finance', 'accounting', 'marketing', 'management', 'banking', 'insurance', 'taxation']
+CORE_COMMERCE_FIELDS = ['business', 'commerce', 'economics', 'finance', 'accounting', 'marketing', 'management']
+ARTS_FIELDS = ['arts', 'humanities', 'literature', 'history', 'philosophy', 'psychology', 'sociology', 'political science', 'international relations', 'media studies', 'journalism', 'education']
+COMPUTING_FIELDS = ['computer', 'software', 'information technology', 'web development', 'game development', 'mobile development']
+
+# Subject group check: the program lists the student's group, the group is
+# compatible with the program's field, or it is not suitable (a penalty)
+GROUP_MATCH_POINTS = 35  # Higher weight for subject compatibility
+GROUP_COMPATIBLE_POINTS = 25
+GROUP_INCOMPATIBLE_POINTS = -20
+
+# Clear compatibility rules based on user requirements: for each group, None when
+# every program is open to it, otherwise (tag fragments of which at least one is
+# required, tag fragments none of which may appear)
+COMPATIBILITY_RULES = {
+    # Biology students can do ANY field (broadest background)
+    'Pre-Medical': None,
+    # Pre-Engineering students can do everything EXCEPT medical/bio programs
+    'Pre-Engineering': ([], MEDICAL_FIELDS),
+    # CS students CANNOT do bio OR engineering programs
+    'ICS (Computer Science)': ([], MEDICAL_FIELDS + ENGINEERING_FIELDS),
+    # Commerce students can only do business, arts, and some CS
+    'ICom (Commerce)': (COMMERCE_FIELDS + ARTS_FIELDS + COMPUTING_FIELDS, []),
+    # Arts students can only do business and arts
+    'IA (Arts)': (ARTS_FIELDS + CORE_COMMERCE_FIELDS, [])
+}
+
+# Interest categories with their core and exclusion tags
+INTEREST_CATEGORIES = {
+    'medicine': {
+        'core_tags': ['mbbs', 'doctor'],
+        'general_tags': ['medicine', 'medical'],
+        'exclusion_tags': ['nursing', 'pharmacy', 'allied-health'],
+        'boost_tags': ['mbbs', 'doctor']
+    },
+    'nursing': {
+        'core_tags': ['nursing'],
+        'general_tags': [],
+        'exclusion_tags': [],
+        'boost_tags': ['nursing']
+    },
+    'pharmacy': {
+        'core_tags': ['pharmacy'],
+        'general_tags': [],
+        'exclusion_tags': [],
+        'boost_tags': ['pharmacy']
+    },
+    'dentistry': {
+        'core_tags': ['dentistry', 'dental'],
+        'general_tags': [],
+        'exclusion_tags': [],
+        'boost_tags': ['dentistry', 'dental']
+    },
+    'engineering': {
+        'core_tags': ['civil', 'electrical', 'mechanical', 'chemical', 'aerospace', 'industrial', 'computer engineering', 'civil-engineering', 'electrical-engineering', 'mechanical-engineering', 'chemical-engineering', 'engineering'],
+        'general_tags': ['engineering', 'computer'],
+        'exclusion_tags': ['technology', 'information technology', 'it'],
+        'boost_tags': ['civil', 'electrical', 'mechanical', 'chemical', 'computer engineering', 'civil-engineering', 'electrical-engineering', 'mechanical-engineering', 'chemical-engineering', 'engineering']
+    },
+    'computer science': {
+        'core_tags': ['computer science', 'computer-science', 'software engineering', 'software-engineering', 'programming', 'software'],
+        'general_tags': ['software', 'programming', 'computer-science'],
+        'exclusion_tags': ['information technology', 'information-technology', 'it', 'information systems'],
+        'boost_tags': ['computer science', 'computer-science', 'software engineering', 'software-engineering']
+    },
+    'business': {
+        'core_tags': ['business administration', 'finance', 'accounting', 'marketing', 'economics'],
+        'general_tags': ['business'],
+        'exclusion_tags': ['management', 'administration'],
+        'boost_tags': ['business administration', 'finance', 'accounting']
+    },
+    'commerce': {
+        'core_tags': ['commerce', 'business administration'],
+        'general_tags': ['business', 'economics', 'finance', 'accounting'],
+        'exclusion_tags': [],
+        'boost_tags': ['commerce', 'business administration']
+    },
+    'economics': {
+        'core_tags': ['economics'],
+        'general_tags': ['economy'],
+        'exclusion_tags': [],
+        'boost_tags': ['economics']
+    },
+    'finance': {
+        'core_tags': ['finance', 'financial'],
+        'general_tags': ['banking'],
+        'exclusion_tags': [],
+        'boost_tags': ['finance', 'financial']
+    },
+    'accounting': {
+        'core_tags': ['accounting', 'accountancy'],
+        'general_tags': [],
+        'exclusion_tags': [],
+        'boost_tags': ['accounting', 'accountancy']
+    },
+    'marketing': {
+        'core_tags': ['marketing', 'advertising'],
+        'general_tags': ['branding'],
+        'exclusion_tags': [],
+        'boost_tags': ['marketing', 'advertising']
+    },
+    'arts': {
+        'core_tags': ['fine arts', 'visual arts', 'performing arts', 'design', 'creative'],
+        'general_tags': ['arts'],
+        'exclusion_tags': ['humanities', 'liberal arts'],
+        'boost_tags': ['fine arts', 'visual arts', 'performing arts']
+    },
+    'humanities': {
+        'core_tags': ['humanities', 'liberal arts'],
+        'general_tags': ['philosophy', 'history', 'literature'],
+        'exclusion_tags': [],
+        'boost_tags': ['humanities', 'liberal arts']
+    },
+    'literature': {
+        'core_tags': ['literature', 'english'],
+        'general_tags': ['linguistics'],
+        'exclusion_tags': [],
+        'boost_tags': ['literature', 'english']
+    },
+    'history': {
+        'core_tags': ['history'],
+        'general_tags': ['historical'],
+        'exclusion_tags': [],
+        'boost_tags': ['history']
+    },
+    'philosophy': {
+        'core_tags': ['philosophy'],
+        'general_tags': ['philosophical'],
+        'exclusion_tags': [],
+        'boost_tags': ['philosophy']
+    },
+    'psychology': {
+        'core_tags': ['psychology'],
+        'general_tags': ['psychological', 'mental health'],
+        'exclusion_tags': [],
+        'boost_tags': ['psychology']
+    },
+    'sociology': {
+        'core_tags': ['sociology'],
+        'general_tags': ['social', 'social sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['sociology']
+    },
+    'political science': {
+        'core_tags': ['political science', 'politics'],
+        'general_tags': ['international relations'],
+        'exclusion_tags': [],
+        'boost_tags': ['political science', 'politics']
+    },
+    'international relations': {
+        'core_tags': ['international relations'],
+        'general_tags': ['diplomacy', 'foreign policy'],
+        'exclusion_tags': [],
+        'boost_tags': ['international relations']
+    },
+    'media studies': {
+        'core_tags': ['media studies', 'media'],
+        'general_tags': ['communication', 'journalism'],
+        'exclusion_tags': [],
+        'boost_tags': ['media studies', 'media']
+    },
+    'journalism': {
+        'core_tags': ['journalism'],
+        'general_tags': ['media', 'communication'],
+        'exclusion_tags': [],
+        'boost_tags': ['journalism']
+    },
+    'education': {
+        'core_tags': ['education', 'teaching'],
+        'general_tags': ['pedagogy'],
+        'exclusion_tags': [],
+        'boost_tags': ['education', 'teaching']
+    },
+    'law': {
+        'core_tags': ['law', 'legal', 'jurisprudence'],
+        'general_tags': ['law'],
+        'exclusion_tags': ['legal studies', 'criminal justice'],
+        'boost_tags': ['law', 'legal']
+    },
+    'information technology': {
+        'core_tags': ['information technology', 'it'],
+        'general_tags': ['information systems'],
+        'exclusion_tags': [],
+        'boost_tags': ['information technology', 'it']
+    },
+    'data science': {
+        'core_tags': ['data science', 'data analytics', 'data-science'],
+        'general_tags': ['machine learning'],
+        'exclusion_tags': [],
+        'boost_tags': ['data science', 'data analytics', 'data-science']
+    },
+    'web development': {
+        'core_tags': ['web development', 'web'],
+        'general_tags': ['frontend', 'backend'],
+        'exclusion_tags': [],
+        'boost_tags': ['web development', 'web']
+    },
+    'game development': {
+        'core_tags': ['game development', 'gaming'],
+        'general_tags': ['game design'],
+        'exclusion_tags': [],
+        'boost_tags': ['game development', 'gaming']
+    },
+    'mobile development': {
+        'core_tags': ['mobile development', 'mobile'],
+        'general_tags': ['app development'],
+        'exclusion_tags': [],
+        'boost_tags': ['mobile development', 'mobile']
+    },
+    'banking': {
+        'core_tags': ['banking'],
+        'general_tags': ['finance', 'financial'],
+        'exclusion_tags': [],
+        'boost_tags': ['banking', 'finance']
+    },
+    'insurance': {
+        'core_tags': ['insurance'],
+        'general_tags': ['risk management'],
+        'exclusion_tags': [],
+        'boost_tags': ['insurance']
+    },
+    'taxation': {
+        'core_tags': ['taxation', 'tax'],
+        'general_tags': ['tax law'],
+        'exclusion_tags': [],
+        'boost_tags': ['taxation', 'tax']
+    },
+    'architecture': {
+        'core_tags': ['architecture'],
+        'general_tags': ['design', 'urban planning'],
+        'exclusion_tags': [],
+        'boost_tags': ['architecture']
+    },
+    'computational finance': {
+        'core_tags': ['computational-finance'],
+        'general_tags': ['finance', 'computational'],
+        'exclusion_tags': [],
+        'boost_tags': ['computational-finance']
+    },
+    'cyber security': {
+        'core_tags': ['cyber-security'],
+        'general_tags': ['security', 'cybersecurity'],
+        'exclusion_tags': [],
+        'boost_tags': ['cyber-security']
+    },
+    'ics': {
+        'core_tags': ['ics'],
+        'general_tags': ['computer', 'information'],
+        'exclusion_tags': [],
+        'boost_tags': ['ics']
+    },
+    'software engineering': {
+        'core_tags': ['software-engineering'],
+        'general_tags': ['software', 'programming'],
+        'exclusion_tags': [],
+        'boost_tags': ['software-engineering']
+    },
+    'civil engineering': {
+        'core_tags': ['civil-engineering'],
+        'general_tags': ['civil', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['civil-engineering']
+    },
+    'electrical engineering': {
+        'core_tags': ['electrical-engineering'],
+        'general_tags': ['electrical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['electrical-engineering']
+    },
+    'mechanical engineering': {
+        'core_tags': ['mechanical-engineering'],
+        'general_tags': ['mechanical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['mechanical-engineering']
+    },
+    'chemical engineering': {
+        'core_tags': ['chemical-engineering'],
+        'general_tags': ['chemical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['chemical-engineering']
+    },
+    # Updated tags based on user requirements
+    'architecture': {
+        'core_tags': ['architecture'],
+        'general_tags': ['design', 'urban planning'],
+        'exclusion_tags': [],
+        'boost_tags': ['architecture']
+    },
+    'artificial-intelligence': {
+        'core_tags': ['artificial-intelligence'],
+        'general_tags': ['ai', 'machine learning'],
+        'exclusion_tags': [],
+        'boost_tags': ['artificial-intelligence']
+    },
+    'biomedical-engineering': {
+        'core_tags': ['biomedical-engineering'],
+        'general_tags': ['biomedical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['biomedical-engineering']
+    },
+    'chemical-engineering': {
+        'core_tags': ['chemical-engineering'],
+        'general_tags': ['chemical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['chemical-engineering']
+    },
+    'chemistry': {
+        'core_tags': ['chemistry'],
+        'general_tags': ['chemical', 'science'],
+        'exclusion_tags': [],
+        'boost_tags': ['chemistry']
+    },
+    'civil-engineering': {
+        'core_tags': ['civil-engineering'],
+        'general_tags': ['civil', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['civil-engineering']
+    },
+    'computational-finance': {
+        'core_tags': ['computational-finance'],
+        'general_tags': ['finance', 'computational'],
+        'exclusion_tags': [],
+        'boost_tags': ['computational-finance']
+    },
+    'computer-science': {
+        'core_tags': ['computer-science'],
+        'general_tags': ['programming', 'computing'],
+        'exclusion_tags': [],
+        'boost_tags': ['computer-science']
+    },
+    'computer-systems': {
+        'core_tags': ['computer-systems'],
+        'general_tags': ['systems', 'computing'],
+        'exclusion_tags': [],
+        'boost_tags': ['computer-systems']
+    },
+    'cyber-security': {
+        'core_tags': ['cyber-security'],
+        'general_tags': ['security', 'computing'],
+        'exclusion_tags': [],
+        'boost_tags': ['cyber-security']
+    },
+    'data-science': {
+        'core_tags': ['data-science'],
+        'general_tags': ['data', 'analytics'],
+        'exclusion_tags': [],
+        'boost_tags': ['data-science']
+    },
+    'development-studies': {
+        'core_tags': ['development-studies'],
+        'general_tags': ['development', 'social sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['development-studies']
+    },
+    'economics': {
+        'core_tags': ['economics'],
+        'general_tags': ['economy', 'social sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['economics']
+    },
+    'electrical-engineering': {
+        'core_tags': ['electrical-engineering'],
+        'general_tags': ['electrical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['electrical-engineering']
+
+    },
+    'electronic-engineering': {
+        'core_tags': ['electronic-engineering'],
+        'general_tags': ['electronic', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['electronic-engineering']
+    },
+    'engineering': {
+        'core_tags': ['engineering'],
+        'general_tags': ['engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['engineering']
+    },
+    'english-linguistics': {
+        'core_tags': ['english-linguistics'],
+        'general_tags': ['english', 'linguistics'],
+        'exclusion_tags': [],
+        'boost_tags': ['english-linguistics']
+    },
+    'finance': {
+        'core_tags': ['finance'],
+        'general_tags': ['financial', 'business'],
+        'exclusion_tags': [],
+        'boost_tags': ['finance']
+    },
+    'food-engineering': {
+        'core_tags': ['food-engineering'],
+        'general_tags': ['food', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['food-engineering']
+    },
+    'gaming-animation': {
+        'core_tags': ['gaming-animation'],
+        'general_tags': ['gaming', 'animation'],
+        'exclusion_tags': [],
+        'boost_tags': ['gaming-animation']
+    },
+    'industrial-manufacturing': {
+        'core_tags': ['industrial-manufacturing'],
+        'general_tags': ['industrial', 'manufacturing'],
+        'exclusion_tags': [],
+        'boost_tags': ['industrial-manufacturing']
+    },
+    'management-sciences': {
+        'core_tags': ['management-sciences'],
+        'general_tags': ['management', 'business'],
+        'exclusion_tags': [],
+        'boost_tags': ['management-sciences']
+    },
+    'materials-engineering': {
+        'core_tags': ['materials-engineering'],
+        'general_tags': ['materials', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['materials-engineering']
+    },
+    'mechanical-engineering': {
+        'core_tags': ['mechanical-engineering'],
+        'general_tags': ['mechanical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['mechanical-engineering']
+    },
+    'metallurgical-engineering': {
+        'core_tags': ['metallurgical-engineering'],
+        'general_tags': ['metallurgical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['metallurgical-engineering']
+    },
+    'petrochemical-engineering': {
+        'core_tags': ['petrochemical-engineering'],
+        'general_tags': ['petrochemical', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['petrochemical-engineering']
+    },
+    'petroleum-engineering': {
+        'core_tags': ['petroleum-engineering'],
+        'general_tags': ['petroleum', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['petroleum-engineering']
+    },
+    'physics': {
+        'core_tags': ['physics'],
+        'general_tags': ['physical sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['physics']
+    },
+    'polymer-engineering': {
+        'core_tags': ['polymer-engineering'],
+        'general_tags': ['polymer', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['polymer-engineering']
+    },
+    'software-engineering': {
+        'core_tags': ['software-engineering'],
+        'general_tags': ['software', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['software-engineering']
+    },
+    'telecommunications': {
+        'core_tags': ['telecommunications'],
+        'general_tags': ['telecom', 'communication'],
+        'exclusion_tags': [],
+        'boost_tags': ['telecommunications']
+    },
+    'textile-sciences': {
+        'core_tags': ['textile-sciences'],
+        'general_tags': ['textile', 'sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['textile-sciences']
+    },
+    'aerospace-engineering': {
+        'core_tags': ['aerospace-engineering'],
+        'general_tags': ['aerospace', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['aerospace-engineering']
+    },
+    'metallurgy': {
+        'core_tags': ['metallurgy'],
+        'general_tags': ['metals', 'materials'],
+        'exclusion_tags': [],
+        'boost_tags': ['metallurgy']
+    },
+    'environmental-engineering': {
+        'core_tags': ['environmental-engineering'],
+        'general_tags': ['environmental', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['environmental-engineering']
+    },
+    'geoinformatics': {
+        'core_tags': ['geoinformatics'],
+        'general_tags': ['geo', 'informatics'],
+        'exclusion_tags': [],
+        'boost_tags': ['geoinformatics']
+    },
+    'computer-engineering': {
+        'core_tags': ['computer-engineering'],
+        'general_tags': ['computer', 'engineering'],
+        'exclusion_tags': [],
+        'boost_tags': ['computer-engineering']
+    },
+    'mechatronics': {
+        'core_tags': ['mechatronics'],
+        'general_tags': ['mechanical', 'electronics'],
+        'exclusion_tags': [],
+        'boost_tags': ['mechatronics']
+    },
+    'information-security': {
+        'core_tags': ['information-security'],
+        'general_tags': ['security', 'information'],
+        'exclusion_tags': [],
+        'boost_tags': ['information-security']
+    },
+    'avionics': {
+        'core_tags': ['avionics'],
+        'general_tags': ['aviation', 'electronics'],
+        'exclusion_tags': [],
+        'boost_tags': ['avionics']
+    },
+    'naval-architecture': {
+        'core_tags': ['naval-architecture'],
+        'general_tags': ['naval', 'architecture'],
+        'exclusion_tags': [],
+        'boost_tags': ['naval-architecture']
+    },
+    'bioinformatics': {
+        'core_tags': ['bioinformatics'],
+        'general_tags': ['bio', 'informatics'],
+        'exclusion_tags': [],
+        'boost_tags': ['bioinformatics']
+    },
+    'business': {
+        'core_tags': ['business'],
+        'general_tags': ['management', 'commerce'],
+        'exclusion_tags': [],
+        'boost_tags': ['business']
+    },
+    'bba': {
+        'core_tags': ['bba'],
+        'general_tags': ['business', 'administration'],
+        'exclusion_tags': [],
+        'boost_tags': ['bba']
+    },
+    'accounting': {
+        'core_tags': ['accounting'],
+        'general_tags': ['finance', 'business'],
+        'exclusion_tags': [],
+        'boost_tags': ['accounting']
+    },
+    'tourism': {
+        'core_tags': ['tourism'],
+        'general_tags': ['hospitality', 'travel'],
+        'exclusion_tags': [],
+        'boost_tags': ['tourism']
+    },
+    'hospitality-management': {
+        'core_tags': ['hospitality-management'],
+        'general_tags': ['hospitality', 'management'],
+        'exclusion_tags': [],
+        'boost_tags': ['hospitality-management']
+    },
+    'social-sciences': {
+        'core_tags': ['social-sciences'],
+        'general_tags': ['social', 'sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['social-sciences']
+    },
+    'mass-communication': {
+        'core_tags': ['mass-communication'],
+        'general_tags': ['media', 'communication'],
+        'exclusion_tags': [],
+        'boost_tags': ['mass-communication']
+    },
+    'public-administration': {
+        'core_tags': ['public-administration'],
+        'general_tags': ['public', 'administration'],
+        'exclusion_tags': [],
+        'boost_tags': ['public-administration']
+    },
+    'psychology': {
+        'core_tags': ['psychology'],
+        'general_tags': ['behavioral', 'mental'],
+        'exclusion_tags': [],
+        'boost_tags': ['psychology']
+    },
+    'humanities': {
+        'core_tags': ['humanities'],
+        'general_tags': ['arts', 'culture'],
+        'exclusion_tags': [],
+        'boost_tags': ['humanities']
+    },
+    'english-literature': {
+        'core_tags': ['english-literature'],
+        'general_tags': ['english', 'literature'],
+        'exclusion_tags': [],
+        'boost_tags': ['english-literature']
+    },
+    'industrial-design': {
+        'core_tags': ['industrial-design'],
+        'general_tags': ['industrial', 'design'],
+        'exclusion_tags': [],
+        'boost_tags': ['industrial-design']
+    },
+    'natural-sciences': {
+        'core_tags': ['natural-sciences'],
+        'general_tags': ['natural', 'sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['natural-sciences']
+    },
+    'mathematics': {
+        'core_tags': ['mathematics'],
+        'general_tags': ['math', 'computation'],
+        'exclusion_tags': [],
+        'boost_tags': ['mathematics']
+    },
+    'environmental-science': {
+        'core_tags': ['environmental-science'],
+        'general_tags': ['environmental', 'science'],
+        'exclusion_tags': [],
+        'boost_tags': ['environmental-science']
+    },
+    'biotechnology': {
+        'core_tags': ['biotechnology'],
+        'general_tags': ['bio', 'technology'],
+        'exclusion_tags': [],
+        'boost_tags': ['biotechnology']
+    },
+    'food-science': {
+        'core_tags': ['food-science'],
+        'general_tags': ['food', 'science'],
+        'exclusion_tags': [],
+        'boost_tags': ['food-science']
+    },
+    'agriculture': {
+        'core_tags': ['agriculture'],
+        'general_tags': ['farming', 'crops'],
+        'exclusion_tags': [],
+        'boost_tags': ['agriculture']
+    },
+    'law': {
+        'core_tags': ['law'],
+        'general_tags': ['legal', 'justice'],
+        'exclusion_tags': [],
+        'boost_tags': ['law']
+    },
+    'llb': {
+        'core_tags': ['llb'],
+        'general_tags': ['law', 'legal'],
+        'exclusion_tags': [],
+        'boost_tags': ['llb']
+    },
+    'medicine': {
+        'core_tags': ['medicine'],
+        'general_tags': ['medical', 'healthcare'],
+        'exclusion_tags': [],
+        'boost_tags': ['medicine']
+    },
+    'mbbs': {
+        'core_tags': ['mbbs'],
+        'general_tags': ['medicine', 'medical'],
+        'exclusion_tags': [],
+        'boost_tags': ['mbbs']
+    },
+    'health-sciences': {
+        'core_tags': ['health-sciences'],
+        'general_tags': ['health', 'sciences'],
+        'exclusion_tags': [],
+        'boost_tags': ['health-sciences']
+    },
+    'nutrition': {
+        'core_tags': ['nutrition'],
+        'general_tags': ['diet', 'health'],
+        'exclusion_tags': [],
+        'boost_tags': ['nutrition']
+    },
+    'dietetics': {
+        'core_tags': ['dietetics'],
+        'general_tags': ['diet', 'nutrition'],
+        'exclusion_tags': [],
+        'boost_tags': ['dietetics']
+    }
+}
+
+# Build the complex query for program matching
+MATCH_QUERY = prepared_text('match_offerings', """
+    SELECT DISTINCT 
+        po.id as offering_id,
+        p.id as program_id, p.name as program_name, p.discipline, p.code,
+        u.id as university_id, u.name as university_name, u.sector,
+        c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
+        COUNT(po.id) OVER (PARTITION BY p.id) as offering_count,
+        STRING_AGG(DISTINCT t.name, ', ') as tags,
+        STRING_AGG(DISTINCT pog.subject_group, ', ') as required_groups,
+        STRING_AGG(DISTINCT pob.board, ', ') as accepted_boards
+    FROM program_offerings po
+    JOIN programs p ON po.program_id = p.id
+    JOIN campuses c ON po.campus_id = c.id
+    JOIN universities u ON c.university_id = u.id
+    LEFT JOIN program_offering_tags pot ON po.id = pot.offering_id
+    LEFT JOIN tags t ON pot.tag_id = t.id
+    LEFT JOIN program_offering_groups pog ON po.id = pog.offering_id
+    LEFT JOIN program_offering_boards pob ON po.id = pob.offering_id
+    WHERE po.min_score_pct <= :max_score
+    AND po.annual_fee <= :max_fee
+    GROUP BY po.id, p.id, p.name, p.discipline, p.code, u.id, u.name, u.sector, c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available
+    ORDER BY po.min_score_pct ASC, po.annual_fee ASC, po.id ASC
+""")
+
+
+# Eligibility-first variant of MATCH_QUERY over offering_summary. A row scores
+# 30 (academic) + 20 (budget) once the score and fee filters pass, so it reaches
+# the 50 threshold exactly when the group check does not cost 20 points or an
+# interest matches; everything else is filtered out here instead of in Python.
+# offering_count still counts every offering within score and fee, as before.
+ELIGIBLE_MATCH_SQL = """
+    SELECT
+        os.offering_id,
+        os.program_id, os.program_name, os.discipline, os.code,
+        os.university_id, os.university_name, os.sector,
+        os.city, os.min_score_pct, os.min_score_type, os.annual_fee, os.hostel_available,
+        counts.offering_count,
+        os.tags, os.required_groups, os.accepted_boards{group_columns}
+    FROM offering_summary os
+    {group_join}
+    JOIN (
+        SELECT program_id, COUNT(*) as offering_count
+        FROM offering_summary
+        WHERE min_score_pct <= :max_score
+        AND annual_fee <= :max_fee
+        GROUP BY program_id
+    ) counts ON counts.program_id = os.program_id
+    WHERE os.min_score_pct <= :max_score
+    AND os.annual_fee <= :max_fee
+    {eligibility}
+    {location}
+    ORDER BY os.min_score_pct ASC, os.annual_fee ASC, os.offering_id ASC
+"""
+
+GROUP_ELIGIBILITY_SQL = """
+    AND (
+        cardinality(os.group_list) = 0
+        OR os.group_list && ARRAY(SELECT DISTINCT subject_group FROM program_offering_groups WHERE strpos(subject_group, :hsc_group) > 0)
+        OR {compatible}
+        OR os.tag_keys && string_to_array(:interest_keys, ',')
+    )
+"""
+
+# For the five known groups the check is a lookup in offering_group_eligibility.
+# A missing row (table not refreshed yet) is kept and scored in Python.
+PRECOMPUTED_GROUP_JOIN = """
+    LEFT JOIN offering_group_eligibility oge
+        ON oge.offering_id = os.offering_id AND oge.subject_group = :hsc_group
+"""
+
+PRECOMPUTED_GROUP_COLUMNS = """,
+        oge.score_delta as group_score_delta, oge.compatible as group_compatible"""
+
+PRECOMPUTED_ELIGIBILITY_SQL = """
+    AND (
+        COALESCE(oge.score_delta, 0) >= 0
+        OR os.tag_keys && string_to_array(:interest_keys, ',')
+    )
+"""
+
+_eligible_queries = {}
+
+
+def _sql_fragments(fields):
+    return 'ARRAY[' + ', '.join("'%" + field.replace("'", "''") + "%'" for field in fields) + ']'
+
+
+def _compatibility_sql(hsc_group):
+    """SQL form of is_group_compatible for one group"""
+    if hsc_group not in COMPATIBILITY_RULES:
+        return 'FALSE'
+    rule = COMPATIBILITY_RULES[hsc_group]
+    if rule is None:
+        return 'TRUE'
+    required, excluded = rule
+    tags = "lower(COALESCE(os.tags, ''))"
+    conditions = []
+    if required:
+        conditions.append(f'{tags} LIKE ANY({_sql_fragments(required)})')
+    if excluded:
+        conditions.append(f'NOT ({tags} LIKE ANY({_sql_fragments(excluded)}))')
+    return '(' + ' AND '.join(conditions) + ')'
+
+
+def eligible_match_query(profile):
+    """Eligibility-first statement and parameters for a profile"""
+    hsc_group = profile['hsc_group']
+    # Without a group (or one that could match across the joined group list) no row
+    # can lose points on the group check, so there is nothing to filter on
+    filter_groups = bool(hsc_group) and ', ' not in hsc_group and COMPATIBILITY_RULES.get(hsc_group, False) is not None
+    strict_location = profile['strict_location'] and bool(profile['city_key'])
+    group_key = hsc_group if hsc_group in COMPATIBILITY_RULES else None
+
+    precomputed = hsc_group in SUBJECT_RESTRICTIONS
+
+    key = (group_key, filter_groups, strict_location)
+    if key not in _eligible_queries:
+        name = re.sub(r'\W+', '_', (group_key or 'other').lower()).strip('_')
+        if not filter_groups:
+            eligibility = ''
+        elif precomputed:
+            eligibility = PRECOMPUTED_ELIGIBILITY_SQL
+        else:
+            eligibility = GROUP_ELIGIBILITY_SQL.format(compatible=_compatibility_sql(hsc_group))
+        _eligible_queries[key] = prepared_text(
+            f"match_eligible_{name}{'_p' if precomputed else ''}{'_g' if filter_groups else ''}{'_l' if strict_location else ''}",
+            ELIGIBLE_MATCH_SQL.format(
+                group_columns=PRECOMPUTED_GROUP_COLUMNS if precomputed else '',
+                group_join=PRECOMPUTED_GROUP_JOIN if precomputed else '',
+                eligibility=eligibility,
+                location='AND os.city_key = :city_key' if strict_location else ''
+            )
+        )
+
+    params = {'max_score': profile['student_score'], 'max_fee': profile['budget']}
+    if filter_groups or precomputed:
+        params['hsc_group'] = hsc_group
+    if filter_groups:
+        params['interest_keys'] = ','.join(interest.lower() for interest in profile['filtered_interests'])
+    if strict_location:
+        params['city_key'] = profile['city_key']
+    return _eligible_queries[key], params
+
+def catalog_candidates(catalog, profile):
+    """Rows of the in-memory catalog that can reach the match threshold, in match order
+
+    Same rows as the eligibility-first query: the range index answers the score
+    and fee bounds, then rows that lose points on the group check without an
+    interest match are dropped.
+    """
+    rows = catalog.index.query(profile['student_score'], profile['budget'])
+
+    offering_counts = {}
+    for row in rows:
+        offering_counts[row.program_id] = offering_counts.get(row.program_id, 0) + 1
+
+    hsc_group = profile['hsc_group']
+    checks = catalog.group_checks.get(hsc_group, {})
+    interest_keys = {interest.lower() for interest in profile['filtered_interests']}
+    city_key = profile['city_key'] if profile['strict_location'] else None
+
+    candidates = []
+    for row in rows:
+        if city_key and row.city_key != city_key:
+            continue
+        check = checks.get(row.offering_id)
+        if check is None:
+            check = group_contribution(hsc_group, row.required_groups, row.tags)
+        if check[0] < 0 and not (row.tag_keys & interest_keys):
+            continue
+        candidates.append(row._replace(
+            offering_count=offering_counts[row.program_id],
+            group_score_delta=check[0],
+            group_compatible=check[1]
+        ))
+    return candidates
+
+
+def parse_student_profile(data):
+    """Extract the student profile used for matching from a request payload"""
+    ssc_percentage = float(data.get('sscPercentage', 0))
+    hsc_percentage = float(data.get('hscPercentage', 0))
+    hsc_group = data.get('hscGroup', '')
+    interests = data.get('interests', [])
+
+    # Get allowed interests based on HSC group
+    allowed_interests = SUBJECT_RESTRICTIONS.get(hsc_group, [])
+
+    # Filter interests to only include allowed ones
+    filtered_interests = [interest for interest in interests if interest in allowed_interests]
+
+    # If no interests match the student's background, use a broader approach
+    if not filtered_interests and hsc_group in SUBJECT_RESTRICTIONS:
+        filtered_interests = list(FALLBACK_INTERESTS[hsc_group])
+
+    return {
+        'ssc_percentage': ssc_percentage,
+        'hsc_percentage': hsc_percentage,
+        'student_score': max(ssc_percentage, hsc_percentage),
+        'hsc_group': hsc_group,
+        'interests': interests,
+        'budget': int(data.get('budget', 0)),
+        'preferred_location': data.get('preferredLocation', ''),
+        'allowed_interests': allowed_interests,
+        'filtered_interests': filtered_interests,
+        # Only offerings in exactly this (normalized) city when strictLocation is set
+        'strict_location': bool(data.get('strictLocation')),
+        'city_key': normalize_city(data.get('preferredLocation', '')),
+        'has_interest_priorities': 'interestPriorities' in data,
+        'interest_priorities': data.get('interestPriorities')
+    }
+
+
+def is_group_compatible(hsc_group, tags):
+    """Whether a student group not listed by the program can still take it, judged from its tags"""
+    if hsc_group not in COMPATIBILITY_RULES:
+        return False
+    rule = COMPATIBILITY_RULES[hsc_group]
+    if rule is None:
+        return True
+
+    tags = tags.lower() if tags else ''
+    required, excluded = rule
+    if required and not any(field in tags for field in required):
+        return False
+    return not any(field in tags for field in excluded)
+
+
+def group_contribution(hsc_group, required_groups, tags):
+    """Score change and compatibility of the subject group check for one offering"""
+    if not (required_groups and hsc_group):
+        return 0, False
+    if hsc_group in required_groups:
+        return GROUP_MATCH_POINTS, True
+    # Check if student's group is compatible with program
+    if is_group_compatible(hsc_group, tags):
+        return GROUP_COMPATIBLE_POINTS, True
+    return GROUP_INCOMPATIBLE_POINTS, False
+
+
+def offering_fields(row, ranking=None):
+    """Offering as returned by the match endpoints, without the match fields"""
+    return {
+        'offering_id': row.offering_id,
+        'program_id': row.program_id,
+        'program_name': row.program_name,
+        'discipline': row.discipline,
+        'program_code': row.code,
+        'university': {
+            'id': row.university_id,
+            'name': row.university_name,
+            'sector': row.sector
+        },
+        'campus': {
+            'city': row.city
+        },
+        'min_score_pct': row.min_score_pct,
+        'min_score_type': row.min_score_type,
+        'annual_fee': row.annual_fee,
+        'hostel_available': row.hostel_available,
+        'offering_count': row.offering_count,
+        'tags': row.tags.split(', ') if row.tags else [],
+        'required_groups': row.required_groups.split(', ') if row.required_groups else [],
+        'accepted_boards': row.accepted_boards.split(', ') if row.accepted_boards else [],
+        'popularity_rank': ranking[0] if ranking else None
+    }
+
+
+def reason_text(code, profile, row=None, interest_matches=None, ranking=None):
+    """Explanation shown for a reason code
+
+    row is the offering (for the score, group, budget and location codes),
+    interest_matches the matched interests and ranking (rank, family).
+    """
+    if code == 'score_met':
+        return f"✅ Academic score ({profile['student_score']}%) meets requirement ({row.min_score_pct}%)"
+    if code == 'score_below':
+        return f"❌ Academic score ({profile['student_score']}%) below requirement ({row.min_score_pct}%)"
+    if code == 'group_match':
+        return f"✅ HSC group ({profile['hsc_group']}) matches program requirement ({row.required_groups})"
+    if code == 'group_compatible':
+        return f"✅ HSC group ({profile['hsc_group']}) is compatible with program field"
+    if code == 'group_mismatch':
+        return f"❌ HSC group ({profile['hsc_group']}) may not be suitable for this program"
+    if code == 'budget_met':
+        return f"✅ Budget (PKR {profile['budget']:,}) covers annual fees (PKR {row.annual_fee:,})"
+    if code == 'budget_below':
+        return f"❌ Budget (PKR {profile['budget']:,}) below annual fees (PKR {row.annual_fee:,})"
+    if code == 'location_match':
+        return f"✅ Location preference ({profile['preferred_location']}) matches campus city ({row.city})"
+    if code == 'interest_match':
+        return f"✅ Interest match: {', '.join(interest_matches)}"
+    if code == 'no_interest_match':
+        return f"ℹ️ No direct interest match, but program may still be suitable"
+    if code == 'popular':
+        return f"⭐ Popular choice: #{ranking[0]} for {ranking[1]}"
+    raise ValueError(f"Unknown reason code '{code}'")
+
+
+def score_candidate(row, profile, timer, popularity=None):
+    """Score one candidate row on everything but interests (stage one of matching)
+
+    Returns the partial score, reason codes and explanations with the offering fields; the
+    result depends only on the profile's score, group, budget and location, so
+    it can be cached and re-ranked for any interests by rank_candidate().
+    popularity (PopularityRankings) adds the program's popularity rank.
+    """
+    student_score = profile['student_score']
+    hsc_group = profile['hsc_group']
+    budget = profile['budget']
+    preferred_location = profile['preferred_location']
+
+    # Calculate match score
+    score = 0
+    reasons = []
+
+    # Academic requirements check
+    if student_score >= row.min_score_pct:
+        score += 30
+        reasons.append('score_met')
+    else:
+        reasons.append('score_below')
+
+    # Subject group compatibility check (CRITICAL)
+    with timer.phase('compatibility_checks'):
+        # Precomputed by offering_group_eligibility when the query joined it
+        group_score = getattr(row, 'group_score_delta', None)
+        if group_score is not None:
+            is_compatible = row.group_compatible
+        else:
+            group_score, is_compatible = group_contribution(hsc_group, row.required_groups, row.tags)
+
+    score += group_score
+    if group_score == GROUP_MATCH_POINTS:
+        reasons.append('group_match')
+    elif group_score == GROUP_COMPATIBLE_POINTS:
+        reasons.append('group_compatible')
+    elif group_score == GROUP_INCOMPATIBLE_POINTS:
+        reasons.append('group_mismatch')
+
+    # Determine subject compatibility for frontend display
+    subject_compatible = False
+    if hsc_group in (row.required_groups.split(', ') if row.required_groups else []):
+        subject_compatible = True
+    elif is_compatible:
+        subject_compatible = True
+
+    # Budget check
+    if budget >= row.annual_fee:
+        score += 20
+        reasons.append('budget_met')
+    else:
+        reasons.append('budget_below')
+
+    # Location preference
+    if preferred_location and preferred_location.lower() in row.city.lower():
+        score += 10
+        reasons.append('location_match')
+
+    ranking = popularity.lookup(row.program_name, row.city, row.sector) if popularity is not None else None
+
+    return {
+        'score': score,
+        'reasons': reasons,
+        'explanations': [reason_text(code, profile, row) for code in reasons],
+        'popularity_family': ranking[1] if ranking else None,
+        'program_tags': [tag.strip().lower() for tag in row.tags.split(',')] if row.tags else None,
+        'subject_compatible': subject_compatible,
+        'offering': offering_fields(row, ranking)
+    }
+
+
+def rank_candidate(candidate, profile, popularity_points=0):
+    """Add the interest match to a scored candidate (stage two), None below the 50 threshold
+
+    Ranked programs that pass get up to popularity_points extra (the full amount
+    for rank 1), so popularity reorders matches without changing which match.
+    """
+    filtered_interests = profile['filtered_interests']
+    score = candidate['score']
+    reasons = list(candidate['reasons'])
+    explanations = list(candidate['explanations'])
+
+    # Interest matching (only with filtered interests)
+    program_tags = candidate['program_tags']
+    if program_tags and filtered_interests:
+        student_interests = [interest.lower() for interest in filtered_interests]
+
+        interest_matches = set(program_tags) & set(student_interests)
+        if interest_matches:
+            score += 25  # Increased weight for interest matching
+            reasons.append('interest_match')
+            explanations.append(reason_text('interest_match', profile, interest_matches=interest_matches))
+        else:
+            reasons.append('no_interest_match')
+            explanations.append(reason_text('no_interest_match', profile))
+
+    # Only include offerings with at least 50% match (increased threshold)
+    if score < 50:
+        return None
+
+    rank = candidate['offering']['popularity_rank']
+    if rank and popularity_points:
+        score += round(popularity_points / rank)
+        reasons.append('popular')
+        explanations.append(reason_text('popular', profile, ranking=(rank, candidate['popularity_family'])))
+
+    offering = dict(candidate['offering'])
+    offering['match_score'] = score
+    offering['match_explanation'] = explanations
+    offering['match_reasons'] = reasons
+    offering['subject_compatibility'] = candidate['subject_compatible']
+    return offering
+
+
+def interest_priority_score(offering, profile):
+    """Priority-weighted interest match with SPECIFIC matching"""
+    filtered_interests = profile['filtered_interests']
+    priority_score = 0
+
+    if offering['tags'] and filtered_interests:
+        program_tags = [tag.lower() for tag in offering['tags']]
+
+        # Check if we have priority data from the frontend
+        if profile['has_interest_priorities']:
+            # Use priority-based scoring with SPECIFIC matching
+            highest_priority_score = 0
+            for priority_item in profile['interest_priorities']:
+                interest = priority_item['interest'].lower()
+                priority = priority_item['priority']
+
+                # CATEGORIZED INTEREST MATCHING LOGIC
+                matched = False
+
+                # UNIVERSAL MATCHING LOGIC
+                if interest in INTEREST_CATEGORIES:
+                    category = INTEREST_CATEGORIES[interest]
+
+                    # Check for core tags
+                    has_core = any(tag in category['core_tags'] for tag in program_tags)
+
+                    # Check for exclusion tags
+                    has_exclusion = any(tag in category['exclusion_tags'] for tag in program_tags)
+
+                    # Check for general tags (only if no exclusions)
+                    has_general = any(tag in category['general_tags'] for tag in program_tags) if not has_exclusion else False
+
+                    # Match if core tags found OR (general tags found AND no exclusions)
+                    if has_core or has_general:
+                        matched = True
+                else:
+                    # Fallback for uncategorized interests
+                    if interest in program_tags:
+                        matched = True
+
+                if matched:
+                    # Higher priority (lower number) gets higher score
+                    # Priority 1 gets 1000 points, Priority 2 gets 900 points, etc.
+                    # Much higher weight to ensure interest matches rank first
+                    current_score = (11 - priority) * 100
+
+                    # UNIVERSAL BOOST LOGIC using categories
+                    if interest in INTEREST_CATEGORIES:
+                        boost_tags = INTEREST_CATEGORIES[interest].get('boost_tags', [])
+
+                        # Check if program has boost tags
+                        has_boost = any(tag in boost_tags for tag in program_tags)
+
+                        if has_boost:
+                            # Medicine gets extra boost, others get standard boost
+                            boost_amount = 500 if interest == 'medicine' else 400
+                            current_score += boost_amount
+
+                    if current_score > highest_priority_score:
+                        highest_priority_score = current_score
+
+            priority_score = highest_priority_score
+        else:
+            # Fallback to simple interest matching
+            student_interests = [interest.lower() for interest in filtered_interests]
+            interest_matches = set(program_tags) & set(student_interests)
+            priority_score = len(interest_matches) * 100
+
+    return priority_score
+
+
+def sort_key(offering, profile):
+    """Ranking key: interest priority first, then match score"""
+    priority_score = interest_priority_score(offering, profile)
+
+    # Ties go to the more popular program (rank 1 first), unranked programs last
+    rank = offering.get('popularity_rank')
+    popularity = 1.0 / rank if rank else 0
+
+    # CRITICAL: Priority score is the ONLY primary sorting criterion
+    # This ensures interest matches ALWAYS rank first, regardless of other factors
+    if priority_score > 0:
+        # Programs with interest matches get top priority
+        return (priority_score, 0, popularity)  # Only priority score matters
+    else:
+        # Programs without interest matches go to the bottom
+        return (0, offering['match_score'], popularity)
+
+
+def candidate_interests(hsc_group):
+    """Every interest parse_student_profile can keep for a group
+
+    Retrieval filters with all of them, so the candidate set does not depend on
+    the interests actually chosen.
+    """
+    return list(dict.fromkeys(SUBJECT_RESTRICTIONS.get(hsc_group, []) + FALLBACK_INTERESTS.get(hsc_group, [])))
+
+
+def candidate_rows(profile, stream=False):
+    """Unscored candidate rows for the profile, in retrieval order
+
+    With stream, SQL rows come from a server-side cursor as they arrive instead of
+    after the whole result has been fetched.
+    """
+    timer = current_timer()
+    retrieval_profile = dict(profile, filtered_interests=candidate_interests(profile['hsc_group']))
+
+    catalog = get_catalog() if current_app.config.get('MATCH_FROM_CATALOG', False) else None
+    if catalog is not None:
+        with timer.phase('index_lookup'):
+            result = catalog_candidates(catalog, retrieval_profile)
+    else:
+        if profile['strict_location'] or current_app.config.get('MATCH_ELIGIBILITY_SQL', True):
+            query, params = eligible_match_query(retrieval_profile)
+        else:
+            query, params = MATCH_QUERY, {
+                'max_score': profile['student_score'],
+                'max_fee': profile['budget']
+            }
+
+        # Execute query with parameters
+        with timer.phase('sql_execution'):
+            result = db.session.execute(query, params, execution_options={'stream_results': stream})
+
+    return result
+
+
+def retrieve_candidates(profile):
+    """Stage one: scored candidates for the profile's score, group, budget and location"""
+    timer = current_timer()
+    result = candidate_rows(profile)
+    popularity = get_popularity()
+    with timer.phase('row_iteration'):
+        return [score_candidate(row, profile, timer, popularity) for row in result]
+
+
+def candidate_cache_key(profile):
+    """Key of the profile's candidates in the candidate cache: everything but interests"""
+    catalog = get_catalog() if current_app.config.get('MATCH_FROM_CATALOG', False) else None
+    return (
+        catalog.version if catalog is not None else None,
+        profile['student_score'], profile['hsc_group'], profile['budget'],
+        profile['preferred_location'], profile['strict_location']
+    )
+
+
+def cached_candidates(profile):
+    """retrieve_candidates() through the worker's candidate cache"""
+    cache = current_app.extensions.get('match_candidates')
+    if cache is None:
+        return retrieve_candidates(profile)
+
+    key = candidate_cache_key(profile)
+    candidates = cache.get(key)
+    if candidates is None:
+        generation = cache.generation
+        candidates = retrieve_candidates(profile)
+        cache.put(key, candidates, generation)
+    return candidates
+
+
+def match_offerings(profile):
+    """Run the matching pipeline for a parsed student profile, best matches first
+
+    Candidates are retrieved (and cached) without looking at interests, then
+    re-ranked with the profile's interests and priorities, so reordering or
+    toggling interests only repeats the cheap second stage.
+    """
+    timer = current_timer()
+
+    with timer.phase('candidate_retrieval'):
+        candidates = cached_candidates(profile)
+
+    popularity_points = current_app.config.get('MATCH_POPULARITY_POINTS', 0)
+    matched_offerings = []
+    with timer.phase('re_ranking'):
+        for candidate in candidates:
+            offering = rank_candidate(candidate, profile, popularity_points)
+            if offering is not None:
+                matched_offerings.append(offering)
+
+    # Sort by match score (highest first), but prioritize programs with higher requirements when student is eligible
+    # AND prioritize programs that match student's interests based on priority ranking
+    with timer.phase('sort_key'):
+        matched_offerings.sort(key=lambda offering: sort_key(offering, profile), reverse=True)
+
+    return matched_offerings
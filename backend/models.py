@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import CheckConstraint, UniqueConstraint
 
-db = SQLAlchemy()
+from backend.routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class University(db.Model):
     __tablename__ = 'universities'
@@ -143,4 +145,114 @@ class ProgramOfferingTag(db.Model):
     tag_id = db.Column(db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
     
     def __repr__(self):
-        return f'<ProgramOfferingTag {self.tag.name}>' 
\ No newline at end of file
+        return f'<ProgramOfferingTag {self.tag.name}>' 
+
+# Subject group check result per HSC group and offering, precomputed at ingest
+class OfferingGroupEligibility(db.Model):
+    __tablename__ = 'offering_group_eligibility'
+    
+    offering_id = db.Column(db.Integer, db.ForeignKey('program_offerings.id', ondelete='CASCADE'), primary_key=True)
+    subject_group = db.Column(db.String(100), primary_key=True)
+    compatible = db.Column(db.Boolean, nullable=False)
+    score_delta = db.Column(db.Integer, nullable=False)
+    # Hash of the rules the row was computed with, so a rule change triggers a recompute
+    rules_version = db.Column(db.String(16), nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_offering_group_eligibility_group', 'subject_group', 'score_delta'),
+    )
+    
+    def __repr__(self):
+        return f'<OfferingGroupEligibility {self.subject_group} {self.score_delta:+d}>'
+
+# Popularity rank of a program at a city and sector (university_popularity_rankings.json)
+class ProgramPopularityRanking(db.Model):
+    __tablename__ = 'program_popularity_rankings'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    program_family = db.Column(db.String(200), nullable=False)
+    program_name = db.Column(db.String(200), nullable=False)
+    city = db.Column(db.String(100), nullable=False)
+    sector = db.Column(db.String(50), nullable=False)
+    rank = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('program_name', 'city', 'sector', name='unique_popularity_program_city_sector'),
+        CheckConstraint("rank >= 1", name='valid_popularity_rank'),
+    )
+    
+    def __repr__(self):
+        return f'<ProgramPopularityRanking #{self.rank} {self.program_name}>'
+
+# Background job (backend.jobs), claimed by worker processes with FOR UPDATE SKIP LOCKED
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime(timezone=True))
+    last_error = db.Column(db.Text)
+    result = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    finished_at = db.Column(db.DateTime(timezone=True))
+    
+    __table_args__ = (
+        CheckConstraint("status IN ('queued', 'running', 'succeeded', 'failed')", name='valid_job_status'),
+        db.Index('ix_jobs_claim', 'status', 'priority', 'run_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'priority': self.priority,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'locked_by': self.locked_by,
+            'last_error': self.last_error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+
+class MatchSnapshot(db.Model):
+    __tablename__ = 'match_snapshots'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    format_version = db.Column(db.Integer, nullable=False)
+    catalog_version = db.Column(db.String(40))
+    total_matches = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_match_snapshots_expires_at', 'expires_at'),
+    )
+    
+    def __repr__(self):
+        return f'<MatchSnapshot {self.id}>'
+
+# Version counter of each data set workers cache (backend.invalidation); every write path bumps it
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_version'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    
+    def __repr__(self):
+        return f'<CatalogVersion {self.name} {self.version}>'
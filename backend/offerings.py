@@ -0,0 +1,103 @@
+"""
+Offerings by ID, many at a time.
+
+Dashboards and comparisons used to fetch one program or university per request.
+/api/offerings and /api/compare resolve up to MAX_IDS offerings in one round
+trip: from the worker's catalog when it is loaded, otherwise with a single
+= ANY(:ids) query against offering_summary.
+"""
+
+from sqlalchemy import text
+
+from backend.catalog import catalog_counter_version, get_catalog
+from backend.matching import offering_fields
+from backend.models import db
+from backend.popularity import get_popularity
+
+MAX_IDS = 500
+
+OFFERINGS_BY_ID_QUERY = text("""
+    WITH s AS (
+        SELECT * FROM offering_summary WHERE offering_id = ANY(:ids)
+    ), counts AS (
+        SELECT program_id, COUNT(*) as offering_count
+        FROM program_offerings
+        WHERE program_id IN (SELECT program_id FROM s)
+        GROUP BY program_id
+    )
+    SELECT s.offering_id, s.program_id, s.program_name, s.discipline, s.code,
+           s.university_id, s.university_name, s.sector,
+           s.city, s.min_score_pct, s.min_score_type, s.annual_fee, s.hostel_available,
+           counts.offering_count,
+           s.tags, s.required_groups, s.accepted_boards
+    FROM s
+    JOIN counts ON counts.program_id = s.program_id
+""")
+
+# Rows of /api/compare, in order; each is a list aligned with the offering IDs
+COMPARE_FIELDS = [
+    ('program_name', lambda offering: offering['program_name']),
+    ('program_code', lambda offering: offering['program_code']),
+    ('discipline', lambda offering: offering['discipline']),
+    ('university', lambda offering: offering['university']['name']),
+    ('sector', lambda offering: offering['university']['sector']),
+    ('city', lambda offering: offering['campus']['city']),
+    ('min_score_pct', lambda offering: offering['min_score_pct']),
+    ('min_score_type', lambda offering: offering['min_score_type']),
+    ('annual_fee', lambda offering: offering['annual_fee']),
+    ('hostel_available', lambda offering: offering['hostel_available']),
+    ('required_groups', lambda offering: offering['required_groups']),
+    ('accepted_boards', lambda offering: offering['accepted_boards']),
+    ('tags', lambda offering: offering['tags']),
+    ('popularity_rank', lambda offering: offering['popularity_rank']),
+    ('offering_count', lambda offering: offering['offering_count'])
+]
+
+
+def parse_ids(value):
+    """Offering IDs from "1,2,3", duplicates dropped, in order; ValueError when invalid"""
+    try:
+        ids = [int(part) for part in (value or '').split(',') if part.strip()]
+    except ValueError:
+        raise ValueError('ids must be a comma-separated list of offering IDs')
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValueError('ids is required')
+    if len(ids) > MAX_IDS:
+        raise ValueError(f'At most {MAX_IDS} ids per request')
+    return ids
+
+
+def fetch_offering_rows(ids):
+    """({offering_id: row} for the IDs that exist, catalog version)"""
+    catalog = get_catalog()
+    if catalog is not None:
+        return catalog.by_id, catalog.version
+    rows = {row.offering_id: row for row in db.session.execute(OFFERINGS_BY_ID_QUERY, {'ids': list(ids)})}
+    return rows, catalog_counter_version()
+
+
+def offerings_by_id(ids):
+    """(offerings in the order of ids, IDs not found, catalog version)"""
+    rows, version = fetch_offering_rows(ids)
+    popularity = get_popularity()
+    offerings = []
+    missing = []
+    for offering_id in ids:
+        row = rows.get(offering_id)
+        if row is None:
+            missing.append(offering_id)
+            continue
+        ranking = popularity.lookup(row.program_name, row.city, row.sector) if popularity is not None else None
+        offerings.append(offering_fields(row, ranking))
+    return offerings, missing, version
+
+
+def compare_offerings(offerings):
+    """Side-by-side fields: {'fields': {name: [value per offering]}, 'differs': [names]}"""
+    fields = {name: [value(offering) for offering in offerings] for name, value in COMPARE_FIELDS}
+    differs = [
+        name for name, values in fields.items()
+        if any(value != values[0] for value in values[1:])
+    ]
+    return {'fields': fields, 'differs': differs}
@@ -0,0 +1,103 @@
+"""
+Program popularity rankings (university_popularity_rankings.json).
+
+The rankings are ingested into program_popularity_rankings and loaded into an
+in-memory map at warm-up, so matching looks a rank up without touching the
+file or the database.
+"""
+
+import json
+import logging
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from backend.invalidation import POPULARITY, bump_version, read_versions
+from backend.models import db, ProgramPopularityRanking
+
+logger = logging.getLogger('universe.popularity')
+
+
+def popularity_key(program_name, city, sector):
+    """Normalized (program, city, sector) key; en dashes and spacing do not matter"""
+    return tuple(
+        ' '.join((value or '').replace('–', '-').lower().split())
+        for value in (program_name, city, sector)
+    )
+
+
+class PopularityRankings:
+    """Rank of each ranked (program, city, sector)"""
+
+    def __init__(self, rankings, version=0):
+        # rankings: iterable of (program_family, program_name, city, sector, rank)
+        self.version = version
+        self.ranks = {}
+        for family, program_name, city, sector, rank in rankings:
+            key = popularity_key(program_name, city, sector)
+            if key not in self.ranks or rank < self.ranks[key][0]:
+                self.ranks[key] = (rank, family)
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def lookup(self, program_name, city, sector):
+        """(rank, program family), or None when the program is not ranked there"""
+        return self.ranks.get(popularity_key(program_name, city, sector))
+
+
+def ranking_rows(document):
+    """Table rows from a rankings document ({"popularity_rankings_by_program": {family: [...]}})"""
+    rows = []
+    for family, entries in document.get('popularity_rankings_by_program', {}).items():
+        for entry in entries:
+            rows.append({
+                'program_family': family,
+                'program_name': entry['program_name'].strip(),
+                'city': entry['city'].strip(),
+                'sector': entry['sector'].strip(),
+                'rank': int(entry['rank'])
+            })
+    return rows
+
+
+def load_rankings(document):
+    """Replace the stored rankings with those of a document, returns the number loaded
+
+    Workers reload them when notified (backend.invalidation).
+    """
+    ProgramPopularityRanking.__table__.create(db.engine, checkfirst=True)
+    rows = {}
+    for row in ranking_rows(document):
+        # The unique key is the raw name, city and sector; keep the best rank of duplicates
+        key = (row['program_name'], row['city'], row['sector'])
+        if key not in rows or row['rank'] < rows[key]['rank']:
+            rows[key] = row
+
+    db.session.execute(delete(ProgramPopularityRanking))
+    if rows:
+        db.session.execute(insert(ProgramPopularityRanking), list(rows.values()))
+    bump_version(POPULARITY)
+    logger.info("Loaded %d popularity rankings", len(rows))
+    return len(rows)
+
+
+def load_rankings_file(path):
+    with open(path, encoding='utf-8') as f:
+        return load_rankings(json.load(f))
+
+
+def load_popularity():
+    """Read the stored rankings into memory (the release step creates the tables)"""
+    # Read first: a load that races this one bumps the version again and is reloaded
+    version = read_versions().get(POPULARITY, 0)
+    rows = db.session.execute(select(
+        ProgramPopularityRanking.program_family, ProgramPopularityRanking.program_name,
+        ProgramPopularityRanking.city, ProgramPopularityRanking.sector, ProgramPopularityRanking.rank
+    ))
+    return PopularityRankings((tuple(row) for row in rows), version)
+
+
+def get_popularity():
+    """Rankings loaded by this worker, None before warm-up"""
+    return current_app.extensions.get('popularity')
@@ -0,0 +1,232 @@
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, make_response, request
+
+from backend.auth import is_admin_request
+
+# tracemalloc is process-global: only one profiled request traces memory at a time
+_memory_lock = threading.Lock()
+
+
+class PhaseTimer:
+    """Accumulates wall time per pipeline phase (phases may nest)"""
+
+    def __init__(self):
+        self.totals = {}
+        self.calls = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def report(self):
+        return {
+            name: {'ms': round(total * 1000, 3), 'calls': self.calls[name]}
+            for name, total in self.totals.items()
+        }
+
+
+class _NullPhase:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullTimer:
+    """Stand-in used when the request is not being profiled"""
+
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+
+NULL_TIMER = NullTimer()
+
+
+def current_timer():
+    """Phase timer of the current request, a no-op unless profiling is active"""
+    if has_request_context():
+        return g.get('phase_timer', NULL_TIMER)
+    return NULL_TIMER
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval into collapsed stacks
+
+    The collapsed format ("frame;frame;frame count" per line) is what flamegraph.pl
+    and speedscope read.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+
+def profiled(view):
+    """Profile the view when an admin asks for it
+
+    Send X-Profile: deterministic|sample (or ?profile=...) together with a valid
+    X-Admin-Token. The profile is returned inline under "profile" in the JSON body,
+    or with X-Profile-Output: file (?profile_output=file) written to PROFILE_DIR for
+    flamegraph rendering; the response then carries X-Profile-Id.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = request.headers.get('X-Profile') or request.args.get('profile')
+        if not mode or not is_admin_request():
+            return view(*args, **kwargs)
+        return _run_profiled(view, mode, args, kwargs)
+
+    return wrapper
+
+
+def _run_profiled(view, mode, args, kwargs):
+    mode = 'sample' if mode == 'sample' else 'deterministic'
+    output = request.headers.get('X-Profile-Output') or request.args.get('profile_output', 'inline')
+
+    timer = PhaseTimer()
+    g.phase_timer = timer
+
+    # A concurrent profile would reset the peak and stop tracing under this one,
+    # so a second profiled request is timed but gets no memory report
+    tracing_memory = _memory_lock.acquire(blocking=False)
+    started_tracing = False
+    if tracing_memory:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+    profiler = sampler = None
+    if mode == 'deterministic':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        interval = current_app.config.get('PROFILE_SAMPLE_INTERVAL_MS', 1.0) / 1000
+        sampler = SamplingProfiler(threading.get_ident(), interval).start()
+
+    start = time.perf_counter()
+    try:
+        response = make_response(view(*args, **kwargs))
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if profiler:
+            profiler.disable()
+        else:
+            sampler.stop()
+        if tracing_memory:
+            try:
+                _, peak = tracemalloc.get_traced_memory()
+                top_allocations = tracemalloc.take_snapshot().statistics('lineno')[:10]
+                if started_tracing:
+                    tracemalloc.stop()
+            finally:
+                _memory_lock.release()
+
+    report = {
+        'endpoint': request.endpoint,
+        'mode': mode,
+        'total_ms': round(elapsed_ms, 3),
+        'phases': timer.report(),
+        'memory': {
+            'peak_kib': round((peak - baseline) / 1024, 1),
+            'top_allocations': [
+                {'location': str(stat.traceback), 'size_kib': round(stat.size / 1024, 1), 'count': stat.count}
+                for stat in top_allocations
+            ]
+        } if tracing_memory else {'skipped': 'another profiled request is tracing memory'}
+    }
+    if profiler:
+        report['functions'] = _top_functions(profiler)
+
+    if output == 'file':
+        response.headers['X-Profile-Id'] = _write_profile(report, profiler, sampler)
+    elif response.is_json:
+        if sampler:
+            report['collapsed_stacks'] = sampler.collapsed().splitlines()
+        body = response.get_json()
+        body['profile'] = report
+        response.set_data(json.dumps(body))
+
+    return response
+
+
+def _top_functions(profiler, limit=25):
+    """Functions with the highest cumulative time"""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f'{func} ({os.path.basename(filename)}:{line})',
+            'calls': calls,
+            'self_ms': round(self_time * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3)
+        }
+        for (filename, line, func), (_, calls, self_time, cumulative, _) in rows
+    ]
+
+
+def _write_profile(report, profiler, sampler):
+    """Write the profile files to PROFILE_DIR and return the profile id"""
+    directory = current_app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{datetime.datetime.now():%Y%m%dT%H%M%S%f}-{(request.endpoint or 'request').replace('.', '_')}"
+    base = os.path.join(directory, profile_id)
+
+    with open(base + '.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    if profiler:
+        # Render with snakeviz, or gprof2dot | dot for a call graph
+        profiler.dump_stats(base + '.prof')
+    else:
+        # Render with flamegraph.pl or speedscope
+        with open(base + '.collapsed', 'w') as f:
+            f.write(sampler.collapsed() + '\n')
+
+    return profile_id
@@ -0,0 +1,107 @@
+"""
+In-memory index for the core eligibility predicate
+
+    min_score_pct <= student score AND annual_fee <= budget
+
+which is a 2-D dominance query. Offerings are sorted by score; for every
+power-of-two aligned block of that order the index keeps the block's fees
+sorted. A score prefix splits into at most log2(n) such blocks, and each block
+answers the fee bound with one bisect, so a query costs O(log^2 n + k) and a
+count O(log^2 n).
+"""
+
+from bisect import bisect_right
+
+
+class ScoreFeeIndex:
+    """Dominance index over (score, fee, position) entries of one score type
+
+    Positions are whatever the caller uses to find the offering again; the
+    catalog uses the offering's place in match order. Each level holds the
+    blocks of one size back to back, as flat fee and position sequences, so a
+    catalog file can supply them as arrays (see from_arrays).
+    """
+
+    def __init__(self, entries):
+        entries = sorted(entries)
+        self.scores = [score for score, _, _ in entries]
+        self.levels = []
+        size = 1
+        while size <= len(entries):
+            fees = []
+            positions = []
+            for start in range(0, len(entries) - size + 1, size):
+                block = sorted((fee, position) for _, fee, position in entries[start:start + size])
+                fees.extend(fee for fee, _ in block)
+                positions.extend(position for _, position in block)
+            self.levels.append((fees, positions))
+            size *= 2
+
+    @classmethod
+    def from_arrays(cls, scores, levels):
+        """Index over prebuilt sorted scores and (fees, positions) levels"""
+        index = cls.__new__(cls)
+        index.scores = scores
+        index.levels = levels
+        return index
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _blocks(self, max_score):
+        # Aligned blocks covering the prefix of offerings with score <= max_score,
+        # largest first (the prefix length read as a binary number), as
+        # (fees, positions, start, end) of the block's level
+        prefix = bisect_right(self.scores, max_score)
+        start = 0
+        for level in range(len(self.levels) - 1, -1, -1):
+            size = 1 << level
+            if prefix - start >= size:
+                fees, positions = self.levels[level]
+                yield fees, positions, start, start + size
+                start += size
+
+    def positions(self, max_score, max_fee):
+        """Positions of the entries with score <= max_score and fee <= max_fee, unordered"""
+        found = []
+        for fees, positions, start, end in self._blocks(max_score):
+            found.extend(positions[start:bisect_right(fees, max_fee, start, end)])
+        return found
+
+    def count(self, max_score, max_fee):
+        """Number of entries with score <= max_score and fee <= max_fee"""
+        return sum(bisect_right(fees, max_fee, start, end) - start for fees, _, start, end in self._blocks(max_score))
+
+
+class RangeIndex:
+    """One ScoreFeeIndex per min_score_type (ssc_hsc, ibcc) over a catalog's offerings
+
+    Offerings must be in match order (score, fee, id); results come back in the same order.
+    """
+
+    def __init__(self, offerings, by_type=None):
+        self.offerings = offerings
+        if by_type is not None:
+            self.by_type = by_type
+            return
+        entries = {}
+        for position, row in enumerate(offerings):
+            entries.setdefault(row.min_score_type, []).append((row.min_score_pct, row.annual_fee, position))
+        self.by_type = {score_type: ScoreFeeIndex(rows) for score_type, rows in entries.items()}
+
+    def _indexes(self, score_type):
+        if score_type is None:
+            return list(self.by_type.values())
+        return [self.by_type[score_type]] if score_type in self.by_type else []
+
+    def query(self, max_score, max_fee, score_type=None):
+        """Offerings a student with this score and budget qualifies for, in match order"""
+        positions = []
+        for index in self._indexes(score_type):
+            positions.extend(index.positions(max_score, max_fee))
+        positions.sort()
+        return [self.offerings[position] for position in positions]
+
+    def count(self, max_score, max_fee, score_type=None):
+        """How many offerings the score and budget qualify for, without listing them (for what-if sliders)"""
+        return sum(index.count(max_score, max_fee) for index in self._indexes(score_type))
@@ -0,0 +1,78 @@
+"""
+Release step: create and rebuild the derived structures web workers only read.
+
+Run once per deploy, before the new web workers start (`release` in the Procfile):
+
+    python -m backend.release
+
+It creates offering_summary and the jobs, snapshots, rankings, eligibility and
+catalog_version tables when they are missing, and recomputes
+offering_group_eligibility when the rules in backend.matching changed. Warm-up
+only checks that this has been done, so the workers of a deploy run no DDL and
+do not rebuild the eligibility table side by side.
+"""
+
+import logging
+import sys
+
+from sqlalchemy import text
+
+from backend.eligibility import ensure_group_eligibility, group_eligibility_is_current
+from backend.invalidation import ensure_catalog_version_table
+from backend.jobs import ensure_jobs_table
+from backend.models import db, CatalogVersion, Job, MatchSnapshot, OfferingGroupEligibility, ProgramPopularityRanking
+from backend.schema import ensure_offering_summary
+from backend.snapshots import ensure_snapshots_table
+
+logger = logging.getLogger('universe.release')
+
+# Relations warm-up expects the release step to have created
+PREPARED_RELATIONS = [
+    'offering_summary',
+    OfferingGroupEligibility.__tablename__,
+    ProgramPopularityRanking.__tablename__,
+    Job.__tablename__,
+    MatchSnapshot.__tablename__,
+    CatalogVersion.__tablename__
+]
+
+
+def prepare_database():
+    """Create what is missing and bring group eligibility up to the current rules"""
+    ensure_offering_summary()
+    ensure_group_eligibility()
+    ProgramPopularityRanking.__table__.create(db.engine, checkfirst=True)
+    ensure_jobs_table()
+    ensure_snapshots_table()
+    ensure_catalog_version_table()
+
+
+def unprepared_database():
+    """What the release step still has to do, as a list of descriptions (empty when done)
+
+    Read-only, for warm-up.
+    """
+    missing = [
+        relation for relation in PREPARED_RELATIONS
+        if not db.session.execute(text("SELECT to_regclass(:relation) IS NOT NULL"), {'relation': relation}).scalar()
+    ]
+    if OfferingGroupEligibility.__tablename__ not in missing and not group_eligibility_is_current():
+        missing.append('group eligibility computed with older rules')
+    return missing
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    from backend.app import create_app
+
+    # Release only: no warm-up and no catalog listener
+    app = create_app({'WARMUP_ON_START': False, 'CATALOG_LISTEN': False})
+    with app.app_context():
+        prepare_database()
+    logger.info("Database prepared")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import itertools
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+logger = logging.getLogger('universe.routing')
+
+REPLICA_BIND_PREFIX = 'replica_'
+LAST_WRITE_COOKIE = 'db_last_write'
+
+# Seconds the replica is behind its primary; 0 when fully replayed or not a standby
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """Picks a read replica for read-only requests
+
+    Replicas are used round-robin. A replica whose lag exceeds
+    REPLICA_MAX_LAG_SECONDS (measured every REPLICA_LAG_CHECK_SECONDS by a
+    ReplicaMonitor thread) or that cannot be reached is skipped, and reads fall
+    back to the primary.
+    """
+
+    def __init__(self, bind_keys, max_lag, check_interval):
+        self.bind_keys = bind_keys
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        # Unknown (None) until the monitor has measured, which keeps reads on the primary
+        self.lag = {key: None for key in bind_keys}
+        self.checked_at = {key: None for key in bind_keys}
+        # Monotonic time of the last write committed by this worker
+        self.last_write = None
+        self._cycle = itertools.cycle(bind_keys)
+        self._lock = threading.Lock()
+
+    def choose(self, engines):
+        """Engine of a usable replica, or None to read from the primary
+
+        Only reads the lag the monitor last measured, so it never blocks on a replica.
+        """
+        for _ in range(len(self.bind_keys)):
+            with self._lock:
+                key = next(self._cycle)
+            if self._usable(key):
+                return engines[key]
+        return None
+
+    def _usable(self, key):
+        lag = self.lag[key]
+        return lag is not None and lag <= self.max_lag
+
+    def measure(self, engines):
+        """Re-measure every replica's lag"""
+        for key in self.bind_keys:
+            self.lag[key] = self._measure_lag(key, engines[key])
+            self.checked_at[key] = time.time()
+
+    def _measure_lag(self, key, engine):
+        try:
+            with engine.connect() as connection:
+                return float(connection.execute(LAG_QUERY).scalar())
+        except Exception as e:
+            logger.warning("Replica %s unavailable: %s", key, e)
+            return None
+
+    def recently_written(self, last_write_epoch=None):
+        """Whether a recent write may not have reached the replicas yet"""
+        if self.last_write is not None and time.monotonic() - self.last_write < self.max_lag:
+            return True
+        return last_write_epoch is not None and time.time() - last_write_epoch < self.max_lag
+
+    def state(self):
+        return {
+            key: {'lag_seconds': self.lag[key], 'usable': self._usable(key), 'checked_at': self.checked_at[key]}
+            for key in self.bind_keys
+        }
+
+
+class ReplicaMonitor(threading.Thread):
+    """Background thread that measures replica lag for the router"""
+
+    def __init__(self, router, engines):
+        super().__init__(name='replica-monitor', daemon=True)
+        self.router = router
+        self.engines = engines
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # Measure right away: until then every read goes to the primary
+        while True:
+            try:
+                self.router.measure(self.engines)
+            except Exception as e:
+                logger.warning("Replica lag check failed: %s", e)
+            if self._stop_event.wait(self.router.check_interval):
+                break
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class RoutingSession(Session):
+    """Session that sends read-only requests to a replica
+
+    The replica is chosen at the request's first query and used for the rest of
+    it, so a request reads from one consistent snapshot. Everything else,
+    including flushes, uses the primary (default bind).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _wants_replica():
+            if 'db_replica' not in g:
+                router = current_app.extensions.get('replicas')
+                g.db_replica = router.choose(self._db.engines) if router is not None else None
+            if g.db_replica is not None:
+                return g.db_replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_write(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(session):
+    if not session.info.pop('wrote', False) or not has_app_context():
+        return
+    router = current_app.extensions.get('replicas')
+    if router is not None:
+        router.last_write = time.monotonic()
+    if has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
+
+
+def _wants_replica():
+    return has_request_context() and g.get('db_route') == 'replica'
+
+
+def read_only(view):
+    """Route the view's queries to a read replica when one is configured
+
+    Reads stay on the primary for REPLICA_MAX_LAG_SECONDS after a write, so a
+    client (or this worker) reads its own writes.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get('replicas')
+        if router is not None and not router.recently_written(_client_last_write()):
+            g.db_route = 'replica'
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def use_primary():
+    """Send the rest of a read-only request to the primary; False when it already reads from it"""
+    if not _wants_replica() or g.get('db_replica') is None:
+        return False
+    g.db_route = 'primary'
+    return True
+
+
+def _client_last_write():
+    value = request.headers.get('X-DB-Last-Write') or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        written = float(value) if value else None
+    except ValueError:
+        return None
+    # The value is one this server handed out; a future (or non-finite) one would
+    # pin the client to the primary indefinitely
+    if written is None or not math.isfinite(written) or written > time.time():
+        return None
+    return written
+
+
+def init_read_replicas(app):
+    """Register DATABASE_READ_URLS as replica binds; call before db.init_app"""
+    app.config.setdefault('DATABASE_READ_URLS', [])
+    app.config.setdefault('REPLICA_MAX_LAG_SECONDS', 5.0)
+    app.config.setdefault('REPLICA_LAG_CHECK_SECONDS', 2.0)
+
+    urls = app.config['DATABASE_READ_URLS']
+    if not urls:
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    bind_keys = []
+    for number, url in enumerate(urls, start=1):
+        key = f'{REPLICA_BIND_PREFIX}{number}'
+        binds[key] = url
+        bind_keys.append(key)
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    app.extensions['replicas'] = ReplicaRouter(
+        bind_keys,
+        app.config['REPLICA_MAX_LAG_SECONDS'],
+        app.config['REPLICA_LAG_CHECK_SECONDS']
+    )
+
+    @app.after_request
+    def remember_write(response):
+        # Hand the client its write time so its next reads skip lagging replicas
+        if g.get('db_wrote'):
+            written = f'{time.time():.3f}'
+            response.headers['X-DB-Last-Write'] = written
+            response.set_cookie(LAST_WRITE_COOKIE, written,
+                                max_age=math.ceil(app.config['REPLICA_MAX_LAG_SECONDS']) + 1, httponly=True)
+        return response
+
+
+def init_replica_monitor(app):
+    """Start measuring replica lag in the background; call after db.init_app"""
+    router = app.extensions.get('replicas')
+    if router is None:
+        return
+    with app.app_context():
+        engines = {key: current_app.extensions['sqlalchemy'].engines[key] for key in router.bind_keys}
+    monitor = app.extensions['replica_monitor'] = ReplicaMonitor(router, engines)
+    monitor.start()
@@ -0,0 +1,92 @@
+"""
+Derived, query-optimized structures that live next to the ORM tables.
+
+offering_summary pre-aggregates each offering with its tags, groups and boards
+(as the match query used to do per request) and adds native arrays and a
+normalized city so eligibility can be decided inside Postgres. It is refreshed
+after every ingest and created by the release step (backend.release) if missing.
+"""
+
+from sqlalchemy import text
+
+from backend.models import db
+
+# Same normalization as normalize_city()
+CITY_KEY_SQL = "lower(btrim(regexp_replace({column}, '\\s+', ' ', 'g')))"
+
+OFFERING_SUMMARY_DDL = [
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS offering_summary AS
+    SELECT s.*,
+           ARRAY(SELECT DISTINCT lower(btrim(tag)) FROM unnest(string_to_array(s.tags, ',')) AS tag) AS tag_keys
+    FROM (
+        SELECT
+            po.id as offering_id,
+            p.id as program_id, p.name as program_name, p.discipline, p.code,
+            u.id as university_id, u.name as university_name, u.sector,
+            c.city, """ + CITY_KEY_SQL.format(column='c.city') + """ as city_key,
+            po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available,
+            STRING_AGG(DISTINCT t.name, ', ') as tags,
+            STRING_AGG(DISTINCT pog.subject_group, ', ') as required_groups,
+            STRING_AGG(DISTINCT pob.board, ', ') as accepted_boards,
+            COALESCE(ARRAY_AGG(DISTINCT pog.subject_group) FILTER (WHERE pog.subject_group IS NOT NULL), '{}') as group_list
+        FROM program_offerings po
+        JOIN programs p ON po.program_id = p.id
+        JOIN campuses c ON po.campus_id = c.id
+        JOIN universities u ON c.university_id = u.id
+        LEFT JOIN program_offering_tags pot ON po.id = pot.offering_id
+        LEFT JOIN tags t ON pot.tag_id = t.id
+        LEFT JOIN program_offering_groups pog ON po.id = pog.offering_id
+        LEFT JOIN program_offering_boards pob ON po.id = pob.offering_id
+        GROUP BY po.id, p.id, p.name, p.discipline, p.code, u.id, u.name, u.sector, c.city, po.min_score_pct, po.min_score_type, po.annual_fee, po.hostel_available
+    ) s
+    """,
+    # Unique index is also what REFRESH ... CONCURRENTLY requires
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_offering_summary_offering_id ON offering_summary (offering_id)",
+    "CREATE INDEX IF NOT EXISTS ix_offering_summary_score_fee ON offering_summary (min_score_pct, annual_fee)",
+    "CREATE INDEX IF NOT EXISTS ix_offering_summary_group_list ON offering_summary USING GIN (group_list)",
+    "CREATE INDEX IF NOT EXISTS ix_offering_summary_tag_keys ON offering_summary USING GIN (tag_keys)",
+    "CREATE INDEX IF NOT EXISTS ix_offering_summary_city_key ON offering_summary (city_key)"
+]
+
+# Serializes DDL between workers warming up at the same time
+SCHEMA_LOCK_ID = 724301
+
+
+def normalize_city(city):
+    """Lower-case, trimmed, single-spaced city name as stored in city_key"""
+    return ' '.join((city or '').lower().split())
+
+
+def ensure_offering_summary():
+    """Create offering_summary and its indexes if they do not exist yet
+
+    Returns True when the view was created (and so is already up to date).
+    """
+    db.session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {'lock_id': SCHEMA_LOCK_ID})
+    created = db.session.execute(text("SELECT to_regclass('offering_summary') IS NULL")).scalar()
+    for statement in OFFERING_SUMMARY_DDL:
+        db.session.execute(text(statement))
+    db.session.commit()
+    return created
+
+
+def refresh_offering_summary():
+    """Rebuild offering_summary from the base tables (after an ingest)"""
+    if ensure_offering_summary():
+        return
+    # CONCURRENTLY keeps the view readable during the refresh; it needs a populated view
+    populated = db.session.execute(text(
+        "SELECT ispopulated FROM pg_matviews WHERE matviewname = 'offering_summary'"
+    )).scalar()
+    db.session.execute(text(
+        "REFRESH MATERIALIZED VIEW CONCURRENTLY offering_summary" if populated
+        else "REFRESH MATERIALIZED VIEW offering_summary"
+    ))
+    db.session.commit()
+
+
+def drop_offering_summary():
+    """Drop offering_summary, which otherwise blocks dropping the base tables"""
+    db.session.execute(text("DROP MATERIALIZED VIEW IF EXISTS offering_summary"))
+    db.session.commit()
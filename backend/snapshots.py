@@ -0,0 +1,144 @@
+"""
+Shareable match snapshots.
+
+A snapshot keeps only what the catalog cannot supply: the profile fields the
+explanations mention and, per matched offering, its ID, score, offering count,
+subject compatibility and reason codes. Viewing it looks the offerings up in the
+worker's catalog (or offering_summary before warm-up) and rebuilds the
+explanations from the reason codes, so a view costs a primary-key lookup rather
+than a match. Snapshots expire after MATCH_SNAPSHOT_TTL_DAYS and are deleted
+by the purge_snapshots job.
+"""
+
+import datetime
+import logging
+import secrets
+
+from flask import current_app
+from sqlalchemy import delete
+
+from backend.catalog import catalog_counter_version, get_catalog, same_catalog_version
+from backend.matching import offering_fields, reason_text
+from backend.models import db, MatchSnapshot
+from backend.offerings import fetch_offering_rows
+from backend.popularity import get_popularity
+
+logger = logging.getLogger('universe.snapshots')
+
+# Bump when the payload layout changes; older snapshots are then refused
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_FIELDS = ['offering_id', 'match_score', 'offering_count', 'subject_compatibility', 'match_reasons']
+PROFILE_FIELDS = ['student_score', 'hsc_group', 'budget', 'preferred_location', 'allowed_interests', 'filtered_interests']
+
+
+class SnapshotNotFound(Exception):
+    """Unknown or expired snapshot"""
+
+
+def ensure_snapshots_table():
+    MatchSnapshot.__table__.create(db.engine, checkfirst=True)
+
+
+def current_catalog_version():
+    catalog = get_catalog()
+    return catalog.version if catalog is not None else catalog_counter_version()
+
+
+def create_snapshot(profile, matched):
+    """Store a match result, returns the snapshot (committed)"""
+    limit = current_app.config.get('MATCH_SNAPSHOT_MAX_OFFERINGS', 1000)
+    ttl_days = current_app.config.get('MATCH_SNAPSHOT_TTL_DAYS', 30)
+    snapshot = MatchSnapshot(
+        id=secrets.token_urlsafe(12),
+        format_version=SNAPSHOT_FORMAT,
+        catalog_version=current_catalog_version(),
+        total_matches=len(matched),
+        payload={
+            'profile': {field: profile[field] for field in PROFILE_FIELDS},
+            'fields': SNAPSHOT_FIELDS,
+            'offerings': [[offering[field] for field in SNAPSHOT_FIELDS] for offering in matched[:limit]]
+        },
+        expires_at=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=ttl_days)
+    )
+    db.session.add(snapshot)
+    db.session.commit()
+    return snapshot
+
+
+def get_snapshot(snapshot_id):
+    """The snapshot, SnapshotNotFound when it does not exist or has expired"""
+    snapshot = db.session.get(MatchSnapshot, snapshot_id)
+    if snapshot is None or snapshot.expires_at <= datetime.datetime.now(datetime.timezone.utc):
+        raise SnapshotNotFound(f"Snapshot '{snapshot_id}' not found or expired")
+    if snapshot.format_version != SNAPSHOT_FORMAT:
+        raise SnapshotNotFound(f"Snapshot '{snapshot_id}' uses an unsupported format ({snapshot.format_version})")
+    return snapshot
+
+
+def rehydrate_snapshot(snapshot):
+    """The stored match result with offering details from the current catalog
+
+    Offerings removed since the snapshot was taken are left out and counted
+    under missing_offerings; stale is true when the catalog has changed.
+    """
+    payload = snapshot.payload
+    profile = payload['profile']
+    entries = payload['offerings']
+
+    rows, catalog_version = fetch_offering_rows([entry[0] for entry in entries])
+    popularity = get_popularity()
+    interests = {interest.lower() for interest in profile['filtered_interests']}
+
+    offerings = []
+    for offering_id, score, offering_count, subject_compatible, reasons in entries:
+        row = rows.get(offering_id)
+        if row is None:
+            continue
+        ranking = popularity.lookup(row.program_name, row.city, row.sector) if popularity is not None else None
+        offering = offering_fields(row, ranking)
+        offering['offering_count'] = offering_count
+
+        explanations = []
+        for code in reasons:
+            if code == 'interest_match':
+                program_tags = {tag.strip().lower() for tag in row.tags.split(',')} if row.tags else set()
+                explanations.append(reason_text(code, profile, interest_matches=program_tags & interests))
+            elif code == 'popular':
+                if ranking:
+                    explanations.append(reason_text(code, profile, ranking=ranking))
+            else:
+                explanations.append(reason_text(code, profile, row))
+
+        offering['match_score'] = score
+        offering['match_explanation'] = explanations
+        offering['match_reasons'] = reasons
+        offering['subject_compatibility'] = subject_compatible
+        offerings.append(offering)
+
+    return {
+        'snapshot_id': snapshot.id,
+        'created_at': snapshot.created_at.isoformat(),
+        'expires_at': snapshot.expires_at.isoformat(),
+        'catalog_version': snapshot.catalog_version,
+        'current_catalog_version': catalog_version,
+        'stale': not same_catalog_version(snapshot.catalog_version, catalog_version),
+        'matched_offerings': offerings,
+        'total_matches': snapshot.total_matches,
+        'missing_offerings': len(entries) - len(offerings),
+        'subject_restrictions': {
+            'hsc_group': profile['hsc_group'],
+            'allowed_interests': profile['allowed_interests'],
+            'filtered_interests': profile['filtered_interests']
+        }
+    }
+
+
+def purge_expired_snapshots():
+    """Delete expired snapshots, returns how many"""
+    ensure_snapshots_table()
+    result = db.session.execute(
+        delete(MatchSnapshot).where(MatchSnapshot.expires_at <= db.func.now())
+    )
+    db.session.commit()
+    logger.info("Purged %d expired match snapshots", result.rowcount)
+    return result.rowcount
@@ -0,0 +1,117 @@
+"""
+Server-Sent Events variant of the match pipeline.
+
+Events, in order:
+- meta: subject restrictions and page size.
+- top: the first page of results. While candidates are still being scored it
+  is provisional (the best seen so far) and is re-sent whenever it changes.
+  The last top event is final.
+- page: each following page of the final ranking.
+- done: total number of matches and pages.
+
+When the candidates are already cached, the final pages are sent straight away.
+"""
+
+import heapq
+import json
+
+from flask import current_app
+
+from backend.matching import (
+    candidate_cache_key, candidate_rows, rank_candidate, score_candidate, sort_key
+)
+from backend.popularity import get_popularity
+from backend.profiling import current_timer
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Rows scored before the first provisional page, doubled after each chunk
+FIRST_CHUNK_ROWS = 100
+MAX_CHUNK_ROWS = 2000
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _rank(candidate, profile, popularity_points):
+    """(offering, sort key) for a candidate that passes, else None"""
+    offering = rank_candidate(candidate, profile, popularity_points)
+    if offering is None:
+        return None
+    return offering, sort_key(offering, profile)
+
+
+def stream_matches(profile, page_size=DEFAULT_PAGE_SIZE):
+    """Generate the SSE body for a parsed student profile"""
+    yield sse_event('meta', {
+        'page_size': page_size,
+        'subject_restrictions': {
+            'hsc_group': profile['hsc_group'],
+            'allowed_interests': profile['allowed_interests'],
+            'filtered_interests': profile['filtered_interests']
+        }
+    })
+
+    popularity_points = current_app.config.get('MATCH_POPULARITY_POINTS', 0)
+    cache = current_app.extensions.get('match_candidates')
+    key = candidate_cache_key(profile)
+    candidates = cache.get(key) if cache is not None else None
+
+    ranked = []
+    if candidates is not None:
+        for candidate in candidates:
+            entry = _rank(candidate, profile, popularity_points)
+            if entry is not None:
+                ranked.append(entry)
+    else:
+        popularity = get_popularity()
+        timer = current_timer()
+        candidates = []
+        top = []
+        sent_ids = None
+        chunk = []
+        chunk_rows = FIRST_CHUNK_ROWS
+        # Read before the query, so a reload during the scan discards these candidates
+        generation = cache.generation if cache is not None else None
+        rows = candidate_rows(profile, stream=True)
+        for row in rows:
+            candidate = score_candidate(row, profile, timer, popularity)
+            candidates.append(candidate)
+            entry = _rank(candidate, profile, popularity_points)
+            if entry is not None:
+                chunk.append(entry)
+            if len(candidates) % chunk_rows == 0:
+                top, sent_ids, event = _refresh_top(top, chunk, sent_ids, page_size, len(candidates))
+                ranked.extend(chunk)
+                chunk = []
+                chunk_rows = min(chunk_rows * 2, MAX_CHUNK_ROWS)
+                if event:
+                    yield event
+        ranked.extend(chunk)
+        if cache is not None:
+            cache.put(key, candidates, generation)
+
+    # Same order as match_offerings(): a stable sort on the same keys
+    ranked.sort(key=lambda entry: entry[1], reverse=True)
+    offerings = [offering for offering, _ in ranked]
+    pages = [offerings[start:start + page_size] for start in range(0, len(offerings), page_size)] or [[]]
+
+    yield sse_event('top', {'provisional': False, 'scanned': len(candidates), 'offerings': pages[0]})
+    for number, page in enumerate(pages[1:], start=1):
+        yield sse_event('page', {'page': number, 'offerings': page})
+    yield sse_event('done', {'total_matches': len(offerings), 'pages': len(pages)})
+
+
+def _refresh_top(top, chunk, sent_ids, page_size, scanned):
+    """Merge a chunk into the running first page; an event when the page changed"""
+    top = heapq.nlargest(page_size, top + chunk, key=lambda entry: entry[1])
+    ids = [offering['offering_id'] for offering, _ in top]
+    if ids == sent_ids:
+        return top, sent_ids, None
+    event = sse_event('top', {
+        'provisional': True,
+        'scanned': scanned,
+        'offerings': [offering for offering, _ in top]
+    })
+    return top, ids, event
@@ -0,0 +1,98 @@
+"""
+What-if sweeps for the budget and score sliders.
+
+A match's eligible set only grows with the budget and the score, and a
+matched offering scores the same at any budget or score that admits it. So
+one match at the top of both ranges gives every offering that can appear;
+each is dropped into the first (score, budget) step that admits it, and a 2-D
+prefix sum over those buckets gives the match count at every step.
+"""
+
+from bisect import bisect_left
+
+from backend.matching import match_offerings
+
+MAX_SWEEP_STEPS = 400
+DEFAULT_STEP_OFFERINGS = 20
+MAX_STEP_OFFERINGS = 200
+
+
+def parse_range(data, name, value_type):
+    """Step values of a {"min", "max", "step"} range, None when the range is absent
+
+    The last step is max even when it is not a whole number of steps from min.
+    """
+    bounds = data.get(name)
+    if bounds is None:
+        return None
+    try:
+        start, stop, step = (value_type(bounds[key]) for key in ('min', 'max', 'step'))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{name} needs numeric min, max and step")
+    if step <= 0 or stop < start:
+        raise ValueError(f"{name} needs step > 0 and max >= min")
+    if (stop - start) / step + 1 > MAX_SWEEP_STEPS:
+        raise ValueError(f"{name} has more than {MAX_SWEEP_STEPS} steps")
+
+    values = []
+    count = 0
+    while start + count * step < stop:
+        values.append(round(start + count * step, 4) if value_type is float else start + count * step)
+        count += 1
+    values.append(stop)
+    return values
+
+
+def sweep_matches(profile, budgets=None, scores=None, step_offerings=DEFAULT_STEP_OFFERINGS):
+    """Match counts and newly eligible offerings at every (score, budget) step
+
+    Missing ranges stay at the profile's own budget or score. Steps are listed
+    score-major; newly eligible offerings are in match order.
+    """
+    budgets = budgets or [profile['budget']]
+    scores = scores or [profile['student_score']]
+    if len(budgets) * len(scores) > MAX_SWEEP_STEPS:
+        raise ValueError(f"Sweep has more than {MAX_SWEEP_STEPS} steps")
+
+    matched = match_offerings(dict(profile, budget=budgets[-1], student_score=scores[-1]))
+
+    # Bucket each offering into the first step that admits it
+    buckets = [[[] for _ in budgets] for _ in scores]
+    for offering in matched:
+        score_step = bisect_left(scores, offering['min_score_pct'])
+        budget_step = bisect_left(budgets, offering['annual_fee'])
+        buckets[score_step][budget_step].append(offering)
+
+    # 2-D prefix sums: totals[i][j] = offerings admitted at scores[i] and budgets[j]
+    totals = [[0] * len(budgets) for _ in scores]
+    for i in range(len(scores)):
+        row_total = 0
+        for j in range(len(budgets)):
+            row_total += len(buckets[i][j])
+            totals[i][j] = row_total + (totals[i - 1][j] if i else 0)
+
+    steps = []
+    for i, score in enumerate(scores):
+        for j, budget in enumerate(budgets):
+            newly_eligible = buckets[i][j]
+            steps.append({
+                'score': score,
+                'budget': budget,
+                'total_matches': totals[i][j],
+                'newly_eligible_count': len(newly_eligible),
+                'newly_eligible': [_compact(offering) for offering in newly_eligible[:step_offerings]]
+            })
+    return steps
+
+
+def _compact(offering):
+    return {
+        'offering_id': offering['offering_id'],
+        'program_id': offering['program_id'],
+        'program_name': offering['program_name'],
+        'university': offering['university']['name'],
+        'city': offering['campus']['city'],
+        'min_score_pct': offering['min_score_pct'],
+        'annual_fee': offering['annual_fee'],
+        'match_score': offering['match_score']
+    }
@@ -0,0 +1,189 @@
+import datetime
+import logging
+import threading
+import time
+
+from flask import current_app
+
+from backend.catalog import load_catalog
+from backend.catalog_file import ensure_catalog_file, open_catalog_file
+from backend.invalidation import record_loaded_versions
+from backend.matching import SUBJECT_RESTRICTIONS
+from backend.models import db
+from backend.popularity import load_popularity
+from backend.release import unprepared_database
+
+logger = logging.getLogger('universe.warmup')
+
+# Hot endpoints hit once during warm-up, one match per subject group so every
+# compatibility branch has run before real traffic arrives
+WARMUP_REQUESTS = [
+    ('POST', '/api/match-programs', {
+        'sscPercentage': 80, 'hscPercentage': 80, 'hscGroup': group,
+        'interests': [], 'budget': 10000000, 'preferredLocation': ''
+    })
+    for group in SUBJECT_RESTRICTIONS
+] + [
+    ('GET', '/api/universities', None),
+    ('GET', '/api/programs', None),
+    ('GET', '/api/program-offerings', None),
+    ('GET', '/api/search-programs?q=engineering', None),
+    ('GET', '/api/stats', None)
+]
+
+
+class Readiness:
+    """Warm-up state of this worker, reported by /healthz/ready"""
+
+    def __init__(self):
+        self.ready = False
+        self.error = None
+        self.steps = {}
+        self.started_at = None
+        self.finished_at = None
+        self.last_attempt = 0.0
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {
+            'ready': self.ready,
+            'error': self.error,
+            'steps_ms': self.steps,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+def init_warmup(app):
+    """Register the readiness state and warm the worker up if configured to"""
+    app.config.setdefault('WARMUP_ON_START', True)
+    app.config.setdefault('WARMUP_RETRY_SECONDS', 5.0)
+    app.extensions['readiness'] = Readiness()
+    if app.config['WARMUP_ON_START']:
+        warm_up(app)
+
+
+def warm_up(app):
+    """Open the pool, load the catalog and rankings and run each hot query once
+
+    Failures are logged and leave the worker unready; /healthz/ready retries.
+    Returns whether the worker is ready.
+    """
+    readiness = app.extensions['readiness']
+    if not readiness.lock.acquire(blocking=False):
+        # Another thread is already warming up
+        return readiness.ready
+
+    try:
+        readiness.last_attempt = time.monotonic()
+        readiness.started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        readiness.steps = {}
+        with app.app_context():
+            _step(readiness, 'pool', _open_pool)
+            _step(readiness, 'schema', _check_schema)
+            _step(readiness, 'versions', _record_versions)
+            _step(readiness, 'catalog', _load_catalog)
+            _step(readiness, 'popularity', _load_popularity)
+            _step(readiness, 'hot_queries', _run_hot_queries)
+        readiness.ready = True
+        readiness.error = None
+        logger.info("Worker ready: %s", readiness.steps)
+    except Exception as e:
+        readiness.ready = False
+        readiness.error = str(e)
+        logger.warning("Warm-up failed: %s", e)
+    finally:
+        readiness.finished_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        readiness.lock.release()
+
+    return readiness.ready
+
+
+def retry_warm_up(app):
+    """Retry a failed warm-up in the background, at most every WARMUP_RETRY_SECONDS"""
+    readiness = app.extensions['readiness']
+    if readiness.ready or readiness.lock.locked():
+        return
+    if time.monotonic() - readiness.last_attempt < app.config['WARMUP_RETRY_SECONDS']:
+        return
+    threading.Thread(target=warm_up, args=(app,), daemon=True).start()
+
+
+def _step(readiness, name, func):
+    start = time.perf_counter()
+    func()
+    readiness.steps[name] = round((time.perf_counter() - start) * 1000, 2)
+
+
+def _open_pool():
+    """Connect the whole base pool so no request pays for a cold connection
+
+    An unreachable replica does not block readiness; reads fall back to the primary.
+    """
+    for name, engine in db.engines.items():
+        size = engine.pool.size() if hasattr(engine.pool, 'size') else 1
+        connections = []
+        try:
+            for _ in range(size):
+                connections.append(engine.connect())
+                connections[-1].exec_driver_sql('SELECT 1')
+        except Exception as e:
+            if name is None:
+                raise
+            logger.warning("Could not warm up %s: %s", name, e)
+        finally:
+            for connection in connections:
+                connection.close()
+
+
+def _check_schema():
+    """Fail (and retry later) until the release step has prepared the database
+
+    Warm-up itself runs no DDL and no rebuilds, however many workers start at once.
+    """
+    missing = unprepared_database()
+    if missing:
+        raise RuntimeError(f"Database not prepared ({', '.join(missing)}); run python -m backend.release")
+
+
+def _record_versions():
+    # Before loading, so that a write during warm-up is reloaded rather than missed
+    record_loaded_versions(current_app._get_current_object())
+
+
+def _load_catalog():
+    path = current_app.config.get('CATALOG_FILE')
+    if path:
+        # Built by the first worker to get here, mapped by all of them
+        ensure_catalog_file(path)
+        current_app.extensions['catalog'] = open_catalog_file(path)
+    else:
+        current_app.extensions['catalog'] = load_catalog()
+
+
+def _load_popularity():
+    current_app.extensions['popularity'] = load_popularity()
+
+
+def _run_hot_queries():
+    client = current_app.test_client()
+    for method, path, body in WARMUP_REQUESTS:
+        response = client.open(path, method=method, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}")
+
+
+def pool_state(engine):
+    """Connection counts of an engine's pool"""
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {'status': pool.status()}
+    state = {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow()
+    }
+    if hasattr(pool, 'metrics'):
+        state.update(pool.metrics())
+    return state
@@ -0,0 +1,74 @@
+"""
+Background job worker (see backend.jobs).
+
+Usage:
+    python -m backend.worker
+    python -m backend.worker --once        # run the jobs that are due, then exit
+
+Stops after the current job on SIGTERM/SIGINT.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+
+from backend.jobs import claim_job, ensure_jobs_table, run_job
+
+logger = logging.getLogger('universe.worker')
+
+
+def run_worker(app, worker_id, stop_event, once=False):
+    """Claim and run jobs until stop_event is set (or, with once, until none are due)
+
+    Returns the number of jobs run.
+    """
+    poll_seconds = app.config.get('JOB_POLL_SECONDS', 1.0)
+    with app.app_context():
+        ensure_jobs_table()
+
+    processed = 0
+    while not stop_event.is_set():
+        with app.app_context():
+            try:
+                job_id = claim_job(worker_id)
+                if job_id is not None:
+                    run_job(job_id)
+                    processed += 1
+                    continue
+            except Exception as e:
+                # Database unavailable or similar; back off like an empty queue
+                logger.warning("Worker loop error: %s", e)
+        if once:
+            break
+        stop_event.wait(poll_seconds)
+    return processed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run background jobs from the jobs table')
+    parser.add_argument('--once', action='store_true', help='exit when no job is due')
+    parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    from backend.app import create_app
+
+    # Jobs only: no warm-up and no catalog listener
+    app = create_app({'WARMUP_ON_START': False, 'CATALOG_LISTEN': False})
+    stop_event = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    logger.info("Worker %s started", args.worker_id)
+    processed = run_worker(app, args.worker_id, stop_event, once=args.once)
+    logger.info("Worker %s stopped after %d job(s)", args.worker_id, processed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+In-process API benchmark suite.
+
+Builds the app against a scratch database, seeds it from the bundled university
+documents and drives the main endpoints through the Flask test client. Results
+(p50/p95/p99 latency, throughput, allocation peaks and query counts) are written
+as JSON so runs can be compared between commits.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://localhost/universe_bench python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --compare benchmarks/results/<old>.json --fail-threshold 20
+    python -m benchmarks.bench_api --synthetic 10000   # seed a generated catalog instead
+
+The benchmark database is dropped and re-created, so it must not be DATABASE_URL.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from backend.app import create_app
+from backend.ingest import load_documents, load_files
+from backend.warmup import warm_up
+from backend.models import db, Program, University
+from backend.popularity import load_rankings_file
+from backend.schema import drop_offering_summary
+from benchmarks.generate_catalog import generate_catalog
+from benchmarks.profiles import STUDENT_PROFILES
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = PROJECT_ROOT / 'benchmarks' / 'results'
+SEED_FILES = [
+    PROJECT_ROOT / 'fast.json',
+    PROJECT_ROOT / 'ned_extracted_data.json',
+    PROJECT_ROOT / 'nust_comprehensive.json'
+]
+RANKINGS_FILE = PROJECT_ROOT / 'university_popularity_rankings.json'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def build_app(database_url, **config):
+    """Create the app with the benchmark test configuration (plus any overrides)"""
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'TESTING': True,
+        # Keep the slow-query log quiet; timings are what we are measuring
+        'SLOW_QUERY_THRESHOLD_MS': float('inf'),
+        'SLOW_QUERY_EXPLAIN': False,
+        # Repeated profiles would otherwise only measure the re-ranking stage
+        'MATCH_CANDIDATE_CACHE_ROWS': 0,
+        # Warmed up explicitly once the database is seeded
+        'WARMUP_ON_START': False,
+        # One client sends every request
+        'ADMISSION_CLIENT_RATE': 0,
+        **config
+    })
+
+
+def seed_database(app, files=SEED_FILES, documents=None):
+    """Drop, re-create and load the benchmark database
+
+    Loads the given generated documents when provided, otherwise the JSON files.
+    """
+    with app.app_context():
+        drop_offering_summary()
+        db.drop_all()
+        db.create_all()
+        load_rankings_file(RANKINGS_FILE)
+        if documents is not None:
+            return load_documents(documents)
+        return load_files([str(path) for path in files])
+
+
+def build_scenarios(app):
+    """Requests to benchmark, as (name, method, path, json body)"""
+    with app.app_context():
+        program_id = db.session.query(Program.id).order_by(Program.id).first()[0]
+        university_id = db.session.query(University.id).order_by(University.id).first()[0]
+
+    scenarios = [
+        (f'match_programs[{name}]', 'POST', '/api/match-programs', profile)
+        for name, profile in STUDENT_PROFILES.items()
+    ]
+    scenarios += [
+        ('search_programs', 'GET', '/api/search-programs?q=engineering', None),
+        ('universities', 'GET', '/api/universities', None),
+        ('programs', 'GET', '/api/programs', None),
+        ('campuses', 'GET', '/api/campuses', None),
+        ('program_offerings', 'GET', '/api/program-offerings', None),
+        ('program_detail', 'GET', f'/api/program/{program_id}', None),
+        ('university_detail', 'GET', f'/api/university/{university_id}', None),
+        ('stats', 'GET', '/api/stats', None)
+    ]
+    return scenarios
+
+
+def run_scenario(client, method, path, body, iterations, warmup, alloc_iterations):
+    """Benchmark one request and return its latency, throughput and allocation figures"""
+    def send():
+        response = client.open(path, method=method, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return response
+
+    for _ in range(warmup):
+        send()
+
+    latencies = []
+    query_counts = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request_start = time.perf_counter()
+        response = send()
+        latencies.append((time.perf_counter() - request_start) * 1000)
+        query_counts.append(int(response.headers.get('X-DB-Queries', 0)))
+    elapsed = time.perf_counter() - started
+
+    # Allocation figures come from a separate pass because tracemalloc skews latency
+    alloc_peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            send()
+            _, peak = tracemalloc.get_traced_memory()
+            alloc_peaks.append((peak - baseline) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    alloc_peaks.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'max_ms': round(latencies[-1], 3),
+        'throughput_rps': round(iterations / elapsed, 2),
+        'alloc_peak_kib': round(percentile(alloc_peaks, 50), 1) if alloc_peaks else None,
+        'db_queries': max(query_counts)
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare_results(current, baseline, fail_threshold):
+    """Print per-endpoint deltas against a baseline run, returns True on regression"""
+    regressed = False
+    print(f"\nComparison against {baseline['meta']['revision']}:")
+    for name, stats in current['results'].items():
+        old = baseline['results'].get(name)
+        if not old:
+            print(f"  {name:<34} (new)")
+            continue
+        deltas = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            change = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            deltas.append(f"{key[:3]} {change:+6.1f}%")
+            if key == 'p95_ms' and fail_threshold is not None and change > fail_threshold:
+                regressed = True
+        print(f"  {name:<34} " + '  '.join(deltas))
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Uni-verse API in-process')
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help='scratch PostgreSQL database (default: $BENCH_DATABASE_URL)')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--alloc-iterations', type=int, default=5)
+    parser.add_argument('--only', help='run only scenarios whose name contains this text')
+    parser.add_argument('--no-seed', action='store_true', help='reuse the data already in the database')
+    parser.add_argument('--synthetic', type=int, metavar='OFFERINGS',
+                        help='seed a generated catalog of this many offerings instead of the bundled JSON')
+    parser.add_argument('--seed', type=int, default=42, help='generator seed for --synthetic')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<revision>.json)')
+    parser.add_argument('--compare', help='baseline results file to compare against')
+    parser.add_argument('--fail-threshold', type=float,
+                        help='exit non-zero if any p95 regresses by more than this percentage')
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error('set BENCH_DATABASE_URL or pass --database-url')
+    if args.database_url == os.getenv('DATABASE_URL'):
+        parser.error('refusing to seed the main DATABASE_URL; use a scratch database')
+
+    app = build_app(args.database_url)
+    if not args.no_seed:
+        documents = generate_catalog(args.synthetic, seed=args.seed) if args.synthetic else None
+        seeded = seed_database(app, documents=documents)
+        print(f"Seeded {seeded} program offerings")
+    if not warm_up(app):
+        print(f"Warm-up failed: {app.extensions['readiness'].error}")
+        return 1
+
+    client = app.test_client()
+    results = {}
+    for name, method, path, body in build_scenarios(app):
+        if args.only and args.only not in name:
+            continue
+        results[name] = run_scenario(client, method, path, body, args.iterations, args.warmup, args.alloc_iterations)
+        stats = results[name]
+        print(f"{name:<36} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+              f"p99 {stats['p99_ms']:8.2f} ms  {stats['throughput_rps']:8.1f} req/s  "
+              f"{stats['alloc_peak_kib']:9.1f} KiB  {stats['db_queries']} queries")
+
+    revision = git_revision()
+    report = {
+        'meta': {
+            'revision': revision,
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'catalog': f'synthetic:{args.synthetic}:{args.seed}' if args.synthetic else 'bundled'
+        },
+        'results': results
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f'{revision}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare_results(report, baseline, args.fail_threshold):
+            print('p95 regression above threshold')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
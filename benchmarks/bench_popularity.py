@@ -0,0 +1,87 @@
+"""
+A/B benchmark of the popularity ranking signal in matching.
+
+Runs the student profiles through /api/match-programs with the rankings loaded
+(tiebreaker plus MATCH_POPULARITY_POINTS) and with them unloaded, interleaving
+the two so drift affects both alike, and reports the median latency of each.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://localhost/universe_bench python -m benchmarks.bench_popularity
+    python -m benchmarks.bench_popularity --no-seed --rounds 200 --max-overhead-pct 3
+
+Exits with status 1 when the median overhead exceeds --max-overhead-pct.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from backend.popularity import PopularityRankings
+from backend.warmup import warm_up
+from benchmarks.bench_api import build_app, percentile, seed_database
+from benchmarks.profiles import STUDENT_PROFILES
+
+
+def time_request(client, body):
+    start = time.perf_counter()
+    response = client.post('/api/match-programs', json=body)
+    elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f"match-programs returned {response.status_code}")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the latency cost of the popularity signal')
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'),
+                        help='scratch PostgreSQL database (default: $BENCH_DATABASE_URL)')
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--no-seed', action='store_true', help='reuse the data already in the database')
+    parser.add_argument('--points', type=int, default=10, help='MATCH_POPULARITY_POINTS for the "with" side')
+    parser.add_argument('--max-overhead-pct', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error('set BENCH_DATABASE_URL or pass --database-url')
+    if args.database_url == os.getenv('DATABASE_URL'):
+        parser.error('refusing to seed the main DATABASE_URL; use a scratch database')
+
+    with_signal = build_app(args.database_url, MATCH_POPULARITY_POINTS=args.points)
+    without_signal = build_app(args.database_url, MATCH_POPULARITY_POINTS=0)
+    if not args.no_seed:
+        print(f"Seeded {seed_database(with_signal)} program offerings")
+    for app in (with_signal, without_signal):
+        if not warm_up(app):
+            print(f"Warm-up failed: {app.extensions['readiness'].error}")
+            return 1
+    # No rankings at all: no lookups, every tie left in retrieval order
+    without_signal.extensions['popularity'] = PopularityRankings([])
+    print(f"{len(with_signal.extensions['popularity'])} rankings loaded")
+
+    clients = {'with': with_signal.test_client(), 'without': without_signal.test_client()}
+    latencies = {name: [] for name in clients}
+    for round_number in range(args.rounds):
+        # Alternate which side goes first so neither always runs on a warmer cache
+        order = ['with', 'without'] if round_number % 2 == 0 else ['without', 'with']
+        for body in STUDENT_PROFILES.values():
+            for name in order:
+                latencies[name].append(time_request(clients[name], body))
+
+    medians = {}
+    for name, values in latencies.items():
+        values.sort()
+        medians[name] = percentile(values, 50)
+        print(f"{name + ' popularity':<20} p50 {medians[name]:8.3f} ms  p95 {percentile(values, 95):8.3f} ms  "
+              f"({len(values)} requests)")
+
+    overhead = (medians['with'] - medians['without']) / medians['without'] * 100
+    print(f"Median overhead: {overhead:+.2f}%")
+    if overhead > args.max_overhead_pct:
+        print(f"Overhead above {args.max_overhead_pct}%")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Deterministic synthetic catalog generator for scale testing.
+
+Every distribution (campuses per university, programs per campus, fees, minimum
+scores, tag mixes, subject groups, boards, tests, sectors, hostel availability)
+is sampled from the bundled university documents, and the university names come
+from university.json. The same seed always produces the same catalog.
+
+Usage:
+    python -m benchmarks.generate_catalog --size 10k --output synthetic_10k.json
+    python -m benchmarks.generate_catalog --size 100k --load   # straight into DATABASE_URL
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+from backend.ingest import campus_key, normalize_document
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SOURCE_FILES = [
+    PROJECT_ROOT / 'fast.json',
+    PROJECT_ROOT / 'ned_extracted_data.json',
+    PROJECT_ROOT / 'nust_comprehensive.json'
+]
+UNIVERSITY_NAMES_FILE = PROJECT_ROOT / 'university.json'
+
+SIZES = {
+    '1k': 1000,
+    '10k': 10000,
+    '100k': 100000
+}
+
+
+class CatalogDistributions:
+    """Empirical distributions extracted from real university documents"""
+
+    def __init__(self, documents):
+        self.campuses_per_university = []
+        self.programs_per_campus = []
+        self.sectors = []
+        self.cities = []
+        self.templates = []
+
+        for doc in documents:
+            document = normalize_document(doc)
+            self.sectors.append(document['university']['sector'])
+            self.campuses_per_university.append(len(doc.get('campuses', [])))
+
+            per_campus = {}
+            for offering in doc.get('program_offerings', []):
+                key = campus_key(offering['campus_name'])
+                per_campus[key] = per_campus.get(key, 0) + 1
+            self.programs_per_campus.extend(per_campus.values())
+
+            for offering in document['offerings']:
+                self.cities.append(offering['city'])
+                # An offering template keeps the correlated attributes (program, tags,
+                # groups, boards, fee, score) together so generated rows stay realistic
+                self.templates.append(offering)
+
+        self.cities = sorted(set(self.cities))
+
+    @classmethod
+    def from_files(cls, paths=SOURCE_FILES):
+        documents = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                documents.append(json.load(f))
+        return cls(documents)
+
+
+def _distribute(total, weights):
+    """Split total into integer parts proportional to weights (largest remainder)"""
+    weight_sum = float(sum(weights))
+    raw = [total * w / weight_sum for w in weights]
+    parts = [int(r) for r in raw]
+    remainders = sorted(range(len(raw)), key=lambda i: (raw[i] - parts[i], -i), reverse=True)
+    for i in remainders[:total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+
+def generate_catalog(total_offerings, seed=42, distributions=None, university_names=None):
+    """Generate university documents in the university_data_template.json format
+
+    Returns a list of documents holding exactly total_offerings program offerings.
+    """
+    rng = random.Random(seed)
+    distributions = distributions or CatalogDistributions.from_files()
+    if university_names is None:
+        with open(UNIVERSITY_NAMES_FILE, encoding='utf-8') as f:
+            university_names = list(dict.fromkeys(json.load(f)))
+
+    # Draw the shape of every university first, then scale programs-per-campus so the
+    # whole catalog lands exactly on the requested size
+    shapes = []
+    for name in university_names:
+        campus_count = min(rng.choice(distributions.campuses_per_university), len(distributions.cities))
+        cities = rng.sample(distributions.cities, campus_count)
+        weights = [rng.choice(distributions.programs_per_campus) for _ in cities]
+        shapes.append((name, cities, weights))
+
+    campus_weights = [w for _, _, weights in shapes for w in weights]
+    campus_sizes = iter(_distribute(total_offerings, campus_weights))
+
+    documents = []
+    for name, cities, weights in shapes:
+        document = {
+            'university': {'name': name, 'sector': rng.choice(distributions.sectors)},
+            'campuses': [],
+            'programs': [],
+            'program_offerings': [],
+            'program_offering_boards': [],
+            'program_offering_groups': [],
+            'entrance_test_types': [],
+            'program_offering_tests': [],
+            'tags': [],
+            'program_offering_tags': []
+        }
+        programs = {}
+        tags = set()
+        tests = set()
+
+        for city in cities:
+            campus_name = f'{city} Campus'
+            document['campuses'].append({'campus_name': campus_name, 'city': city})
+            size = next(campus_sizes)
+            if size <= len(distributions.templates):
+                templates = rng.sample(distributions.templates, size)
+            else:
+                templates = [rng.choice(distributions.templates) for _ in range(size)]
+
+            used_names = set()
+            for index, template in enumerate(templates):
+                program_name = template['program_name']
+                if program_name in used_names:
+                    program_name = f'{program_name} (Section {index + 1})'
+                used_names.add(program_name)
+                programs.setdefault(program_name, {
+                    'name': program_name,
+                    'discipline': template['discipline'],
+                    'code': None
+                })
+
+                # Jitter fees and cut-offs around the real values
+                fee = int(round(template['annual_fee'] * rng.uniform(0.6, 1.6), -3))
+                score = round(min(95.0, max(33.0, template['min_score_pct'] + rng.uniform(-10, 10))), 1)
+                key = {'campus_name': campus_name, 'program_name': program_name}
+
+                document['program_offerings'].append(dict(
+                    key,
+                    min_score_pct=score,
+                    min_score_type=template['min_score_type'],
+                    annual_fee=fee,
+                    hostel_available=rng.random() < 0.5 if template['hostel_available'] else rng.random() < 0.2
+                ))
+                document['program_offering_boards'].append(dict(key, boards=list(template['boards'])))
+                document['program_offering_groups'].append(dict(key, subject_groups=list(template['subject_groups'])))
+                document['program_offering_tags'].append(dict(key, tags=list(template['tags'])))
+                test_names = [test for test, _ in template['tests']]
+                document['program_offering_tests'].append(dict(key, test_name=test_names))
+                tags.update(template['tags'])
+                tests.update(test_names)
+
+        document['programs'] = list(programs.values())
+        document['tags'] = [{'name': tag} for tag in sorted(tags)]
+        document['entrance_test_types'] = [{'name': test} for test in sorted(tests)]
+        documents.append(document)
+
+    return documents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic university catalog')
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument('--size', choices=sorted(SIZES), help='preset catalog size')
+    size.add_argument('--offerings', type=int, help='exact number of program offerings')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the documents as a JSON list to this file')
+    parser.add_argument('--load', action='store_true', help='load the catalog into DATABASE_URL')
+    parser.add_argument('--database-url', help='database to load into instead of DATABASE_URL')
+    parser.add_argument('--create-tables', action='store_true', help='create missing tables before loading')
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.load:
+        parser.error('pass --output and/or --load')
+
+    total = SIZES[args.size] if args.size else args.offerings
+    documents = generate_catalog(total, seed=args.seed)
+    print(f"Generated {total} program offerings across {len(documents)} universities (seed {args.seed})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(documents, f, ensure_ascii=False, indent=1)
+        print(f"Written to {args.output}")
+
+    if args.load:
+        from backend.app import create_app
+        from backend.ingest import load_documents
+        from backend.models import db
+
+        app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url} if args.database_url else None)
+        with app.app_context():
+            if args.create_tables:
+                db.create_all()
+            loaded = load_documents(documents)
+        print(f"Loaded {loaded} program offerings")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
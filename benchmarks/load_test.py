@@ -0,0 +1,348 @@
+"""
+Open-loop load test with a realistic traffic mix and a latency SLO report.
+
+Requests are sent on a fixed schedule (or Poisson arrivals) at the target rate,
+independent of how fast the server answers. Latency is measured from each
+request's *intended* send time, so queueing behind a slow server shows up in the
+numbers instead of silently lowering the offered load (coordinated omission).
+
+The mix replays student profiles across the five HSC groups with realistic
+scores, budgets and cities, plus catalog and detail browsing. An optional spike
+phase multiplies the rate (admission-result days bring ~20x bursts).
+
+Usage:
+    python -m benchmarks.load_test --start --rate 20 --duration 60 --spike 20 --spike-duration 15 \\
+        --p99-budget match_programs=1500
+    python -m benchmarks.load_test --url http://localhost:5000 --rate 50 --duration 30
+
+Exits with status 1 when any configured p99 budget is exceeded.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.profiles import STUDENT_PROFILES
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Share of match requests per HSC group (the groups in subject_restrictions)
+GROUP_WEIGHTS = {
+    'Pre-Engineering': 0.35,
+    'Pre-Medical': 0.30,
+    'ICS (Computer Science)': 0.15,
+    'ICom (Commerce)': 0.12,
+    'IA (Arts)': 0.08
+}
+
+GROUP_INTERESTS = {
+    'Pre-Engineering': ['Engineering', 'Computer Science', 'Technology', 'civil-engineering',
+                        'electrical-engineering', 'mechanical-engineering', 'software-engineering', 'Architecture'],
+    'Pre-Medical': ['Medicine', 'Pharmacy', 'Nursing', 'Dentistry', 'biomedical-engineering', 'chemistry', 'Psychology'],
+    'ICS (Computer Science)': ['Computer Science', 'Software Engineering', 'Information Technology',
+                               'data-science', 'artificial-intelligence', 'cyber-security'],
+    'ICom (Commerce)': ['Business', 'Commerce', 'Economics', 'Finance', 'Accounting', 'management-sciences'],
+    'IA (Arts)': ['Arts', 'Literature', 'Psychology', 'english-linguistics', 'development-studies', 'Humanities']
+}
+
+CITY_WEIGHTS = {
+    'Karachi': 0.30, 'Lahore': 0.25, 'Islamabad': 0.15, 'Rawalpindi': 0.06, 'Peshawar': 0.06,
+    'Faisalabad': 0.04, 'Multan': 0.03, 'Quetta': 0.03, '': 0.08
+}
+
+# Annual budgets in PKR
+BUDGETS = [150000, 250000, 350000, 500000, 750000, 1000000, 1500000, 3000000]
+BUDGET_WEIGHTS = [0.08, 0.15, 0.20, 0.20, 0.15, 0.10, 0.07, 0.05]
+
+# Share of each request class in the overall traffic
+TRAFFIC_MIX = {
+    'match_programs': 0.45,
+    'universities': 0.10,
+    'programs': 0.08,
+    'program_offerings': 0.05,
+    'search_programs': 0.10,
+    'program_detail': 0.12,
+    'university_detail': 0.10
+}
+
+SEARCH_TERMS = ['engineering', 'computer', 'business', 'science', 'medicine', 'software', 'arts', 'data']
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with ~1% relative precision (HDR style)"""
+
+    GROWTH = math.log(1.01)
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, value_ms):
+        bucket = int(math.log(max(value_ms, 0.001) * 1000) / self.GROWTH)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, pct):
+        if not self.count:
+            return None
+        threshold = pct / 100.0 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return min(math.exp((bucket + 1) * self.GROWTH) / 1000, self.max)
+        return self.max
+
+
+class Stats:
+    """Thread-safe per-phase, per-request-class results"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.errors = {}
+        self.shed = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def started(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finished(self, phase, name, latency_ms, outcome):
+        with self.lock:
+            self.in_flight -= 1
+            key = (phase, name)
+            self.histograms.setdefault(key, LatencyHistogram()).record(latency_ms)
+            if outcome == 'error':
+                self.errors[key] = self.errors.get(key, 0) + 1
+            elif outcome == 'shed':
+                self.shed[key] = self.shed.get(key, 0) + 1
+
+
+def random_profile(rng):
+    """A plausible student profile for one match request"""
+    group = rng.choices(list(GROUP_WEIGHTS), weights=list(GROUP_WEIGHTS.values()))[0]
+    base = min(99.0, max(40.0, rng.gauss(75, 10)))
+    interests = rng.sample(GROUP_INTERESTS[group], rng.randint(1, 3))
+    return {
+        'sscPercentage': str(round(min(99.0, base + rng.uniform(-5, 5)), 1)),
+        'hscPercentage': str(round(base, 1)),
+        'qualificationType': 'HSC/A-Level',
+        'hscGroup': group,
+        'budget': str(rng.choices(BUDGETS, weights=BUDGET_WEIGHTS)[0]),
+        'preferredLocation': rng.choices(list(CITY_WEIGHTS), weights=list(CITY_WEIGHTS.values()))[0],
+        'interests': interests,
+        'interestPriorities': [
+            {'interest': interest, 'priority': priority}
+            for priority, interest in enumerate(interests, start=1)
+        ]
+    }
+
+
+def build_request(rng, catalog_ids):
+    """Pick the next request from the traffic mix, returns (name, method, path, body)"""
+    name = rng.choices(list(TRAFFIC_MIX), weights=list(TRAFFIC_MIX.values()))[0]
+    if name == 'match_programs':
+        # Result-day traffic is dominated by a few common profiles
+        profile = rng.choice(list(STUDENT_PROFILES.values())) if rng.random() < 0.2 else random_profile(rng)
+        return name, 'POST', '/api/match-programs', profile
+    if name == 'search_programs':
+        return name, 'GET', f'/api/search-programs?q={rng.choice(SEARCH_TERMS)}', None
+    if name == 'program_detail' and catalog_ids['programs']:
+        return name, 'GET', f"/api/program/{rng.choice(catalog_ids['programs'])}", None
+    if name == 'university_detail' and catalog_ids['universities']:
+        return name, 'GET', f"/api/university/{rng.choice(catalog_ids['universities'])}", None
+    if name in ('program_detail', 'university_detail'):
+        name = 'universities'
+    return name, 'GET', '/api/' + name.replace('_', '-'), None
+
+
+def send(base_url, method, path, body, timeout):
+    """'ok', 'shed' (turned away by admission control with 503/429) or 'error'"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'} if data else {})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            return 'ok' if 200 <= response.status < 300 else 'error'
+    except urllib.error.HTTPError as e:
+        return 'shed' if e.code in (429, 503) and e.headers.get('Retry-After') else 'error'
+    except (urllib.error.URLError, OSError):
+        return 'error'
+
+
+def fetch_json(base_url, path, timeout=30):
+    with urllib.request.urlopen(base_url + path, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def discover_catalog(base_url):
+    """Program and university ids to use for detail requests"""
+    programs = fetch_json(base_url, '/api/programs').get('programs', [])
+    universities = fetch_json(base_url, '/api/universities').get('universities', [])
+    return {
+        'programs': [p['id'] for p in programs],
+        'universities': [u['id'] for u in universities]
+    }
+
+
+def start_instance(port, workers, threads):
+    """Start a local gunicorn instance and wait until it reports ready"""
+    # All load comes from this one client, so only the per-client rate limit is off
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT), ADMISSION_CLIENT_RATE='0')
+    process = subprocess.Popen(
+        ['gunicorn', 'backend.app:create_app()', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--worker-class', 'gthread', '--threads', str(threads)],
+        cwd=PROJECT_ROOT, env=env
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            if fetch_json(base_url, '/healthz/ready', timeout=2).get('ready'):
+                return process, base_url
+        except (urllib.error.URLError, OSError, ValueError):
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError('instance did not become ready within 60s')
+
+
+def run_phase(phase, rate, duration, args, rng, catalog_ids, stats, executor):
+    """Offer load at a fixed rate for duration seconds without waiting on responses"""
+    total = int(rate * duration)
+    start = time.perf_counter() + 0.05
+    intended = start
+
+    def fire(intended_time, name, method, path, body):
+        stats.started()
+        outcome = send(args.url, method, path, body, args.timeout)
+        stats.finished(phase, name, (time.perf_counter() - intended_time) * 1000, outcome)
+
+    for _ in range(total):
+        if args.arrival == 'poisson':
+            intended += rng.expovariate(rate)
+        else:
+            intended += 1.0 / rate
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        executor.submit(fire, intended, *build_request(rng, catalog_ids))
+
+
+def parse_budgets(values):
+    budgets = {}
+    for value in values or []:
+        name, _, ms = value.partition('=')
+        budgets[name] = float(ms)
+    return budgets
+
+
+def build_report(stats, phases, budgets):
+    report = {'phases': [], 'max_in_flight': stats.max_in_flight, 'slo_violations': []}
+    for phase, rate, duration in phases:
+        entries = {}
+        for (stat_phase, name), histogram in sorted(stats.histograms.items()):
+            if stat_phase != phase:
+                continue
+            entries[name] = {
+                'requests': histogram.count,
+                'errors': stats.errors.get((phase, name), 0),
+                'shed': stats.shed.get((phase, name), 0),
+                'p50_ms': round(histogram.percentile(50), 2),
+                'p90_ms': round(histogram.percentile(90), 2),
+                'p99_ms': round(histogram.percentile(99), 2),
+                'p999_ms': round(histogram.percentile(99.9), 2),
+                'max_ms': round(histogram.max, 2)
+            }
+            budget = budgets.get(name)
+            if budget is not None and entries[name]['p99_ms'] > budget:
+                report['slo_violations'].append({
+                    'phase': phase, 'endpoint': name, 'p99_ms': entries[name]['p99_ms'], 'budget_ms': budget
+                })
+        report['phases'].append({'name': phase, 'rate': rate, 'duration': duration, 'endpoints': entries})
+    return report
+
+
+def print_report(report):
+    for phase in report['phases']:
+        print(f"\n== {phase['name']}: {phase['rate']:.1f} req/s for {phase['duration']}s")
+        print(f"{'endpoint':<20}{'requests':>9}{'errors':>8}{'shed':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}")
+        for name, e in phase['endpoints'].items():
+            print(f"{name:<20}{e['requests']:>9}{e['errors']:>8}{e['shed']:>8}{e['p50_ms']:>10.1f}{e['p90_ms']:>10.1f}"
+                  f"{e['p99_ms']:>10.1f}{e['p999_ms']:>10.1f}{e['max_ms']:>10.1f}")
+    print(f"\nMax requests in flight: {report['max_in_flight']}")
+    for violation in report['slo_violations']:
+        print(f"SLO VIOLATION [{violation['phase']}] {violation['endpoint']}: "
+              f"p99 {violation['p99_ms']:.1f} ms > budget {violation['budget_ms']:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Open-loop load test for the Uni-verse API')
+    parser.add_argument('--url', default='http://localhost:5000', help='base URL of a running instance')
+    parser.add_argument('--start', action='store_true', help='start a local gunicorn instance against DATABASE_URL')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=80, help='gunicorn threads per worker, as in the Procfile')
+    parser.add_argument('--rate', type=float, default=10.0, help='steady-state requests per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='steady-state seconds')
+    parser.add_argument('--spike', type=float, default=0.0, help='spike multiplier of --rate (e.g. 20)')
+    parser.add_argument('--spike-duration', type=float, default=10.0)
+    parser.add_argument('--arrival', choices=['uniform', 'poisson'], default='poisson')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout in seconds')
+    parser.add_argument('--max-in-flight', type=int, default=1024, help='client threads available for requests')
+    parser.add_argument('--p99-budget', action='append', metavar='ENDPOINT=MS',
+                        help='p99 budget per request class, e.g. match_programs=1500 (repeatable)')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    args = parser.parse_args(argv)
+
+    budgets = parse_budgets(args.p99_budget)
+    rng = random.Random(args.seed)
+    process = None
+    if args.start:
+        process, args.url = start_instance(args.port, args.workers, args.threads)
+
+    try:
+        catalog_ids = discover_catalog(args.url)
+        phases = [('steady', args.rate, args.duration)]
+        if args.spike:
+            phases.append(('spike', args.rate * args.spike, args.spike_duration))
+            phases.append(('recovery', args.rate, args.duration))
+
+        stats = Stats()
+        with ThreadPoolExecutor(max_workers=args.max_in_flight) as executor:
+            for phase, rate, duration in phases:
+                print(f"Running {phase}: {rate:.1f} req/s for {duration}s")
+                run_phase(phase, rate, duration, args, rng, catalog_ids, stats, executor)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = build_report(stats, phases, budgets)
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 1 if report['slo_violations'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
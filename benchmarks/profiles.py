@@ -0,0 +1,78 @@
+"""
+Student profiles shared by the benchmark and load-test tools.
+
+These are the five HSC-group profiles exercised by test_all_interests.py.
+"""
+
+STUDENT_PROFILES = {
+    'pre_medical': {
+        "sscPercentage": "90",
+        "hscPercentage": "90",
+        "qualificationType": "HSC/A-Level",
+        "hscGroup": "Pre-Medical",
+        "budget": "10000000000",
+        "preferredLocation": "Karachi",
+        "interests": ["Medicine", "Pharmacy", "Computer Science"],
+        "interestPriorities": [
+            {"interest": "Medicine", "priority": 1},
+            {"interest": "Pharmacy", "priority": 2},
+            {"interest": "Computer Science", "priority": 3}
+        ]
+    },
+    'pre_engineering': {
+        "sscPercentage": "85",
+        "hscPercentage": "85",
+        "qualificationType": "HSC/A-Level",
+        "hscGroup": "Pre-Engineering",
+        "budget": "8000000",
+        "preferredLocation": "Lahore",
+        "interests": ["Engineering", "Computer Science", "Technology"],
+        "interestPriorities": [
+            {"interest": "Engineering", "priority": 1},
+            {"interest": "Computer Science", "priority": 2},
+            {"interest": "Technology", "priority": 3}
+        ]
+    },
+    'ics': {
+        "sscPercentage": "80",
+        "hscPercentage": "80",
+        "qualificationType": "HSC/A-Level",
+        "hscGroup": "ICS (Computer Science)",
+        "budget": "6000000",
+        "preferredLocation": "Islamabad",
+        "interests": ["Computer Science", "Software Engineering", "Information Technology"],
+        "interestPriorities": [
+            {"interest": "Computer Science", "priority": 1},
+            {"interest": "Software Engineering", "priority": 2},
+            {"interest": "Information Technology", "priority": 3}
+        ]
+    },
+    'icom': {
+        "sscPercentage": "75",
+        "hscPercentage": "75",
+        "qualificationType": "HSC/A-Level",
+        "hscGroup": "ICom (Commerce)",
+        "budget": "5000000",
+        "preferredLocation": "Karachi",
+        "interests": ["Business", "Commerce", "Economics"],
+        "interestPriorities": [
+            {"interest": "Business", "priority": 1},
+            {"interest": "Commerce", "priority": 2},
+            {"interest": "Economics", "priority": 3}
+        ]
+    },
+    'ia': {
+        "sscPercentage": "70",
+        "hscPercentage": "70",
+        "qualificationType": "HSC/A-Level",
+        "hscGroup": "IA (Arts)",
+        "budget": "4000000",
+        "preferredLocation": "Lahore",
+        "interests": ["Arts", "Literature", "Psychology"],
+        "interestPriorities": [
+            {"interest": "Arts", "priority": 1},
+            {"interest": "Literature", "priority": 2},
+            {"interest": "Psychology", "priority": 3}
+        ]
+    }
+}
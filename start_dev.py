@@ -10,6 +10,8 @@ import subprocess
 import time
 import signal
 import threading
+import urllib.error
+import urllib.request
 from pathlib import Path
 
 # Project directories
@@ -37,6 +39,21 @@ def print_success(message):
     """Print a success message"""
     print(f"{Colors.GREEN}[SUCCESS]{Colors.END} {message}")
 
+def wait_until_ready(url, process, timeout=60):
+    """Poll url until it answers 200, the process exits or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    return False
+
 def check_python_dependencies():
     """Check if Python dependencies are installed"""
     print_status("Checking Python dependencies...")
@@ -98,12 +115,14 @@ def setup_backend():
             text=True
         )
         
-        # Wait a moment for server to start
-        time.sleep(3)
-        
-        if process.poll() is None:
+        # Wait until the backend has warmed up and reports ready
+        if wait_until_ready("http://localhost:5000/healthz/ready", process):
             print_success("Backend server started on http://localhost:5000")
             return process
+        elif process.poll() is None:
+            print_error("Backend did not become ready; check /healthz/ready for the warm-up error")
+            process.terminate()
+            return None
         else:
             stdout, stderr = process.communicate()
             print_error(f"Backend failed to start: {stderr}")
@@ -173,12 +192,14 @@ def setup_frontend():
             print_error("npm not found for running dev server")
             return None
         
-        # Wait a moment for server to start
-        time.sleep(5)
-        
-        if process.poll() is None:
+        # Wait until the dev server answers
+        if wait_until_ready("http://localhost:5173", process):
             print_success("Frontend server started on http://localhost:5173")
             return process
+        elif process.poll() is None:
+            print_error("Frontend dev server did not answer on http://localhost:5173")
+            process.terminate()
+            return None
         else:
             stdout, stderr = process.communicate()
             print_error(f"Frontend failed to start: {stderr}")
@@ -0,0 +1,64 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.catalog import Catalog, CatalogOffering  # noqa: E402
+from backend.schema import normalize_city  # noqa: E402
+
+CITIES = ['Karachi', 'Lahore', 'Islamabad', '  karachi ', 'Peshawar']
+TAGS = ['Engineering', 'Computer Science', 'Medicine', 'Business', 'Law']
+GROUPS = ['Pre-Engineering', 'Pre-Medical', 'ICS', 'ICom', 'Humanities']
+
+
+def synthetic_offerings(seed, count):
+    """Catalog rows in match order, with repeated scores and fees so ties are exercised"""
+    rng = random.Random(seed)
+    rows = []
+    for offering_id in rng.sample(range(1, count * 10 + 2), count):
+        tags = ', '.join(sorted(rng.sample(TAGS, rng.randint(0, 3)))) or None
+        groups = ', '.join(sorted(rng.sample(GROUPS, rng.randint(0, 2)))) or None
+        city = rng.choice(CITIES)
+        rows.append(CatalogOffering(
+            offering_id, rng.randint(1, 20), f'Program {offering_id % 7}', rng.choice(['Engineering', 'Medical', None]), None,
+            rng.randint(1, 5), f'University {offering_id % 5}', rng.choice(['Public', 'Private']),
+            city, float(rng.choice([40, 50, 55.5, 60, 70, 85, 100])), rng.choice(['ssc_hsc', 'ibcc']),
+            rng.choice([0, 50000, 120000, 250000, 999999, 1500000]), rng.random() < 0.5,
+            rng.randint(1, 4), tags, groups, rng.choice(['Pakistani Boards', None]),
+            city_key=normalize_city(city),
+            tag_keys=frozenset(tag.strip().lower() for tag in tags.split(',')) if tags else frozenset()
+        ))
+    rows.sort(key=lambda row: (row.min_score_pct, row.annual_fee, row.offering_id))
+    return rows
+
+
+def synthetic_catalog(seed, count):
+    rng = random.Random(seed)
+    offerings = synthetic_offerings(seed, count)
+    group_checks = {
+        group: {
+            row.offering_id: (rng.randint(-20, 15), rng.random() < 0.7)
+            for row in offerings if rng.random() < 0.9
+        }
+        for group in GROUPS
+    }
+    return Catalog(f'{seed}-synthetic', offerings, group_checks)
+
+
+@pytest.fixture(scope='session')
+def app():
+    """App on TEST_DATABASE_URL, a scratch database prepared by backend.release and loaded by backend.ingest"""
+    url = os.getenv('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip('set TEST_DATABASE_URL to a scratch database to run the database tests')
+    from backend.app import create_app
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': url,
+        'WARMUP_ON_START': False,
+        'CATALOG_LISTEN': False,
+        'DB_KEEPALIVE_SECONDS': 0,
+        'ADMISSION_CLIENT_RATE': 0
+    })
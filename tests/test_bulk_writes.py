@@ -0,0 +1,138 @@
+import pytest
+from sqlalchemy import text
+
+from backend.bulk_writes import MAX_ITEMS, BulkWriteError, apply_bulk, validate_payload, values_list
+
+
+def errors_of(payload):
+    with pytest.raises(BulkWriteError) as raised:
+        validate_payload(payload)
+    return [(error['section'], error['index'], error['error']) for error in raised.value.errors]
+
+
+def test_payload_must_be_an_object():
+    assert errors_of([]) == [(None, None, 'Body must be a JSON object')]
+
+
+def test_nothing_to_write():
+    assert errors_of({})[0][2].startswith('Nothing to write')
+    assert errors_of({'offerings': []})[0][2].startswith('Nothing to write')
+
+
+def test_unknown_sections_and_shapes():
+    assert errors_of({'prices': [], 'tags': {}}) == [
+        (None, None, 'Unknown sections: prices'),
+        ('tags', None, 'must be a list')
+    ]
+    assert errors_of({'offerings': [{'id': 1, 'annual_fee': 1}] * (MAX_ITEMS + 1)}) == [
+        ('offerings', None, f'at most {MAX_ITEMS} items per request')
+    ]
+
+
+def test_item_ids():
+    assert errors_of({'offerings': [5, {'annual_fee': 1}, {'id': True, 'annual_fee': 1}],
+                      'groups': [{'offering_id': 1, 'groups': []}, {'offering_id': 1, 'groups': []}]}) == [
+        ('offerings', 0, 'must be an object'),
+        ('offerings', 1, 'id must be an integer'),
+        ('offerings', 2, 'id must be an integer'),
+        ('groups', 1, 'duplicate offering_id 1')
+    ]
+
+
+def test_offering_fields():
+    assert errors_of({'offerings': [
+        {'id': 1},
+        {'id': 2, 'fee': 10},
+        {'id': 3, 'min_score_pct': 100.5},
+        {'id': 4, 'min_score_pct': True},
+        {'id': 5, 'min_score_type': 'sat'},
+        {'id': 6, 'annual_fee': -1},
+        {'id': 7, 'annual_fee': 10.5},
+        {'id': 8, 'hostel_available': 'yes'}
+    ]}) == [
+        ('offerings', 0, 'nothing to update; fields are min_score_pct, min_score_type, annual_fee, hostel_available'),
+        ('offerings', 1, 'unknown fields: fee'),
+        ('offerings', 1, 'nothing to update; fields are min_score_pct, min_score_type, annual_fee, hostel_available'),
+        ('offerings', 2, 'min_score_pct must be a number between 0 and 100'),
+        ('offerings', 3, 'min_score_pct must be a number between 0 and 100'),
+        ('offerings', 4, 'min_score_type must be one of ssc_hsc, ibcc'),
+        ('offerings', 5, 'annual_fee must be a non-negative integer'),
+        ('offerings', 6, 'annual_fee must be a non-negative integer'),
+        ('offerings', 7, 'hostel_available must be true or false')
+    ]
+
+
+def test_sets_and_tests():
+    errors = errors_of({
+        'tags': [{'offering_id': 1, 'tags': ['ok', ' ']}, {'offering_id': 2, 'tags': ['x' * 1000]}],
+        'boards': [{'offering_id': 1}],
+        'tests': [{'offering_id': 1, 'tests': [{'min_score': 5}]},
+                  {'offering_id': 2, 'tests': [{'name': 'NTS', 'min_score': -1}]},
+                  {'offering_id': 3, 'tests': 'NTS'}]
+    })
+    assert errors[0] == ('tags', 0, 'tags must be a list of non-empty strings')
+    assert errors[1][:2] == ('tags', 1) and errors[1][2].startswith('tags longer than')
+    assert errors[2] == ('boards', 0, 'boards must be a list of non-empty strings')
+    assert errors[3] == ('tests', 0, 'each test needs a name')
+    assert errors[4] == ('tests', 1, 'min_score of NTS must be a non-negative number')
+    assert errors[5][:2] == ('tests', 2)
+
+
+def test_valid_payload_is_normalized():
+    sections = validate_payload({
+        'offerings': [{'id': 1, 'annual_fee': 0, 'hostel_available': False}],
+        'tags': [{'offering_id': 1, 'tags': [' Robotics ', 'Robotics', 'AI']}],
+        'groups': [{'offering_id': 2, 'groups': []}],
+        'tests': [{'offering_id': 1, 'tests': [{'name': 'NTS', 'min_score': 60}, {'name': 'NTS'}]}]
+    })
+    assert sections['offerings'] == [{'id': 1, 'annual_fee': 0, 'hostel_available': False}]
+    assert sections['tags'] == [(1, ['Robotics', 'AI'])]
+    assert sections['groups'] == [(2, [])]
+    assert sections['tests'] == [(1, [('NTS', 0.0)])]
+
+
+def test_values_list_casts_the_first_row_only():
+    sql, params = values_list([(1, None), (2, 'a')], ['integer', 'text'])
+    assert sql == '(CAST(:v0_0 AS integer), CAST(:v0_1 AS text)), (:v1_0, :v1_1)'
+    assert params == {'v0_0': 1, 'v0_1': None, 'v1_0': 2, 'v1_1': 'a'}
+
+
+@pytest.fixture
+def offering(app):
+    from backend.models import db
+    with app.app_context():
+        row = db.session.execute(text("SELECT id, annual_fee FROM program_offerings ORDER BY id LIMIT 1")).one()
+        missing = db.session.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM program_offerings")).scalar()
+        jobs = db.session.execute(text("SELECT COALESCE(MAX(id), 0) FROM jobs")).scalar()
+        db.session.rollback()
+        yield row.id, row.annual_fee, missing
+        db.session.execute(text("UPDATE program_offerings SET annual_fee = :fee WHERE id = :id"),
+                           {'fee': row.annual_fee, 'id': row.id})
+        db.session.execute(text("DELETE FROM jobs WHERE id > :id"), {'id': jobs})
+        db.session.commit()
+
+
+def _state(offering_id):
+    from backend.models import db
+    fee = db.session.execute(text("SELECT annual_fee FROM program_offerings WHERE id = :id"), {'id': offering_id}).scalar()
+    jobs = db.session.execute(text("SELECT count(*) FROM jobs")).scalar()
+    db.session.rollback()
+    return fee, jobs
+
+
+def test_apply_bulk_rejects_unknown_offerings_without_writing(offering):
+    offering_id, fee, missing = offering
+    before = _state(offering_id)
+    with pytest.raises(BulkWriteError) as raised:
+        apply_bulk({'offerings': [{'id': offering_id, 'annual_fee': fee + 1}, {'id': missing, 'annual_fee': 1}]})
+    assert raised.value.errors == [{'section': 'offerings', 'index': 1, 'error': f'offering {missing} does not exist'}]
+    assert _state(offering_id) == before
+
+
+def test_apply_bulk_writes_and_queues_a_refresh(offering):
+    offering_id, fee, _ = offering
+    _, jobs = _state(offering_id)
+    result = apply_bulk({'offerings': [{'id': offering_id, 'annual_fee': fee + 1}]})
+    assert result['counts'] == {'offerings': {'updated': 1}}
+    assert result['refresh_job'] is not None
+    assert _state(offering_id) == (fee + 1, jobs + 1)
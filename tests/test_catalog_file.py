@@ -0,0 +1,64 @@
+import pytest
+
+from backend.catalog_file import CatalogFileError, open_catalog_file, read_file_version, write_catalog_file
+from conftest import synthetic_catalog
+
+SCORES = [0, 50, 55.5, 70, 100]
+FEES = [0, 120000, 999999, 10 ** 9]
+
+
+def assert_same_catalog(mapped, catalog):
+    assert mapped.version == catalog.version
+    assert len(mapped) == len(catalog)
+    assert list(mapped.offerings) == list(catalog.offerings)
+
+    for row in catalog.offerings:
+        assert mapped.by_id.get(row.offering_id) == row
+        assert row.offering_id in mapped.by_id
+    assert mapped.by_id.get(-1) is None
+
+    assert set(mapped.group_checks) == set(catalog.group_checks)
+    for group, checks in catalog.group_checks.items():
+        for row in catalog.offerings:
+            assert mapped.group_checks[group].get(row.offering_id) == checks.get(row.offering_id)
+
+    assert mapped.facets.bitmaps == catalog.facets.bitmaps
+
+    for max_score in SCORES:
+        for max_fee in FEES:
+            for score_type in (None, 'ssc_hsc', 'ibcc'):
+                assert mapped.index.query(max_score, max_fee, score_type) == catalog.index.query(max_score, max_fee, score_type)
+
+
+@pytest.mark.parametrize('count', [0, 1, 9, 200])
+def test_round_trip(tmp_path, count):
+    catalog = synthetic_catalog(count, count)
+    path = tmp_path / 'catalog.bin'
+    assert write_catalog_file(str(path), catalog) == path.stat().st_size
+    assert read_file_version(str(path)) == catalog.version
+    assert_same_catalog(open_catalog_file(str(path)), catalog)
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / 'catalog.bin'
+    write_catalog_file(str(path), synthetic_catalog(1, 50))
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(CatalogFileError):
+        open_catalog_file(str(path))
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / 'catalog.bin'
+    path.write_bytes(b'not a catalog file' * 10)
+    with pytest.raises(CatalogFileError):
+        open_catalog_file(str(path))
+
+
+def test_round_trip_of_loaded_catalog(app, tmp_path):
+    from backend.catalog import load_catalog
+    with app.app_context():
+        catalog = load_catalog()
+    path = tmp_path / 'catalog.bin'
+    write_catalog_file(str(path), catalog)
+    assert_same_catalog(open_catalog_file(str(path)), catalog)
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from backend.facets import FACETS, FacetIndex, _facet_values
+from conftest import synthetic_offerings
+
+
+def matches(row, filters):
+    values = _facet_values(row)
+    return all(set(values[facet]) & set(selected) for facet, selected in filters.items())
+
+
+def random_filters(rng, index):
+    filters = {}
+    for facet in rng.sample(FACETS, rng.randint(0, 3)):
+        values = list(index.bitmaps[facet]) + ['no such value']
+        filters[facet] = rng.sample(values, min(len(values), rng.randint(1, 2)))
+    return filters
+
+
+@pytest.mark.parametrize('count', [0, 1, 8, 9, 150])
+def test_selection_and_counts_match_brute_force(count):
+    rng = random.Random(count)
+    offerings = synthetic_offerings(count, count)
+    index = FacetIndex(offerings)
+    for _ in range(50):
+        filters = random_filters(rng, index)
+        selected = index.selection(filters)
+        expected = [position for position, row in enumerate(offerings) if matches(row, filters)]
+        assert index.positions(selected) == expected
+
+        counts = index.counts(filters)
+        for facet in FACETS:
+            others = {other: values for other, values in filters.items() if other != facet}
+            expected_counts = {}
+            for row in offerings:
+                if matches(row, others):
+                    for value in _facet_values(row)[facet]:
+                        if value is not None:
+                            expected_counts[value] = expected_counts.get(value, 0) + 1
+            assert {item['value']: item['count'] for item in counts[facet]} == expected_counts
+
+
+def test_own_filter_does_not_narrow_its_counts():
+    offerings = synthetic_offerings(4, 100)
+    index = FacetIndex(offerings)
+    unfiltered = index.counts({})
+    city = unfiltered['city'][-1]['value']
+    assert index.counts({'city': [city]})['city'] == unfiltered['city']
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from backend.range_index import RangeIndex, ScoreFeeIndex
+from conftest import synthetic_offerings
+
+SCORES = [-1, 0, 39.9, 40, 50, 55.5, 55.6, 60, 70, 85, 99.9, 100, 101]
+FEES = [-1, 0, 49999, 50000, 120000, 250000, 999999, 1500000, 10 ** 9]
+
+
+def brute_force(offerings, max_score, max_fee, score_type=None):
+    return [
+        row for row in offerings
+        if row.min_score_pct <= max_score and row.annual_fee <= max_fee
+        and (score_type is None or row.min_score_type == score_type)
+    ]
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 3, 7, 8, 9, 64, 100, 257])
+def test_query_matches_brute_force(count):
+    offerings = synthetic_offerings(count, count)
+    index = RangeIndex(offerings)
+    for max_score in SCORES:
+        for max_fee in FEES:
+            for score_type in (None, 'ssc_hsc', 'ibcc', 'unknown'):
+                expected = brute_force(offerings, max_score, max_fee, score_type)
+                assert index.query(max_score, max_fee, score_type) == expected
+                assert index.count(max_score, max_fee, score_type) == len(expected)
+
+
+def test_score_fee_index_random_entries():
+    rng = random.Random(7)
+    for count in range(0, 40):
+        entries = [(rng.randint(0, 10), rng.randint(0, 10), position) for position in range(count)]
+        index = ScoreFeeIndex(entries)
+        assert len(index) == count
+        for max_score in range(-1, 12):
+            for max_fee in range(-1, 12):
+                expected = sorted(position for score, fee, position in entries if score <= max_score and fee <= max_fee)
+                assert sorted(index.positions(max_score, max_fee)) == expected
+                assert index.count(max_score, max_fee) == len(expected)
+
+
+def test_from_arrays_answers_like_the_built_index():
+    entries = [(row.min_score_pct, row.annual_fee, position) for position, row in enumerate(synthetic_offerings(3, 50))]
+    built = ScoreFeeIndex(entries)
+    restored = ScoreFeeIndex.from_arrays(built.scores, built.levels)
+    for max_score in SCORES:
+        for max_fee in FEES:
+            assert sorted(restored.positions(max_score, max_fee)) == sorted(built.positions(max_score, max_fee))